@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Chỉ hoạt động khi STORE_PROFILING bật (xem store/middleware.py)
+    'store.middleware.QueryProfilingMiddleware',
+    # Chỉ hoạt động khi có bản sao đọc (STORE_REPLICA_DATABASES)
+    'store.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,9 +83,67 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Ghi đồng thời (sổ điểm, đổi ưu đãi) cần khóa ghi ngay từ đầu transaction
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Bản sao chỉ đọc (xem store/routers.py). Đặt STORE_REPLICA_DB là đường dẫn file
+# SQLite để chạy thử với bản sao giả lập, đồng bộ bằng `manage.py sync_replica`;
+# production khai báo alias trỏ tới replica thật và liệt kê trong
+# STORE_REPLICA_DATABASES. Khi chạy test, bản sao dùng chung CSDL test (MIRROR) để
+# truy vấn đọc có dữ liệu; việc chọn alias được kiểm tra riêng trong store/tests.py.
+STORE_REPLICA_DB = os.environ.get('STORE_REPLICA_DB')
+if STORE_REPLICA_DB:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{Path(STORE_REPLICA_DB).resolve()}?mode=ro',
+        'OPTIONS': {'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+STORE_REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+# Thời gian (giây) đọc từ CSDL chính sau khi ghi, bằng độ trễ sao chép tối đa
+STORE_REPLICA_MAX_LAG = float(os.environ.get('STORE_REPLICA_MAX_LAG', 5))
+# Model đọc được từ bản sao; mặc định store.routers.REPLICA_MODELS
+# STORE_REPLICA_MODELS = ['store.product', ...]
+# Chọn CSDL theo view: {'<view_name>': 'primary' | 'replica'}
+STORE_VIEW_DATABASES = {}
+
+DATABASE_ROUTERS = ['store.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Production: đặt REDIS_URL (ví dụ redis://127.0.0.1:6379/1, cần gói redis).
+# Chạy cục bộ/test: LocMemCache, hoặc đặt STORE_CACHE_ALIAS='file' để dùng file.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': (
+        {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+        if REDIS_URL else
+        {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'store',
+        }
+    ),
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    },
+}
+
+# Alias cache mà app store dùng (store/cache.py)
+STORE_CACHE_ALIAS = os.environ.get('STORE_CACHE_ALIAS', 'default')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,6 +181,44 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Chương trình nhận quyên góp từ đơn hàng đã giao (store/fulfillment.py);
+# để trống là chương trình đang hoạt động có id nhỏ nhất
+STORE_DONATION_PROGRAM_ID = int(os.environ.get('STORE_DONATION_PROGRAM_ID') or 0) or None
+
+# Số luồng nền tạo thumbnail/WebP sau khi lưu ảnh (store/images.py)
+STORE_IMAGE_WORKERS = 2
+
+# Lưu trữ lịch sử cũ (store/archive.py, lệnh `archive_history`): số ngày giữ
+# trong bảng chính theo loại, và thư mục xuất JSONL nén (None = không xuất)
+STORE_ARCHIVE_AFTER_DAYS = {
+    'status_history': 365,
+    'point_history': 365,
+    'otp': 30,
+}
+STORE_ARCHIVE_EXPORT_DIR = os.environ.get('STORE_ARCHIVE_EXPORT_DIR') or None
+
+# Đo truy vấn/cache theo request (store/middleware.py)
+STORE_PROFILING = os.environ.get('STORE_PROFILING') == '1'
+STORE_PROFILING_SLOW_MS = int(os.environ.get('STORE_PROFILING_SLOW_MS', 500))
+# Thư mục lưu file cProfile của request chậm; để trống là tắt
+STORE_PROFILING_DIR = os.environ.get('STORE_PROFILING_DIR') or None
+STORE_PROFILING_SAMPLE_RATE = float(os.environ.get('STORE_PROFILING_SAMPLE_RATE', 0.1))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Mỗi request một dòng JSON
+        'store.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
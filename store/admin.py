@@ -1,19 +1,44 @@
 # admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Q
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from .models import (
     User, ShippingAddress, OTPVerification,
     Product, Review,
     Order, OrderDetail, OrderStatusHistory, ShoppingCart,
     CharityProgram, DonationHistory, Disbursement,
     LovePointBalance, LovePointHistory, Voucher, RedeemedOffer,
-    ContentPost
+    ContentPost, OrderStatus, SearchKind,
+    DailySales, DailyProductSales, DailyDonation,
+    Job, JobStatus,
+    ArchivedOrderStatusHistory, ArchivedLovePointHistory, ArchivedOTPVerification,
 )
+from .admin_mixins import (
+    AutocompleteMixin, ExportActionsMixin, FullTextSearchMixin, ImageThumbnailMixin,
+    KeysetPaginationMixin, RelatedListMixin,
+)
+from .catalog_import import ProductImportError, detect_format, import_products
+from .forms import ProductImportForm
+from .fulfillment import complete_orders
+from .jobs import enqueue
+from .redemption import POOL_BATCH_SIZE, generate_codes
+
+
+class StoreModelAdmin(AutocompleteMixin, RelatedListMixin, admin.ModelAdmin):
+    """
+    Lớp cơ sở cho các admin của app store: changelist tự select_related, khóa
+    ngoại trong form và list_filter dùng autocomplete.
+    """
+
 
 # --- I. User Management ---
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(AutocompleteMixin, RelatedListMixin, BaseUserAdmin):
     """
     Tùy chỉnh Admin cho Custom User Model.
     """
@@ -21,6 +46,7 @@ class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'full_name', 'phone_number', 'role', 'account_status', 'is_staff')
     list_filter = ('role', 'account_status', 'is_staff', 'is_active')
     search_fields = ('email', 'full_name', 'phone_number')
+    prefix_search_fields = ('email',)
     ordering = ('email',)
 
     # Tùy chỉnh các trường khi Edit
@@ -52,30 +78,65 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(ShippingAddress)
-class ShippingAddressAdmin(admin.ModelAdmin):
+class ShippingAddressAdmin(StoreModelAdmin):
     list_display = ('user', 'recipient_name', 'province', 'district', 'is_default')
     search_fields = ('user__email', 'recipient_name', 'phone_number')
     list_filter = ('is_default', 'province')
 
 @admin.register(OTPVerification)
-class OTPVerificationAdmin(admin.ModelAdmin):
-    list_display = ('email', 'otp_code', 'expires_at', 'is_used')
+class OTPVerificationAdmin(StoreModelAdmin):
+    list_display = ('email', 'expires_at', 'is_used')
+    readonly_fields = ('otp_code',)
     search_fields = ('email',)
     list_filter = ('is_used',)
 
 # --- II. Product & Review ---
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'status', 'charity_percentage')
-    search_fields = ('name', 'description')
+class ProductAdmin(ImageThumbnailMixin, FullTextSearchMixin, StoreModelAdmin):
+    list_display = ('thumbnail', 'name', 'price', 'status', 'charity_percentage')
+    search_fields = ('name',)
+    prefix_search_fields = ('name',)
+    search_kind = SearchKind.PRODUCT # Mô tả được tìm qua full-text
     list_filter = ('status',)
     list_editable = ('price', 'status') # Cho phép sửa nhanh
 
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='store_product_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Tải lên CSV/JSONL để thêm/cập nhật sản phẩm hàng loạt (xem store/catalog_import.py)."""
+        if not self.has_change_permission(request) or not self.has_add_permission(request):
+            raise PermissionDenied
+        report = None
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            dry_run = form.cleaned_data['dry_run']
+            try:
+                report = import_products(upload, detect_format(upload.name), dry_run=dry_run)
+            except ProductImportError as exc:
+                form.add_error('file', str(exc))
+            else:
+                level = messages.INFO if dry_run else messages.SUCCESS
+                self.message_user(request, ("[dry-run] " if dry_run else "") + report.summary(), level)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Nhập sản phẩm từ file",
+            'form': form,
+            'report': report,
+        }
+        return TemplateResponse(request, 'admin/store/product/import_products.html', context)
+
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(FullTextSearchMixin, StoreModelAdmin):
     list_display = ('product', 'user', 'rating', 'created_at', 'display_status')
-    search_fields = ('user__email', 'product__name', 'comment')
+    search_fields = ('user__email', 'product__name')
+    search_kind = SearchKind.REVIEW
     list_filter = ('display_status', 'rating')
     list_editable = ('display_status',)
 
@@ -86,47 +147,107 @@ class OrderDetailInline(admin.TabularInline):
     extra = 0
     readonly_fields = ('product', 'quantity', 'price_at_purchase')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ExportActionsMixin, StoreModelAdmin):
+    export_kind = 'orders'
     list_display = ('order_code', 'user', 'total_amount', 'order_status', 'payment_method', 'created_at')
     search_fields = ('order_code', 'user__email')
+    prefix_search_fields = ('order_code',)
     list_filter = ('order_status', 'payment_method', 'created_at', 'donate_voucher')
     list_editable = ('order_status',)
     readonly_fields = ('order_code', 'user', 'total_amount', 'shipping_address', 'applied_voucher')
     inlines = [OrderDetailInline] # Hiển thị chi tiết đơn hàng ngay trong trang Order
+    actions = ['mark_delivered', 'mark_delivered_in_background']
+
+    def _complete(self, request, order_ids):
+        order_ids = list(order_ids)
+        try:
+            completed = complete_orders(order_ids, updated_by=request.user)
+        except ValueError as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        if completed:
+            self.message_user(request, f"Đã hoàn tất {len(completed)} đơn hàng.")
+        skipped = Order.objects.filter(pk__in=set(order_ids) - set(completed)).values_list('order_code', 'order_status')
+        if skipped:
+            labels = dict(OrderStatus.choices)
+            self.message_user(request, "Không chuyển sang Đã giao vì đơn đã giao hoặc đã hủy: " + ', '.join(
+                f"{code} ({labels.get(status, status)})" for code, status in skipped
+            ), messages.WARNING)
+
+    @admin.action(description="Đánh dấu đã giao (quyên góp & cộng điểm)")
+    def mark_delivered(self, request, queryset):
+        self._complete(request, queryset.values_list('pk', flat=True))
+
+    @admin.action(description="Đánh dấu đã giao (chạy nền)")
+    def mark_delivered_in_background(self, request, queryset):
+        order_ids = list(queryset.values_list('pk', flat=True))
+        enqueue('store.complete_orders', {'order_ids': order_ids, 'updated_by_id': request.user.pk})
+        self.message_user(request, f"Đã xếp {len(order_ids)} đơn hàng vào hàng đợi hoàn tất.")
+
+    def save_model(self, request, obj, form, change):
+        # Chuyển sang DELIVERED phải đi qua complete_orders để ghi quyên góp và điểm
+        delivering = (
+            change and 'order_status' in form.changed_data
+            and obj.order_status == OrderStatus.DELIVERED
+        )
+        if not delivering:
+            return super().save_model(request, obj, form, change)
+        obj.order_status = form.initial['order_status']
+        super().save_model(request, obj, form, change)
+        pending = getattr(request, '_orders_to_complete', None)
+        if pending is None:
+            self._complete(request, [obj.pk])
+        else:
+            pending.append(obj.pk)
+
+    def changelist_view(self, request, extra_context=None):
+        # Gom các dòng list_editable chuyển sang DELIVERED để xử lý một lô
+        request._orders_to_complete = []
+        response = super().changelist_view(request, extra_context)
+        if request._orders_to_complete:
+            self._complete(request, request._orders_to_complete)
+        return response
 
 @admin.register(OrderDetail)
-class OrderDetailAdmin(admin.ModelAdmin):
+class OrderDetailAdmin(KeysetPaginationMixin, StoreModelAdmin):
     list_display = ('order', 'product', 'quantity', 'price_at_purchase')
     search_fields = ('order__order_code', 'product__name')
 
 @admin.register(OrderStatusHistory)
-class OrderStatusHistoryAdmin(admin.ModelAdmin):
+class OrderStatusHistoryAdmin(KeysetPaginationMixin, StoreModelAdmin):
+    keyset_fields = ('updated_at', 'id')
     list_display = ('order', 'new_status', 'updated_by', 'updated_at')
     search_fields = ('order__order_code',)
     list_filter = ('new_status',)
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(StoreModelAdmin):
     list_display = ('user', 'product', 'quantity')
     search_fields = ('user__email', 'product__name')
 
 # --- IV. Charity & Transparency ---
 
 @admin.register(CharityProgram)
-class CharityProgramAdmin(admin.ModelAdmin):
-    list_display = ('name', 'target_amount', 'status')
+class CharityProgramAdmin(ImageThumbnailMixin, StoreModelAdmin):
+    list_display = ('thumbnail', 'name', 'target_amount', 'raised_amount', 'disbursed_amount', 'status')
     search_fields = ('name', 'description')
+    prefix_search_fields = ('name',)
     list_filter = ('status',)
 
 @admin.register(DonationHistory)
-class DonationHistoryAdmin(admin.ModelAdmin):
+class DonationHistoryAdmin(ExportActionsMixin, KeysetPaginationMixin, StoreModelAdmin):
+    export_kind = 'donations'
     list_display = ('order', 'program', 'amount', 'donation_type')
     search_fields = ('order__order_code', 'program__name')
     list_filter = ('donation_type', 'program')
 
 @admin.register(Disbursement)
-class DisbursementAdmin(admin.ModelAdmin):
+class DisbursementAdmin(ExportActionsMixin, StoreModelAdmin):
+    export_kind = 'disbursements'
     list_display = ('program', 'amount', 'disbursed_at', 'recipient_partner')
     search_fields = ('program__name', 'recipient_partner')
     list_filter = ('disbursed_at',)
@@ -134,32 +255,146 @@ class DisbursementAdmin(admin.ModelAdmin):
 # --- V. Offers & Points ---
 
 @admin.register(LovePointBalance)
-class LovePointBalanceAdmin(admin.ModelAdmin):
+class LovePointBalanceAdmin(StoreModelAdmin):
     list_display = ('user', 'current_balance')
     search_fields = ('user__email',)
 
 @admin.register(LovePointHistory)
-class LovePointHistoryAdmin(admin.ModelAdmin):
+class LovePointHistoryAdmin(KeysetPaginationMixin, StoreModelAdmin):
+    keyset_fields = ('transaction_date', 'id')
     list_display = ('user', 'transaction_type', 'points_changed', 'reason', 'transaction_date')
     search_fields = ('user__email', 'reason')
     list_filter = ('transaction_type', 'transaction_date')
 
 @admin.register(Voucher)
-class VoucherAdmin(admin.ModelAdmin):
-    list_display = ('name', 'voucher_type', 'points_required', 'discount_value')
+class VoucherAdmin(StoreModelAdmin):
+    list_display = ('name', 'voucher_type', 'points_required', 'discount_value', 'free_code_count')
     search_fields = ('name',)
     list_filter = ('voucher_type',)
+    actions = ['add_codes']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            free_code_count=Count('codes', filter=Q(codes__claimed_at__isnull=True)),
+        )
+
+    @admin.display(description="Mã còn trong kho", ordering='free_code_count')
+    def free_code_count(self, obj):
+        return obj.free_code_count
+
+    @admin.action(description=f"Thêm {POOL_BATCH_SIZE} mã vào kho")
+    def add_codes(self, request, queryset):
+        for voucher in queryset:
+            generate_codes(voucher, POOL_BATCH_SIZE)
+        self.message_user(request, f"Đã thêm {POOL_BATCH_SIZE} mã cho {len(queryset)} ưu đãi.", messages.SUCCESS)
 
 @admin.register(RedeemedOffer)
-class RedeemedOfferAdmin(admin.ModelAdmin):
-    list_display = ('redeemed_code', 'user', 'voucher', 'usage_status', 'redeemed_at')
+class RedeemedOfferAdmin(StoreModelAdmin):
+    list_display = ('redeemed_code', 'user', 'voucher', 'usage_status', 'redeemed_at', 'expires_at')
     search_fields = ('redeemed_code', 'user__email', 'voucher__name')
+    prefix_search_fields = ('redeemed_code',)
     list_filter = ('usage_status',)
 
 # --- VI. Content ---
 
 @admin.register(ContentPost)
-class ContentPostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'post_type', 'published_at')
-    search_fields = ('title', 'content', 'author__email')
-    list_filter = ('post_type', 'author')
\ No newline at end of file
+class ContentPostAdmin(ImageThumbnailMixin, FullTextSearchMixin, StoreModelAdmin):
+    list_display = ('thumbnail', 'title', 'author', 'post_type', 'published_at')
+    search_fields = ('title', 'author__email')
+    search_kind = SearchKind.POST
+    list_filter = ('post_type', 'author')
+
+# --- VII. Reports ---
+
+class RollupAdmin(StoreModelAdmin):
+    """Bảng tổng hợp chỉ đọc, do lệnh rollup_sales ghi."""
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(DailySales)
+class DailySalesAdmin(RollupAdmin):
+    list_display = ('day', 'order_count', 'cancelled_count', 'revenue')
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(RollupAdmin):
+    list_display = ('day', 'product', 'units_sold', 'order_count', 'revenue')
+    search_fields = ('product__name',)
+
+@admin.register(DailyDonation)
+class DailyDonationAdmin(RollupAdmin):
+    list_display = ('day', 'program', 'donation_type', 'donation_count', 'amount')
+    list_filter = ('donation_type', 'program')
+
+@admin.register(Job)
+class JobAdmin(StoreModelAdmin):
+    list_display = ('id', 'task', 'status', 'priority', 'attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'dedup_key')
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Chạy lại ngay (job thất bại)")
+    def retry(self, request, queryset):
+        # Bỏ qua job có dedup_key đã có job khác đang chờ
+        queued_keys = Job.objects.filter(status=JobStatus.QUEUED, dedup_key__isnull=False).values('dedup_key')
+        count = queryset.filter(status=JobStatus.FAILED).exclude(dedup_key__in=queued_keys).update(
+            status=JobStatus.QUEUED, run_at=timezone.now(), attempts=0, finished_at=None,
+        )
+        self.message_user(request, f"Đã xếp lại {count} job.", messages.SUCCESS)
+
+# --- VIII. Archive ---
+
+class ArchiveMonthFilter(admin.SimpleListFilter):
+    title = "Tháng"
+    parameter_name = 'month'
+
+    def lookups(self, request, model_admin):
+        months = model_admin.model.objects.dates('month', 'month', order='DESC')
+        return [(month.isoformat(), f'{month:%m/%Y}') for month in months]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(month=self.value())
+        return queryset
+
+class ArchiveAdmin(KeysetPaginationMixin, StoreModelAdmin):
+    """Bảng lưu trữ chỉ đọc, do lệnh archive_history ghi (xem store/archive.py)."""
+    list_filter = (ArchiveMonthFilter,)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedOrderStatusHistory)
+class ArchivedOrderStatusHistoryAdmin(ArchiveAdmin):
+    keyset_fields = ('updated_at', 'id')
+    list_display = ('order', 'new_status', 'updated_by', 'updated_at', 'month')
+    search_fields = ('order__order_code',)
+
+@admin.register(ArchivedLovePointHistory)
+class ArchivedLovePointHistoryAdmin(ArchiveAdmin):
+    keyset_fields = ('transaction_date', 'id')
+    list_display = ('user', 'transaction_type', 'points_changed', 'reason', 'transaction_date', 'month')
+    search_fields = ('user__email', 'reason')
+
+@admin.register(ArchivedOTPVerification)
+class ArchivedOTPVerificationAdmin(ArchiveAdmin):
+    keyset_fields = ('expires_at', 'id')
+    list_display = ('email', 'expires_at', 'is_used', 'month')
+    search_fields = ('email',)
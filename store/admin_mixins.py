@@ -0,0 +1,502 @@
+# admin_mixins.py
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections, models, router
+from django.db.models import Max, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.html import format_html
+
+from .exports import export_response
+from .images import IMAGE_FIELDS, renditions_for
+from .search import MAX_ADMIN_MATCHES, search_ids
+
+# Giới hạn độ sâu khi lần theo str_related_fields để tránh JOIN lan man
+MAX_STR_DEPTH = 2
+
+
+def str_related_paths(model, prefix='', depth=0):
+    """
+    Trả về các đường dẫn select_related mà model.__str__ cần (khai báo qua
+    `str_related_fields` trên model).
+    """
+    paths = []
+    if depth > MAX_STR_DEPTH:
+        return paths
+    for name in getattr(model, 'str_related_fields', ()):
+        field = model._meta.get_field(name)
+        path = prefix + name
+        paths.append(path)
+        paths.extend(str_related_paths(field.related_model, path + LOOKUP_SEP, depth + 1))
+    return paths
+
+
+def _relation_paths(model, lookup):
+    """
+    Các đường dẫn select_related cho một cột `list_display` dạng 'field' hoặc
+    'field__sub__attr'. Trả về [] nếu cột không phải là quan hệ.
+    """
+    paths = []
+    opts = model._meta
+    prefix = ''
+    for part in lookup.split(LOOKUP_SEP):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one) or not field.concrete:
+            break
+        prefix += part
+        paths.append(prefix)
+        opts = field.related_model._meta
+        prefix += LOOKUP_SEP
+    else:
+        # Cột kết thúc bằng một quan hệ: ô hiển thị gọi __str__ của model đích
+        if paths:
+            paths.extend(str_related_paths(opts.model, prefix))
+    return paths
+
+
+class OptimizedChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        qs = super().get_queryset(request, exclude_parameters)
+        deferred = self.model_admin.get_list_deferred_fields(request, self.list_display)
+        return qs.defer(*deferred) if deferred else qs
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.model_admin.prepare_results(request, self.result_list)
+
+
+class RelatedListMixin:
+    """
+    Tự tính select_related cho changelist từ `list_display` và
+    `str_related_fields` của các model liên quan, đồng thời defer các cột
+    TextField không hiển thị.
+    """
+    # Bổ sung các quan hệ được dùng trong phương thức hiển thị tùy chỉnh
+    list_select_related_extra = ()
+
+    def get_list_select_related(self, request):
+        if self.list_select_related is not False:
+            return self.list_select_related
+        paths = []
+        for name in self.get_list_display(request):
+            if name == '__str__':
+                candidates = str_related_paths(self.model)
+            elif isinstance(name, str):
+                candidates = _relation_paths(self.model, name)
+            else:
+                continue
+            paths.extend(p for p in candidates if p not in paths)
+        paths.extend(p for p in self.list_select_related_extra if p not in paths)
+        return tuple(paths)
+
+    def get_list_deferred_fields(self, request, list_display):
+        shown = set(list_display) | set(self.list_editable)
+        return [
+            f.name for f in self.model._meta.concrete_fields
+            if isinstance(f, models.TextField) and f.name not in shown
+        ]
+
+    def prepare_results(self, request, results):
+        """Nạp dữ liệu phụ cho cả trang kết quả một lần, trước khi render."""
+
+    def get_changelist(self, request, **kwargs):
+        return OptimizedChangeList
+
+
+# --- Phân trang keyset cho các bảng lịch sử chỉ ghi thêm ---
+
+CURSOR_VAR = 'cursor'
+DIRECTION_VAR = 'dir'
+# Khi có bộ lọc/tìm kiếm, chỉ đếm tối đa bấy nhiêu dòng
+FILTERED_COUNT_CAP = 10000
+
+
+def estimate_row_count(model, using=None):
+    """
+    Ước lượng số dòng của bảng từ thống kê của DB thay vì COUNT(*). Nếu DB
+    chưa có thống kê thì dùng MAX(pk), xấp xỉ tốt cho bảng chỉ ghi thêm.
+    """
+    using = using or router.db_for_read(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    estimate = None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            estimate = row[0] if row and row[0] >= 0 else None
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else None
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                estimate = int(row[0].split()[0]) if row else None
+    if estimate is None:
+        estimate = model._default_manager.using(using).aggregate(n=Max('pk'))['n'] or 0
+    return estimate
+
+
+class KeysetChangeList(OptimizedChangeList):
+    """
+    Changelist phân trang theo keyset (seek) trên `keyset_fields` của admin,
+    sắp giảm dần. Không dùng OFFSET và không COUNT(*) toàn bảng.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor_raw = request.GET.get(CURSOR_VAR)
+        self.direction = request.GET.get(DIRECTION_VAR, 'next')
+        super().__init__(request, *args, **kwargs)
+        # Link bộ lọc/tìm kiếm luôn quay về trang đầu
+        for params in (self.params, self.filter_params):
+            params.pop(CURSOR_VAR, None)
+            params.pop(DIRECTION_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        lookup_params.pop(DIRECTION_VAR, None)
+        return lookup_params
+
+    @property
+    def keyset_fields(self):
+        return self.model_admin.keyset_fields
+
+    def get_ordering(self, request, queryset):
+        return [f'-{name}' for name in self.keyset_fields]
+
+    def _parse_cursor(self):
+        if not self.cursor_raw:
+            return None
+        parts = self.cursor_raw.split('|')
+        if len(parts) != len(self.keyset_fields):
+            raise IncorrectLookupParameters
+        try:
+            return [
+                self.opts.get_field(name).to_python(value)
+                for name, value in zip(self.keyset_fields, parts)
+            ]
+        except ValidationError:
+            raise IncorrectLookupParameters
+
+    def _encode_cursor(self, obj):
+        values = []
+        for name in self.keyset_fields:
+            value = getattr(obj, self.opts.get_field(name).attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return '|'.join(values)
+
+    def _seek(self, values, lookup):
+        # (a, b) < (x, y)  <=>  a <= x AND (a < x OR (a = x AND b < y));
+        # điều kiện `a <= x` ở đầu giúp DB quét theo khoảng trên index
+        condition = Q()
+        for i, name in enumerate(self.keyset_fields):
+            equal = {self.keyset_fields[j]: values[j] for j in range(i)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[i]})
+        first = self.keyset_fields[0]
+        return Q(**{f'{first}__{lookup}e': values[0]}) & condition
+
+    def get_results(self, request):
+        values = self._parse_cursor()
+        per_page = self.list_per_page
+        qs = self.queryset
+        backwards = values is not None and self.direction == 'prev'
+        if values is not None:
+            qs = qs.filter(self._seek(values, 'gt' if backwards else 'lt'))
+        if backwards:
+            qs = qs.order_by(*self.keyset_fields)
+
+        rows = list(qs[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else True
+        self.has_prev = values is not None and (has_more if backwards else True)
+        self.next_url = self.prev_url = None
+        if rows and self.has_next:
+            self.next_url = self.get_query_string(
+                {CURSOR_VAR: self._encode_cursor(rows[-1]), DIRECTION_VAR: 'next'}
+            )
+        if rows and self.has_prev:
+            self.prev_url = self.get_query_string(
+                {CURSOR_VAR: self._encode_cursor(rows[0]), DIRECTION_VAR: 'prev'}
+            )
+
+        # Có lọc: đếm chính xác tới FILTERED_COUNT_CAP; không lọc: ước lượng
+        if self.has_active_filters or self.query:
+            result_count = self.queryset.order_by()[:FILTERED_COUNT_CAP].count()
+            self.count_is_capped = result_count >= FILTERED_COUNT_CAP
+            self.count_is_estimate = False
+        else:
+            result_count = estimate_row_count(self.model)
+            self.count_is_capped = False
+            self.count_is_estimate = True
+
+        self.result_count = result_count
+        self.full_result_count = result_count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.model_admin.prepare_results(request, rows)
+        self.can_show_all = False
+        self.multi_page = self.has_next or self.has_prev
+        self.paginator = None
+
+
+class KeysetPaginationMixin:
+    """
+    Dùng cho các bảng chỉ ghi thêm (lịch sử). Admin khai báo `keyset_fields`,
+    ví dụ ('transaction_date', 'id'); không dùng kèm list_editable.
+    """
+    keyset_fields = ('id',)
+    change_list_template = 'admin/store/keyset_change_list.html'
+    sortable_by = ()
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+# --- Tìm kiếm full-text trong admin ---
+
+class FullTextSearchMixin:
+    """
+    Kết hợp `search_fields` (cột ngắn, tìm bằng LIKE) với tìm kiếm full-text
+    trên SearchEntry cho các cột văn bản dài. Admin khai báo `search_kind`.
+    Phần full-text chỉ lấy MAX_ADMIN_MATCHES kết quả xếp hạng cao nhất; khi
+    chạm ngưỡng, changelist hiện cảnh báo.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term or self.search_kind is None or _is_autocomplete(request):
+            # Autocomplete đã tìm full-text trong AutocompleteMixin
+            return results, may_have_duplicates
+        ids = search_ids(self.search_kind, search_term)
+        if len(ids) >= MAX_ADMIN_MATCHES:
+            messages.warning(
+                request,
+                f"Tìm kiếm full-text chỉ lấy {MAX_ADMIN_MATCHES} kết quả phù hợp nhất; "
+                "hãy thêm từ khóa để thu hẹp kết quả.",
+                fail_silently=True,
+            )
+        matched = queryset.filter(pk__in=ids)
+        return results | matched, may_have_duplicates
+
+
+# --- Xuất dữ liệu theo luồng ---
+
+class ExportActionsMixin:
+    """
+    Thêm action xuất CSV/JSONL (gzip) theo luồng cho các dòng được chọn.
+    Admin khai báo `export_kind` (khóa trong store.exports.EXPORTS).
+    """
+    export_kind = None
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        for name in ('export_csv', 'export_jsonl_gz'):
+            actions[name] = self.get_action(name)
+        return actions
+
+    @admin.action(description="Xuất CSV")
+    def export_csv(self, request, queryset):
+        return export_response(self.export_kind, 'csv', queryset=queryset)
+
+    @admin.action(description="Xuất JSONL (gzip)")
+    def export_jsonl_gz(self, request, queryset):
+        return export_response(self.export_kind, 'jsonl', compress=True, queryset=queryset)
+
+
+# --- Ảnh thu nhỏ trong changelist ---
+
+class ImageThumbnailMixin:
+    """
+    Cột `thumbnail` hiển thị bản nhỏ đã dựng sẵn (store/images.py); URL của
+    cả trang được nạp trong một truy vấn qua prepare_results.
+    """
+    thumbnail_preset = 'thumb_webp'
+    thumbnail_size = 50
+
+    def prepare_results(self, request, results):
+        super().prepare_results(request, results)
+        field = IMAGE_FIELDS[self.model]
+        renditions = renditions_for(
+            (getattr(obj, field).name for obj in results), presets=[self.thumbnail_preset],
+        )
+        for obj in results:
+            obj._thumbnail = renditions.get(getattr(obj, field).name, {}).get(self.thumbnail_preset)
+
+    @admin.display(description="Ảnh")
+    def thumbnail(self, obj):
+        rendition = getattr(obj, '_thumbnail', None)
+        if rendition is None:
+            return '-'
+        return format_html(
+            '<img src="{}" width="{}" height="{}" loading="lazy" alt="">',
+            rendition['url'], self.thumbnail_size, self.thumbnail_size,
+        )
+
+
+# --- Autocomplete cho khóa ngoại ---
+
+# Autocomplete chỉ xét bấy nhiêu dòng khớp đầu tiên, nên COUNT và phân trang
+# của select2 không phụ thuộc kích thước bảng; gõ thêm ký tự để thu hẹp
+AUTOCOMPLETE_MAX_RESULTS = 200
+
+
+def _prefix_end(term):
+    # Chuỗi nhỏ nhất lớn hơn mọi chuỗi bắt đầu bằng `term`
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def prefix_q(fields, term):
+    """
+    Khớp tiền tố bằng so sánh khoảng `term <= cột < _prefix_end(term)`: dùng
+    được index B-tree thường của cột (LIKE 'x%' trên SQLite/PostgreSQL thì
+    không, trừ khi có collation/opclass riêng). Phân biệt hoa thường nên thử
+    thêm dạng chữ thường, chữ hoa và viết hoa chữ đầu.
+    """
+    variants = dict.fromkeys([term, term.lower(), term.upper(), term[:1].upper() + term[1:]])
+    condition = Q()
+    for variant in variants:
+        for field in fields:
+            condition |= Q(**{f'{field}__gte': variant, f'{field}__lt': _prefix_end(variant)})
+    return condition
+
+
+def _is_autocomplete(request):
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and match.url_name == 'autocomplete'
+
+
+def _has_autocomplete(admin_site, field):
+    related_admin = admin_site._registry.get(field.related_model)
+    return related_admin is not None and bool(related_admin.search_fields)
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Bộ lọc khóa ngoại dùng ô select2 gọi endpoint autocomplete của admin (tìm
+    và phân trang phía server) thay vì liệt kê mọi dòng của bảng liên quan.
+    """
+    template = 'admin/store/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        value = params.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def _widget(self):
+        widget = AutocompleteSelect(self.field, self.admin_site, attrs={'data-width': '100%'})
+        formfield = self.field.formfield(widget=widget, required=False)
+        # Chỉ dòng đang chọn được truy vấn để hiển thị nhãn
+        return formfield.widget.render(self.lookup_kwarg, self.lookup_val)
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': "Tất cả",
+        }
+        yield {
+            'selected': self.lookup_val is not None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'lookup': self.lookup_kwarg,
+            'widget': self._widget(),
+        }
+
+
+class AutocompleteMixin:
+    """
+    - Khóa ngoại trong form dùng widget autocomplete khi admin của model đích
+      có search_fields (không cần khai báo autocomplete_fields), và khóa ngoại
+      trong list_filter dùng AutocompleteFilter.
+    - Khi là yêu cầu autocomplete, admin đích tìm theo `prefix_search_fields`
+      (prefix_q, cột có index) và full-text nếu có `search_kind`, thay cho
+      LIKE '%x%' quét bảng; chỉ AUTOCOMPLETE_MAX_RESULTS dòng đầu được xét.
+      Không có dòng nào khớp thì quay về tìm LIKE trên `search_fields` (vẫn
+      dừng sau AUTOCOMPLETE_MAX_RESULTS dòng), nên vẫn tìm được theo họ tên,
+      số điện thoại hay một từ ở giữa tên.
+    """
+    prefix_search_fields = ()
+
+    def get_autocomplete_fields(self, request):
+        fields = list(super().get_autocomplete_fields(request))
+        for field in self.model._meta.fields:
+            if (field.many_to_one or field.one_to_one) and field.editable and field.name not in fields:
+                if field.name not in self.raw_id_fields and _has_autocomplete(self.admin_site, field):
+                    fields.append(field.name)
+        return fields
+
+    def _autocomplete_filter_fields(self):
+        fields = []
+        for item in self.list_filter:
+            if not isinstance(item, str) or LOOKUP_SEP in item:
+                continue
+            try:
+                field = self.model._meta.get_field(item)
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one and _has_autocomplete(self.admin_site, field):
+                fields.append(field)
+        return fields
+
+    def get_list_filter(self, request):
+        replaced = {field.name for field in self._autocomplete_filter_fields()}
+        return [
+            (item, AutocompleteFilter) if isinstance(item, str) and item in replaced else item
+            for item in super().get_list_filter(request)
+        ]
+
+    @property
+    def media(self):
+        media = super().media
+        fields = self._autocomplete_filter_fields()
+        if fields:
+            media += AutocompleteSelect(fields[0], self.admin_site).media
+        return media
+
+    def get_search_results(self, request, queryset, search_term):
+        if not _is_autocomplete(request):
+            return super().get_search_results(request, queryset, search_term)
+        search_term = search_term.strip()
+        if not queryset.ordered:
+            # Phân trang của select2 cần thứ tự ổn định
+            queryset = queryset.order_by('pk')
+        search_kind = getattr(self, 'search_kind', None)
+        pks = []
+        if search_term and (self.prefix_search_fields or search_kind):
+            condition = prefix_q(self.prefix_search_fields, search_term) if self.prefix_search_fields else Q(pk__in=[])
+            if search_kind:
+                condition |= Q(pk__in=search_ids(search_kind, search_term, limit=AUTOCOMPLETE_MAX_RESULTS))
+            pks = self._first_pks(queryset.filter(condition))
+        if not pks:
+            results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+            pks = self._first_pks(results.distinct() if may_have_duplicates else results)
+        return queryset.filter(pk__in=pks), False
+
+    def _first_pks(self, results):
+        return list(results.values_list('pk', flat=True)[:AUTOCOMPLETE_MAX_RESULTS])
@@ -0,0 +1,164 @@
+# archive.py
+"""
+Lưu trữ lịch sử cũ: chuyển OrderStatusHistory, LovePointHistory và
+OTPVerification quá tuổi (settings.STORE_ARCHIVE_AFTER_DAYS) sang các bảng
+Archived* theo lô, để bảng chính chỉ chứa dữ liệu trong một khoảng thời gian cố
+định thay vì lớn dần theo tuổi của hệ thống.
+
+- Mỗi lô chọn theo (cột thời gian, id) bằng index sẵn có, rồi trong một
+  transaction: INSERT vào bảng lưu trữ (giữ id gốc) và DELETE khỏi bảng chính.
+  Các model này không có signal xóa nên DELETE là một câu lệnh.
+- Nếu có `export_dir`, lô được ghi thêm vào <export_dir>/<kind>/<YYYY-MM>.jsonl.gz
+  (mỗi lô một gzip member) TRƯỚC khi chuyển: lỗi giữa chừng chỉ có thể gây trùng
+  dòng trong file (lọc theo `id`), không làm mất dòng.
+- Đọc xuyên (read-through): read_through() gộp bảng chính với bảng lưu trữ khi
+  được yêu cầu; admin có trang riêng cho các bảng lưu trữ.
+- OTP: `purge_otp` xóa hẳn mã hết hạn; lưu trữ khi cần giữ dấu vết gửi mã.
+"""
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .exports import encode, render_jsonl
+from .models import (
+    ArchivedLovePointHistory, ArchivedOrderStatusHistory, ArchivedOTPVerification,
+    LovePointHistory, OrderStatusHistory, OTPVerification,
+)
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+class ArchiveSpec:
+    def __init__(self, model, archive_model, date_field, fields, after_days):
+        self.model = model
+        self.archive_model = archive_model
+        # Cột thời gian quyết định tuổi và tháng của dòng
+        self.date_field = date_field
+        # Các cột chung của hai bảng (cột *_id cho khóa ngoại)
+        self.fields = fields
+        self.after_days = after_days
+
+
+ARCHIVES = {
+    'status_history': ArchiveSpec(
+        OrderStatusHistory, ArchivedOrderStatusHistory, 'updated_at',
+        ('id', 'order_id', 'new_status', 'updated_by_id', 'updated_at'),
+        after_days=365,
+    ),
+    'point_history': ArchiveSpec(
+        LovePointHistory, ArchivedLovePointHistory, 'transaction_date',
+        ('id', 'user_id', 'transaction_type', 'points_changed', 'reason', 'transaction_date'),
+        after_days=365,
+    ),
+    'otp': ArchiveSpec(
+        OTPVerification, ArchivedOTPVerification, 'expires_at',
+        ('id', 'email', 'expires_at', 'is_used'),
+        after_days=30,
+    ),
+}
+
+
+def cutoff(kind, now=None):
+    """Mốc thời gian: dòng cũ hơn được lưu trữ."""
+    spec = ARCHIVES[kind]
+    days = getattr(settings, 'STORE_ARCHIVE_AFTER_DAYS', {}).get(kind, spec.after_days)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def month_of(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _export(spec, kind, rows, export_dir):
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(month_of(row[spec.date_field]), []).append(row)
+    directory = Path(export_dir) / kind
+    directory.mkdir(parents=True, exist_ok=True)
+    for month, month_rows in by_month.items():
+        values = ([row[field] for field in spec.fields] for row in month_rows)
+        # File gzip nhiều member vẫn đọc được bằng gzip.open/zcat
+        with open(directory / f'{month:%Y-%m}.jsonl.gz', 'ab') as fh:
+            for block in encode(render_jsonl(spec.fields, values), compress=True):
+                fh.write(block)
+
+
+def archive_batch(kind, before, batch_size=ARCHIVE_BATCH_SIZE, export_dir=None):
+    """Chuyển tối đa `batch_size` dòng cũ hơn `before`. Trả về số dòng đã chuyển."""
+    spec = ARCHIVES[kind]
+    rows = list(
+        spec.model.objects.filter(**{f'{spec.date_field}__lt': before})
+        .order_by(spec.date_field, 'id').values(*spec.fields)[:batch_size]
+    )
+    if not rows:
+        return 0
+    if export_dir:
+        _export(spec, kind, rows, export_dir)
+    ids = [row['id'] for row in rows]
+    with transaction.atomic():
+        spec.archive_model.objects.bulk_create(
+            [spec.archive_model(month=month_of(row[spec.date_field]), **row) for row in rows],
+            # id đã có trong bảng lưu trữ (ví dụ dữ liệu từng được khôi phục) thì bỏ qua
+            ignore_conflicts=True,
+        )
+        spec.model.objects.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archive(kind, before=None, batch_size=ARCHIVE_BATCH_SIZE, export_dir=None, max_batches=None,
+            pause=0.0, progress=None):
+    """Lưu trữ mọi dòng cũ hơn `before` (mặc định theo cutoff()). Trả về số dòng."""
+    before = before or cutoff(kind)
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(kind, before, batch_size, export_dir)
+        if not count:
+            break
+        moved += count
+        batches += 1
+        if progress:
+            progress(kind, moved)
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def purge_months(kind, before_month, batch_size=ARCHIVE_BATCH_SIZE):
+    """Xóa khỏi bảng lưu trữ các tháng trước `before_month` (đã xuất ra file)."""
+    spec = ARCHIVES[kind]
+    expired = spec.archive_model.objects.filter(month__lt=before_month)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by('month', 'id').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += spec.archive_model.objects.filter(pk__in=ids).delete()[0]
+
+
+def read_through(kind, include_archive=False, order_by='-id', limit=None, **filters):
+    """
+    Các dòng (dict theo spec.fields) khớp `filters` từ bảng chính, và cả bảng
+    lưu trữ nếu `include_archive`. `order_by` là một cột, '-' để giảm dần.
+    """
+    spec = ARCHIVES[kind]
+    models = [spec.model, spec.archive_model] if include_archive else [spec.model]
+    field = order_by.lstrip('-')
+    descending = order_by.startswith('-')
+    ordering = [order_by] if field == 'id' else [order_by, '-id' if descending else 'id']
+    rows = []
+    for model in models:
+        qs = model.objects.filter(**filters).order_by(*ordering).values(*spec.fields)
+        rows.extend(qs[:limit] if limit is not None else qs)
+    if len(models) > 1:
+        rows.sort(key=lambda row: (row[field], row['id']), reverse=descending)
+    return rows[:limit] if limit is not None else rows
+
+
+def first_of_month(value):
+    """'YYYY-MM' -> date ngày đầu tháng."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
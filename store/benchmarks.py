@@ -0,0 +1,129 @@
+# benchmarks.py
+"""
+Tiện ích dùng chung cho các lệnh đo hiệu năng và kiểm tra truy vấn.
+"""
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager, nullcontext
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from .models import User
+
+
+class QueryCounter:
+    """Đếm số truy vấn qua execute_wrapper, không bị giới hạn như queries_log."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def measure(using=connection):
+    """
+    Đo thời gian và số truy vấn của khối lệnh:
+
+        with measure() as m:
+            ...
+        m['seconds'], m['queries'], m['statements']
+    """
+    counter = QueryCounter()
+    result = {}
+    started = time.perf_counter()
+    with using.execute_wrapper(counter):
+        yield result
+    result['seconds'] = time.perf_counter() - started
+    result['queries'] = counter.count
+    result['statements'] = counter.statements
+
+
+def admin_user():
+    # Superuser không lưu DB: đủ quyền xem mọi changelist mà không sinh truy vấn
+    return User(email='bench@localhost', is_staff=True, is_superuser=True, is_active=True)
+
+
+def render_changelist(model_admin, params=None, user=None):
+    """Render changelist của `model_admin` như một request GET từ admin."""
+    opts = model_admin.model._meta
+    request = RequestFactory().get(f'/admin/{opts.app_label}/{opts.model_name}/', params or {})
+    request.user = user or admin_user()
+    response = model_admin.changelist_view(request)
+    response.render()
+    return response
+
+
+# --- Bộ đo so sánh giữa các commit (lệnh bench_store) ---
+
+def run_case(func, repeat=5, setup=None, rollback=False):
+    """
+    Chạy `func` `repeat` lần, trả về thời gian (ms) và số truy vấn. `setup()`
+    chạy trước mỗi lần, ngoài phần đo; kết quả của nó được truyền cho `func`.
+    Với `rollback=True`, mỗi lần chạy nằm trong một savepoint bị hủy sau đó.
+    """
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with transaction.atomic() if rollback else nullcontext():
+            args = (setup(),) if setup else ()
+            with measure() as m:
+                func(*args)
+            if rollback:
+                transaction.set_rollback(True)
+        timings.append(m['seconds'] * 1000)
+        queries = m['queries']
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': queries,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(models=()):
+    """Thông tin đi kèm kết quả đo: commit, phiên bản, CSDL và số dòng các bảng."""
+    return {
+        'commit': _git_commit(),
+        'timestamp': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'rows': {model._meta.label: model._default_manager.count() for model in models},
+    }
+
+
+def compare_results(previous, current):
+    """
+    So sánh hai kết quả của bench_store theo từng phép đo. Trả về danh sách
+    (tên, median cũ, median mới, tỉ lệ mới/cũ, truy vấn cũ, truy vấn mới).
+    """
+    rows = []
+    for name, result in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if old is None:
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else None
+        rows.append((name, old['median_ms'], result['median_ms'], ratio, old['queries'], result['queries']))
+    return rows
@@ -0,0 +1,399 @@
+# cache.py
+"""
+Lớp cache của app store.
+
+- Mỗi namespace (thường là một model, ví dụ 'store.product') có một số phiên
+  bản nằm trong cache. Khóa dữ liệu chứa phiên bản, nên tăng phiên bản là vô
+  hiệu hóa toàn bộ namespace mà không cần xóa từng khóa. signals.py tăng phiên
+  bản của các model trong CACHED_MODELS khi post_save/post_delete.
+- get_or_compute() chống "stampede": làm mới sớm theo xác suất (XFetch) và chỉ
+  một tiến trình tính lại nhờ khóa cache.add().
+- Backend chọn qua settings.STORE_CACHE_ALIAS (mặc định 'default').
+- Khi có bản sao đọc (store/routers.py), giá trị được tính lại trong vòng
+  STORE_REPLICA_MAX_LAG giây sau lần tăng phiên bản sẽ đọc từ CSDL chính:
+  bản sao có thể chưa nhận thay đổi và dữ liệu cũ sẽ bị cache dưới phiên bản mới.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .routers import max_lag, use_primary
+
+KEY_PREFIX = 'store'
+DEFAULT_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+# beta > 1 làm mới sớm hơn, beta = 0 tắt làm mới sớm
+EARLY_EXPIRY_BETA = 1.0
+
+
+def get_cache():
+    return caches[getattr(settings, 'STORE_CACHE_ALIAS', 'default')]
+
+
+# --- Thống kê hit/miss (theo tiến trình) ---
+
+# Bộ đếm của request hiện tại (store.middleware), đi theo context nên đúng cả
+# khi view async chạy phần đồng bộ trong luồng khác
+_request_counts = ContextVar('store_cache_request_counts', default=None)
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+        counts = _request_counts.get()
+        if counts is not None:
+            counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+@contextmanager
+def track_request_stats():
+    """Đếm hit/miss của riêng khối lệnh: `with track_request_stats() as counts:`."""
+    counts = Counter()
+    token = _request_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _request_counts.reset(token)
+
+
+# --- Phiên bản theo namespace ---
+
+def model_namespace(model):
+    return model._meta.label_lower
+
+
+def _as_namespace(item):
+    return item if isinstance(item, str) else model_namespace(item)
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:v:{namespace}'
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def get_versions(*namespaces):
+    """
+    Phiên bản hiện tại của các namespace, đọc bằng một lần get_many. Phiên bản
+    là mốc thời gian (ms) của lần thay đổi gần nhất nên dùng được cho
+    Last-Modified.
+    """
+    cache = get_cache()
+    namespaces = [_as_namespace(ns) for ns in namespaces]
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = _now_ms()
+        for key in missing:
+            cache.add(key, now, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def get_version(namespace):
+    return get_versions(namespace)[_as_namespace(namespace)]
+
+
+def bump_version(namespace):
+    cache = get_cache()
+    key = _version_key(_as_namespace(namespace))
+    cache.set(key, max(_now_ms(), (cache.get(key) or 0) + 1), None)
+
+
+def bump_version_on_commit(namespace):
+    # Tăng phiên bản sau commit, tránh việc đọc dữ liệu cũ rồi lưu dưới phiên bản mới
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+def versions_tag(*namespaces):
+    versions = get_versions(*namespaces)
+    return '-'.join(str(versions[_as_namespace(ns)]) for ns in namespaces)
+
+
+def versions_last_modified(*namespaces):
+    version = max(get_versions(*namespaces).values())
+    return datetime.fromtimestamp(version / 1000, tz=timezone.utc)
+
+
+def _as_namespaces(namespaces):
+    if isinstance(namespaces, str) or not isinstance(namespaces, (list, tuple)):
+        return (namespaces,)
+    return namespaces
+
+
+def _key(versions, namespaces, parts):
+    tag = '-'.join(str(versions[_as_namespace(ns)]) for ns in namespaces)
+    raw = ':'.join(map(str, parts))
+    # Băm phần tham số để khóa luôn ngắn và an toàn với memcached/redis
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'{KEY_PREFIX}:{tag}:{digest}'
+
+
+def versioned_key(namespaces, *parts):
+    namespaces = _as_namespaces(namespaces)
+    return _key(get_versions(*namespaces), namespaces, parts)
+
+
+def _changed_recently(versions):
+    """Có namespace vừa đổi trong khoảng trễ sao chép của bản sao đọc."""
+    lag = max_lag()
+    return bool(lag) and _now_ms() - max(versions.values()) < lag * 1000
+
+
+def _from_primary(compute):
+    def run():
+        with use_primary():
+            return compute()
+    return run
+
+
+# --- Cache-aside chống stampede ---
+
+def _should_refresh_early(delta, expires_at, beta):
+    # XFetch: càng gần hạn và càng tốn thời gian tính thì càng dễ được làm mới sớm
+    return time.time() - delta * beta * math.log(1 - random.random()) >= expires_at
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, beta=EARLY_EXPIRY_BETA):
+    """
+    Trả về giá trị trong cache hoặc gọi `compute()` rồi lưu lại. Giá trị None
+    cũng được cache.
+    """
+    cache = get_cache()
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, delta, expires_at = entry
+        if not _should_refresh_early(delta, expires_at, beta):
+            stats.incr('hits')
+            return value
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Một tiến trình khác đang làm mới, tạm dùng giá trị hiện có
+            stats.incr('stale_hits')
+            return value
+        stats.incr('early_refreshes')
+    else:
+        stats.incr('misses')
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                entry = cache.get(key)
+                if entry is not None:
+                    stats.incr('waited_hits')
+                    return entry[0]
+            # Hết thời gian chờ: tự tính, không giữ khóa
+            return _compute_and_store(cache, key, compute, timeout)
+
+    try:
+        return _compute_and_store(cache, key, compute, timeout)
+    finally:
+        cache.delete(lock_key)
+
+
+def _compute_and_store(cache, key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    cache.set(key, (value, delta, time.time() + timeout), timeout)
+    return value
+
+
+def get_object(model, pk, queryset=None, timeout=DEFAULT_TIMEOUT):
+    """Cache-aside cho một bản ghi theo (model, pk); trả về None nếu không có."""
+    queryset = model._default_manager.all() if queryset is None else queryset
+    versions = get_versions(model)
+    compute = lambda: queryset.filter(pk=pk).first()  # noqa: E731
+    if _changed_recently(versions):
+        compute = _from_primary(compute)
+    return get_or_compute(_key(versions, (model,), ('object', pk)), compute, timeout)
+
+
+def cached(*namespaces, timeout=DEFAULT_TIMEOUT):
+    """
+    Decorator cache kết quả hàm theo tham số và phiên bản của `namespaces`
+    (model hoặc tên namespace). Dữ liệu tự hết hiệu lực khi các model đó đổi.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(*namespaces)
+            compute = lambda: func(*args, **kwargs)  # noqa: E731
+            if _changed_recently(versions):
+                compute = _from_primary(compute)
+            key = _key(versions, namespaces, (name, *args, *sorted(kwargs.items())))
+            return get_or_compute(key, compute, timeout)
+        return wrapper
+    return decorator
+
+
+# --- Phiên bản async (dùng trong view async, xem views.py) ---
+
+async def aget_versions(*namespaces):
+    cache = get_cache()
+    namespaces = [_as_namespace(ns) for ns in namespaces]
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = _now_ms()
+        for key in missing:
+            await cache.aadd(key, now, None)
+        found.update(await cache.aget_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+async def aversions_tag(*namespaces):
+    versions = await aget_versions(*namespaces)
+    return '-'.join(str(versions[_as_namespace(ns)]) for ns in namespaces)
+
+
+async def aversions_last_modified(*namespaces):
+    version = max((await aget_versions(*namespaces)).values())
+    return datetime.fromtimestamp(version / 1000, tz=timezone.utc)
+
+
+async def aversioned_key(namespaces, *parts):
+    namespaces = _as_namespaces(namespaces)
+    return _key(await aget_versions(*namespaces), namespaces, parts)
+
+
+def _afrom_primary(compute):
+    async def run():
+        with use_primary():
+            return await compute()
+    return run
+
+
+async def aget_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, beta=EARLY_EXPIRY_BETA):
+    """Như get_or_compute() nhưng `compute` là coroutine function; chờ khóa không chặn event loop."""
+    cache = get_cache()
+    lock_key = f'{key}:lock'
+    entry = await cache.aget(key)
+
+    if entry is not None:
+        value, delta, expires_at = entry
+        if not _should_refresh_early(delta, expires_at, beta):
+            stats.incr('hits')
+            return value
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            stats.incr('stale_hits')
+            return value
+        stats.incr('early_refreshes')
+    else:
+        stats.incr('misses')
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                entry = await cache.aget(key)
+                if entry is not None:
+                    stats.incr('waited_hits')
+                    return entry[0]
+            return await _acompute_and_store(cache, key, compute, timeout)
+
+    try:
+        return await _acompute_and_store(cache, key, compute, timeout)
+    finally:
+        await cache.adelete(lock_key)
+
+
+async def _acompute_and_store(cache, key, compute, timeout):
+    started = time.monotonic()
+    value = await compute()
+    delta = time.monotonic() - started
+    await cache.aset(key, (value, delta, time.time() + timeout), timeout)
+    return value
+
+
+def acached(*namespaces, timeout=DEFAULT_TIMEOUT):
+    """Phiên bản của @cached cho coroutine function."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            versions = await aget_versions(*namespaces)
+            compute = lambda: func(*args, **kwargs)  # noqa: E731
+            if _changed_recently(versions):
+                compute = _afrom_primary(compute)
+            key = _key(versions, namespaces, (name, *args, *sorted(kwargs.items())))
+            return await aget_or_compute(key, compute, timeout)
+        return wrapper
+    return decorator
+
+
+# --- Giới hạn tần suất (sliding window) ---
+
+def _window_count(cache, key, bucket):
+    try:
+        return cache.incr(f'{key}:{bucket}')
+    except ValueError:
+        # Khóa chưa có (hoặc đã hết hạn)
+        return None
+
+
+def hit_rate_limit(name, identifier, limit, window):
+    """
+    Ghi nhận một lượt cho `identifier` và kiểm tra giới hạn `limit` lượt trong
+    `window` giây, dùng bộ đếm cửa sổ trượt xấp xỉ từ hai cửa sổ cố định liền
+    kề. Trả về (được phép, số giây nên chờ).
+    """
+    cache = get_cache()
+    digest = hashlib.md5(str(identifier).encode(), usedforsecurity=False).hexdigest()
+    key = f'{KEY_PREFIX}:rl:{name}:{digest}'
+    now = time.time()
+    bucket = int(now // window)
+    elapsed = (now % window) / window
+
+    previous = cache.get(f'{key}:{bucket - 1}') or 0
+    current = cache.get(f'{key}:{bucket}') or 0
+    estimate = previous * (1 - elapsed) + current
+    if estimate >= limit:
+        # Lượt bị từ chối không được tính, tránh khóa vĩnh viễn khi bị spam
+        if current < limit and previous:
+            # Thời điểm phần cửa sổ trước còn lại đủ nhỏ để ước lượng < limit
+            retry_after = (1 - (limit - current) / previous - elapsed) * window
+        else:
+            retry_after = (1 - elapsed) * window
+        return False, max(math.ceil(retry_after), 1)
+
+    if _window_count(cache, key, bucket) is None:
+        if not cache.add(f'{key}:{bucket}', 1, window * 2):
+            cache.incr(f'{key}:{bucket}')
+    return True, 0
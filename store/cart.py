@@ -0,0 +1,226 @@
+# cart.py
+"""
+Giỏ hàng với đường đi nhanh trong cache.
+
+- Giỏ của khách vãng lai chỉ nằm trong cache, nhận diện qua cookie ký
+  CART_COOKIE, nên không ghi DB.
+- Giỏ của người dùng đã đăng nhập cũng đọc/ghi trong cache. Các thay đổi được
+  gom lại và ghi xuống ShoppingCart bằng một lệnh upsert (kèm một DELETE cho
+  dòng bị bỏ) khi đủ FLUSH_THRESHOLD thay đổi, sau FLUSH_INTERVAL giây, khi
+  đăng xuất hoặc trước khi đặt hàng. Cache bị xóa thì giỏ được nạp lại từ DB.
+- Đọc giỏ lấy giá và trạng thái mọi sản phẩm trong một truy vấn.
+- Khi đăng nhập, giỏ vãng lai được gộp vào giỏ của người dùng (signals.py).
+"""
+import secrets
+import time
+
+from django.core.signing import BadSignature
+
+from .cache import KEY_PREFIX, get_cache, get_object
+from .images import image_data, renditions_for
+from .models import Product, ProductStatus, ShoppingCart
+
+CART_COOKIE = 'store_cart'
+CART_COOKIE_SALT = 'store.cart'
+ANONYMOUS_TIMEOUT = 60 * 60 * 24 * 30
+USER_TIMEOUT = 60 * 60 * 24 * 7
+FLUSH_INTERVAL = 30
+FLUSH_THRESHOLD = 20
+MAX_QUANTITY = 99
+MAX_LINES = 100
+
+
+class CartError(ValueError):
+    pass
+
+
+def _user_key(user_id):
+    return f'{KEY_PREFIX}:cart:user:{user_id}'
+
+
+def _anonymous_key(token):
+    return f'{KEY_PREFIX}:cart:anon:{token}'
+
+
+def anonymous_token(request):
+    try:
+        return request.get_signed_cookie(CART_COOKIE, salt=CART_COOKIE_SALT)
+    except (KeyError, BadSignature):
+        return None
+
+
+class Cart:
+    def __init__(self, key, user_id=None):
+        self.key = key
+        self.user_id = user_id
+        state = get_cache().get(key)
+        if state is None:
+            state = self._load()
+        # product_id -> số lượng
+        self.items = dict(state['items'])
+        # Các sản phẩm đã đổi nhưng chưa ghi xuống ShoppingCart
+        self.dirty = set(state['dirty'])
+        self.flushed_at = state['flushed_at']
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls(_user_key(user_id), user_id)
+
+    @classmethod
+    def for_token(cls, token):
+        return cls(_anonymous_key(token))
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Giỏ của request hiện tại. Khách vãng lai chưa có cookie được cấp token
+        mới trong `request.new_cart_token`; view cần gọi set_cart_cookie().
+        """
+        if request.user.is_authenticated:
+            return cls.for_user(request.user.pk)
+        token = anonymous_token(request)
+        if token is None:
+            token = request.new_cart_token = secrets.token_urlsafe(16)
+        return cls.for_token(token)
+
+    def _load(self):
+        items = {}
+        if self.user_id is not None:
+            items = dict(
+                ShoppingCart.objects.filter(user_id=self.user_id).values_list('product_id', 'quantity')
+            )
+        return {'items': items, 'dirty': (), 'flushed_at': time.time()}
+
+    def _store(self):
+        timeout = USER_TIMEOUT if self.user_id is not None else ANONYMOUS_TIMEOUT
+        state = {'items': self.items, 'dirty': tuple(self.dirty), 'flushed_at': self.flushed_at}
+        get_cache().set(self.key, state, timeout)
+
+    def save(self):
+        if self.user_id is not None and self.dirty and (
+            len(self.dirty) >= FLUSH_THRESHOLD or time.time() - self.flushed_at >= FLUSH_INTERVAL
+        ):
+            self.flush()
+        else:
+            self._store()
+
+    # --- Thay đổi ---
+
+    def set(self, product_id, quantity):
+        """Đặt số lượng của một sản phẩm; quantity = 0 là bỏ khỏi giỏ."""
+        product_id = int(product_id)
+        quantity = int(quantity)
+        if quantity < 0 or quantity > MAX_QUANTITY:
+            raise CartError(f"Số lượng phải từ 0 đến {MAX_QUANTITY}.")
+        if quantity:
+            if product_id not in self.items and len(self.items) >= MAX_LINES:
+                raise CartError(f"Giỏ hàng tối đa {MAX_LINES} sản phẩm.")
+            # Đọc qua cache, không chạm DB khi sản phẩm đã được cache
+            product = get_object(Product, product_id)
+            if product is None or product.status != ProductStatus.FOR_SALE:
+                raise CartError("Sản phẩm không còn bán.")
+            self.items[product_id] = quantity
+        elif self.items.pop(product_id, None) is None:
+            return
+        self.dirty.add(product_id)
+        self.save()
+
+    def add(self, product_id, quantity=1):
+        self.set(product_id, min(self.items.get(int(product_id), 0) + int(quantity), MAX_QUANTITY))
+
+    def merge(self, other):
+        """Gộp giỏ `other` (thường là giỏ vãng lai) vào giỏ này rồi xóa `other`."""
+        for product_id, quantity in other.items.items():
+            merged = min(self.items.get(product_id, 0) + quantity, MAX_QUANTITY)
+            if merged != self.items.get(product_id):
+                self.items[product_id] = merged
+                self.dirty.add(product_id)
+        other.delete()
+        self.flush()
+
+    def clear(self):
+        self.dirty.update(self.items)
+        self.items = {}
+        if self.user_id is not None:
+            self.flush()
+        else:
+            self._store()
+
+    def clear_local(self):
+        """Làm rỗng giỏ trong cache khi các dòng ShoppingCart đã được xóa (đặt hàng)."""
+        self.items = {}
+        self.dirty.clear()
+        self.flushed_at = time.time()
+        self._store()
+
+    def delete(self):
+        get_cache().delete(self.key)
+
+    def flush(self):
+        """Ghi các thay đổi đang chờ xuống ShoppingCart (chỉ giỏ của người dùng)."""
+        if self.user_id is not None and self.dirty:
+            kept = [product_id for product_id in self.dirty if product_id in self.items]
+            removed = [product_id for product_id in self.dirty if product_id not in self.items]
+            if kept:
+                ShoppingCart.objects.bulk_create(
+                    [
+                        ShoppingCart(user_id=self.user_id, product_id=product_id,
+                                     quantity=self.items[product_id])
+                        for product_id in kept
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['user', 'product'],
+                    update_fields=['quantity'],
+                )
+            if removed:
+                ShoppingCart.objects.filter(user_id=self.user_id, product_id__in=removed).delete()
+            self.dirty.clear()
+        self.flushed_at = time.time()
+        self._store()
+
+    # --- Đọc ---
+
+    def lines(self):
+        """Các dòng giỏ hàng kèm giá và trạng thái hiện tại, trong một truy vấn."""
+        if not self.items:
+            return []
+        products = list(Product.objects.filter(pk__in=list(self.items)).only(
+            'id', 'name', 'price', 'status', 'image',
+        ))
+        renditions = renditions_for(product.image.name for product in products)
+        lines = []
+        for product in products:
+            quantity = self.items[product.pk]
+            lines.append({
+                'product_id': product.pk,
+                'name': product.name,
+                'price': product.price,
+                'quantity': quantity,
+                'subtotal': product.price * quantity,
+                'available': product.status == ProductStatus.FOR_SALE,
+                'image': image_data(product.image, renditions),
+            })
+        lines.sort(key=lambda line: line['product_id'])
+        return lines
+
+    def __len__(self):
+        return sum(self.items.values())
+
+
+def set_cart_cookie(request, response):
+    token = getattr(request, 'new_cart_token', None)
+    if token:
+        response.set_signed_cookie(
+            CART_COOKIE, token, salt=CART_COOKIE_SALT,
+            max_age=ANONYMOUS_TIMEOUT, httponly=True, samesite='Lax',
+        )
+    return response
+
+
+def merge_anonymous_cart(request, user):
+    token = anonymous_token(request)
+    if token is None:
+        return
+    anonymous = Cart.for_token(token)
+    if anonymous.items:
+        Cart.for_user(user.pk).merge(anonymous)
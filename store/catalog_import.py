@@ -0,0 +1,212 @@
+# catalog_import.py
+"""
+Nhập/cập nhật sản phẩm hàng loạt từ CSV hoặc JSONL, đối chiếu theo `name`.
+
+Mỗi lô CHUNK_SIZE dòng chỉ cần một truy vấn đọc các sản phẩm trùng tên và
+một lệnh upsert (bulk_create update_conflicts trên `name`); dòng không đổi
+không được ghi. Vì thao tác bulk bỏ qua signal, tài liệu tìm kiếm, cache
+catalog và ảnh dẫn xuất được cập nhật tại đây.
+"""
+import csv
+import io
+import json
+import time
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import images
+from .cache import bump_version_on_commit
+from .models import Product, ProductStatus
+from .search import index_objects
+
+COLUMNS = ('name', 'description', 'price', 'charity_percentage', 'image', 'status')
+REQUIRED_FOR_CREATE = ('price', 'charity_percentage')
+CREATE_DEFAULTS = {'description': '', 'image': '', 'status': ProductStatus.FOR_SALE}
+FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 1000
+MAX_SAMPLES = 50
+
+
+class ProductImportError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        # Số sản phẩm thay đổi theo từng cột
+        self.changes = Counter()
+        self.samples = []
+        self.seconds = 0.0
+
+    def sample(self, line):
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(line)
+
+    @property
+    def changed_columns(self):
+        return self.changes.most_common()
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.rows} dòng: thêm {self.created}, sửa {self.updated}, "
+            f"giữ nguyên {self.unchanged}, lỗi {len(self.errors)} "
+            f"({self.seconds:.2f}s, {self.rows_per_second:.0f} dòng/s)"
+        )
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, fmt, key='name', error=ProductImportError):
+    """
+    Sinh (số dòng, dict) từ file nhị phân `stream`. File CSV phải có cột
+    `key`; lỗi định dạng ném `error` (store/user_import.py dùng lại hàm này).
+    """
+    if fmt not in FORMATS:
+        raise error(f"Định dạng không hỗ trợ: {fmt}")
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            if not reader.fieldnames or key not in reader.fieldnames:
+                raise error(f"File CSV thiếu cột '{key}'.")
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    raise error(f"Dòng {line_no}: JSON không hợp lệ ({exc}).")
+                if not isinstance(row, dict):
+                    raise error(f"Dòng {line_no}: cần một object JSON.")
+                yield line_no, row
+    finally:
+        # Không đóng file gốc của người gọi
+        text.detach()
+
+
+def clean_row(raw):
+    """Chuẩn hóa các cột có mặt trong dòng. Trả về (values, lỗi)."""
+    name = str(raw.get('name') or '').strip()
+    if not name:
+        return None, "Thiếu tên sản phẩm."
+    values = {'name': name}
+    for column in COLUMNS[1:]:
+        value = raw.get(column)
+        # Ô trống nghĩa là giữ nguyên giá trị hiện có
+        if value is None or value == '':
+            continue
+        field = Product._meta.get_field(column)
+        try:
+            if column == 'image':
+                value = str(value).strip()
+                field.run_validators(value)
+            else:
+                value = field.clean(value, None)
+        except ValidationError as exc:
+            return None, f"{column}: {'; '.join(exc.messages)}"
+        values[column] = value
+    return values, None
+
+
+def _apply_chunk(chunk, report, dry_run):
+    existing = {
+        row['name']: row
+        for row in Product.objects.filter(name__in=list(chunk)).values('id', *COLUMNS)
+    }
+    products = []
+    update_fields = set()
+    new_images = []
+    for name, (line_no, values) in chunk.items():
+        current = existing.get(name)
+        if current is None:
+            missing = [column for column in REQUIRED_FOR_CREATE if column not in values]
+            if missing:
+                report.errors.append((line_no, f"Sản phẩm mới thiếu cột: {', '.join(missing)}"))
+                continue
+            row = {**CREATE_DEFAULTS, **values}
+            report.created += 1
+            report.sample(f"+ {name}")
+        else:
+            changed = {
+                column: value for column, value in values.items()
+                if column != 'name' and current[column] != value
+            }
+            if not changed:
+                report.unchanged += 1
+                continue
+            row = {**current, **values}
+            del row['id']
+            report.updated += 1
+            report.changes.update(changed.keys())
+            report.sample(f"~ {name}: " + ', '.join(
+                f"{column} {current[column]!s:.40} → {value!s:.40}"
+                for column, value in changed.items()
+            ))
+        update_fields.update(column for column in values if column != 'name')
+        if row['image'] and (current is None or current['image'] != row['image']):
+            new_images.append(row['image'])
+        products.append(Product(**row))
+
+    if dry_run or not products:
+        return
+    Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=sorted(update_fields),
+    )
+    if any(product.pk is None for product in products):
+        # Backend không trả pk khi upsert: đọc lại theo tên
+        products = Product.objects.filter(name__in=[product.name for product in products])
+    index_objects(products)
+    for source in new_images:
+        images.schedule(source, Product)
+
+
+def import_products(stream, fmt='csv', dry_run=False, chunk_size=CHUNK_SIZE):
+    """
+    Đối chiếu file với bảng Product rồi ghi thay đổi theo lô (trừ khi
+    `dry_run`). Dòng lỗi bị bỏ qua và ghi vào report.errors; toàn bộ phần
+    hợp lệ được ghi trong một transaction.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    seen = set()
+    chunk = {}
+    with transaction.atomic():
+        for line_no, raw in read_rows(stream, fmt):
+            report.rows += 1
+            values, error = clean_row(raw)
+            if error:
+                report.errors.append((line_no, error))
+                continue
+            if values['name'] in seen:
+                report.errors.append((line_no, f"Trùng tên trong file: {values['name']}"))
+                continue
+            seen.add(values['name'])
+            chunk[values['name']] = (line_no, values)
+            if len(chunk) >= chunk_size:
+                _apply_chunk(chunk, report, dry_run)
+                chunk = {}
+        if chunk:
+            _apply_chunk(chunk, report, dry_run)
+        if not dry_run and (report.created or report.updated):
+            bump_version_on_commit(Product)
+    report.seconds = time.perf_counter() - started
+    return report
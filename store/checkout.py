@@ -0,0 +1,137 @@
+# checkout.py
+"""
+Đặt hàng từ giỏ của người dùng trong một transaction với số truy vấn cố định,
+không phụ thuộc số dòng trong giỏ:
+
+    địa chỉ (1) + sản phẩm (1) + ưu đãi (2, nếu có) + đơn hàng (2)
+    + chi tiết đơn (1, bulk_create) + lịch sử trạng thái (1) + xóa giỏ (1)
+
+Mã đơn hàng được suy ra từ khóa chính qua một song ánh (encode_order_code)
+nên không bao giờ trùng và không cần vòng lặp thử lại.
+"""
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cart import Cart
+from .models import (
+    Order, OrderDetail, OrderStatus, OrderStatusHistory, PaymentMethod, Product,
+    ProductStatus, RedeemedOffer, RedeemedStatus, ShippingAddress, ShoppingCart, VoucherType,
+)
+
+ORDER_CODE_PREFIX = 'DH'
+# Bảng chữ Crockford base32 (không có I, L, O, U)
+CODE_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CODE_BITS = 40
+CODE_MASK = (1 << CODE_BITS) - 1
+# Hằng số lẻ nên phép nhân modulo 2^40 là song ánh
+CODE_MULTIPLIER = 0x5DEECE66D
+CODE_XOR = 0x9E3779B97F & CODE_MASK
+CENT = Decimal('0.01')
+
+
+class CheckoutError(ValueError):
+    pass
+
+
+def encode_order_code(pk):
+    """
+    Mã đơn hàng dạng 'DH' + 8 ký tự, là song ánh của pk (pk < 2^40) nên hai
+    đơn khác nhau luôn có mã khác nhau, nhưng mã không lộ số thứ tự đơn.
+    """
+    if not 0 < pk <= CODE_MASK:
+        raise ValueError('Khóa chính vượt quá không gian mã đơn hàng.')
+    value = ((pk * CODE_MULTIPLIER) & CODE_MASK) ^ CODE_XOR
+    chars = []
+    for _ in range(CODE_BITS // 5):
+        chars.append(CODE_ALPHABET[value & 31])
+        value >>= 5
+    return ORDER_CODE_PREFIX + ''.join(reversed(chars))
+
+
+def _discount(voucher_type, value, subtotal):
+    if voucher_type == VoucherType.PERCENTAGE:
+        discount = subtotal * value / 100
+    else:
+        discount = value
+    return min(discount, subtotal).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _resolve_address(user_id, address_id):
+    addresses = ShippingAddress.objects.filter(user_id=user_id)
+    if address_id is not None:
+        addresses = addresses.filter(pk=address_id)
+    pk = addresses.order_by('-is_default', 'pk').values_list('pk', flat=True).first()
+    if pk is None:
+        raise CheckoutError('Chưa có địa chỉ giao hàng hợp lệ.')
+    return pk
+
+
+def _use_offer(user_id, offer_id, now):
+    """Khóa ưu đãi đã đổi (NOT_USED -> USED) bằng UPDATE có điều kiện."""
+    available = RedeemedOffer.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+        pk=offer_id, user_id=user_id, usage_status=RedeemedStatus.NOT_USED,
+    )
+    voucher = available.values_list('voucher__voucher_type', 'voucher__discount_value').first()
+    if voucher is None or not available.update(usage_status=RedeemedStatus.USED):
+        raise CheckoutError('Ưu đãi không hợp lệ hoặc đã được sử dụng.')
+    return voucher
+
+
+def checkout(user_id, payment_method=PaymentMethod.COD, shipping_address_id=None,
+             offer_id=None, donate_voucher=False):
+    """
+    Tạo đơn hàng từ giỏ hàng của người dùng. `donate_voucher=True` nghĩa là
+    quyên góp ưu đãi thay vì trừ vào tổng tiền. Ném CheckoutError nếu giỏ
+    trống, sản phẩm không còn bán, địa chỉ hoặc ưu đãi không hợp lệ.
+    """
+    if payment_method not in PaymentMethod.values:
+        raise CheckoutError('Phương thức thanh toán không hợp lệ.')
+    cart = Cart.for_user(user_id)
+    items = dict(cart.items)
+    if not items:
+        raise CheckoutError('Giỏ hàng trống.')
+    now = timezone.now()
+
+    with transaction.atomic():
+        address_id = _resolve_address(user_id, shipping_address_id)
+        products = dict(
+            Product.objects.filter(pk__in=list(items), status=ProductStatus.FOR_SALE)
+            .values_list('pk', 'price')
+        )
+        unavailable = [product_id for product_id in items if product_id not in products]
+        if unavailable:
+            raise CheckoutError(f"Sản phẩm không còn bán: {', '.join(map(str, sorted(unavailable)))}")
+        subtotal = sum(products[product_id] * quantity for product_id, quantity in items.items())
+
+        total = subtotal
+        if offer_id is not None:
+            voucher_type, value = _use_offer(user_id, offer_id, now)
+            if not donate_voucher:
+                total = subtotal - _discount(voucher_type, value, subtotal)
+
+        order = Order.objects.create(
+            # Giá trị tạm, duy nhất trong lúc chờ có pk
+            order_code=uuid.uuid4().hex[:20],
+            user_id=user_id,
+            total_amount=total,
+            shipping_address_id=address_id,
+            payment_method=payment_method,
+            applied_voucher_id=offer_id,
+            donate_voucher=bool(offer_id and donate_voucher),
+        )
+        order.order_code = encode_order_code(order.pk)
+        Order.objects.filter(pk=order.pk).update(order_code=order.order_code)
+        OrderDetail.objects.bulk_create([
+            OrderDetail(order=order, product_id=product_id, quantity=quantity,
+                        price_at_purchase=products[product_id])
+            for product_id, quantity in sorted(items.items())
+        ])
+        OrderStatusHistory.objects.create(order=order, new_status=OrderStatus.NEW)
+        ShoppingCart.objects.filter(user_id=user_id).delete()
+        transaction.on_commit(cart.clear_local)
+    return order
@@ -0,0 +1,13 @@
+# forms.py
+from django import forms
+
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(
+        label="File CSV/JSONL",
+        help_text="Cột: name, description, price, charity_percentage, image, status. "
+                  "Sản phẩm được đối chiếu theo tên; ô trống giữ nguyên giá trị cũ.",
+    )
+    dry_run = forms.BooleanField(
+        label="Chỉ xem trước (không ghi)", required=False, initial=True,
+    )
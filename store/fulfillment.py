@@ -0,0 +1,114 @@
+# fulfillment.py
+"""
+Hoàn tất đơn hàng: chuyển sang DELIVERED, ghi lịch sử trạng thái, trích quyên
+góp theo % từ thiện của từng sản phẩm và cộng điểm Yêu Thương.
+Chế độ lô xử lý N đơn với số truy vấn cố định (không phụ thuộc N).
+
+Đơn hàng không gắn với chương trình nào, nên mọi khoản quyên góp của một lần
+gọi được ghi cho cùng một chương trình: tham số `program`, nếu không có thì
+settings.STORE_DONATION_PROGRAM_ID, nếu không có nữa thì chương trình đang
+hoạt động được tạo sớm nhất (pk nhỏ nhất).
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .ledger import award_points_bulk
+from .models import (
+    CharityProgram, CharityProgramStatus, DonationHistory, DonationType,
+    Order, OrderDetail, OrderStatus, OrderStatusHistory,
+)
+from .rollups import mark_orders
+from .totals import apply_program_delta
+
+# Số tiền (VNĐ) tương ứng 1 điểm Yêu Thương
+AMOUNT_PER_POINT = Decimal('10000')
+
+# Chỉ các đơn đang xử lý mới được chuyển sang đã giao
+COMPLETABLE_STATUSES = (OrderStatus.NEW, OrderStatus.PENDING, OrderStatus.SHIPPING)
+
+CENT = Decimal('0.01')
+
+
+def get_default_program():
+    """Chương trình nhận quyên góp khi không chỉ định (xem docstring của module)."""
+    programs = CharityProgram.objects.filter(status=CharityProgramStatus.ACTIVE)
+    program_id = getattr(settings, 'STORE_DONATION_PROGRAM_ID', None)
+    if program_id is not None:
+        program = programs.filter(pk=program_id).only('pk').first()
+        if program is None:
+            raise ValueError(f'Chương trình nhận quyên góp #{program_id} không tồn tại hoặc không hoạt động.')
+        return program
+    program = programs.order_by('pk').only('pk').first()
+    if program is None:
+        raise ValueError('Không có chương trình thiện nguyện nào đang hoạt động.')
+    return program
+
+
+def points_for_amount(amount):
+    return int(amount // AMOUNT_PER_POINT)
+
+
+def complete_orders(order_ids, updated_by=None, program=None):
+    """
+    Hoàn tất hàng loạt các đơn trong `order_ids`. Đơn đã giao hoặc đã hủy được
+    bỏ qua. Quyên góp được ghi cho `program`, mặc định get_default_program().
+    Trả về danh sách id các đơn đã được hoàn tất.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return []
+
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids, order_status__in=COMPLETABLE_STATUSES)
+            .order_by('pk').values_list('pk', 'user_id', 'total_amount')
+        )
+        if not orders:
+            return []
+        if program is None:
+            program = get_default_program()
+        completed = [pk for pk, _, _ in orders]
+
+        donations = defaultdict(Decimal)
+        details = OrderDetail.objects.filter(order_id__in=completed).values_list(
+            'order_id', 'quantity', 'price_at_purchase', 'product__charity_percentage',
+        )
+        for order_id, quantity, price, percentage in details:
+            if percentage:
+                donations[order_id] += price * quantity * percentage / 100
+
+        Order.objects.filter(pk__in=completed).update(order_status=OrderStatus.DELIVERED)
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(order_id=pk, new_status=OrderStatus.DELIVERED, updated_by=updated_by)
+            for pk in completed
+        ])
+
+        rows = [
+            DonationHistory(
+                order_id=order_id,
+                program_id=program.pk,
+                amount=amount.quantize(CENT, rounding=ROUND_HALF_UP),
+                donation_type=DonationType.FROM_PRODUCT,
+            )
+            for order_id, amount in donations.items() if amount > 0
+        ]
+        DonationHistory.objects.bulk_create(rows)
+        # bulk_create không phát signal nên tự cộng vào tổng của chương trình
+        apply_program_delta('raised_amount', program.pk, sum(row.amount for row in rows))
+        mark_orders(completed)
+
+        awards = defaultdict(int)
+        for _, user_id, total_amount in orders:
+            if user_id is not None:
+                awards[user_id] += points_for_amount(total_amount)
+        award_points_bulk(awards, reason='Tích điểm từ đơn hàng đã giao')
+
+    return completed
+
+
+def complete_order(order, updated_by=None, program=None):
+    return bool(complete_orders([order.pk], updated_by=updated_by, program=program))
@@ -0,0 +1,187 @@
+# images.py
+"""
+Tạo ảnh dẫn xuất (thumbnail JPEG, WebP) và lưu kích thước ảnh gốc.
+
+Ảnh được xử lý ngoài request: sau khi lưu Product/CharityProgram/ContentPost
+có ảnh mới, công việc được đẩy vào pool luồng nền (on_commit). Lệnh
+`generate_image_derivatives` dựng bù hàng loạt bằng pool tiến trình.
+Danh sách, admin và API đọc URL bản nhỏ qua `renditions_for` trong một truy vấn.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .cache import bump_version_on_commit
+from .models import CharityProgram, ContentPost, ImageDerivative, Product
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = 'original'
+
+# tên preset -> (rộng, cao, định dạng, đuôi file, cắt cho vừa khung)
+PRESETS = {
+    'thumb': (200, 200, 'JPEG', 'jpg', True),
+    'thumb_webp': (200, 200, 'WEBP', 'webp', True),
+    'medium_webp': (800, 800, 'WEBP', 'webp', False),
+}
+QUALITY = {'JPEG': 82, 'WEBP': 80}
+
+# model -> tên trường ảnh
+IMAGE_FIELDS = {
+    Product: 'image',
+    CharityProgram: 'image',
+    ContentPost: 'featured_image',
+}
+
+
+def derivative_path(source, preset):
+    # Giữ nguyên cả đuôi file gốc: a.jpg và a.png phải ra hai bản dẫn xuất khác nhau
+    ext = PRESETS[preset][3]
+    return f'derivatives/{preset}/{source}.{ext}'
+
+
+def render_derivatives(source, storage=None):
+    """
+    Đọc ảnh gốc và ghi các bản dẫn xuất vào storage. Không chạm DB nên chạy
+    được trong tiến trình con. Trả về danh sách dict cho ImageDerivative.
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    with storage.open(source, 'rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    rows = [{'source': source, 'preset': ORIGINAL, 'path': source,
+             'width': image.width, 'height': image.height}]
+    for preset, (width, height, fmt, _, crop) in PRESETS.items():
+        if crop:
+            rendition = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            rendition = image.copy()
+            rendition.thumbnail((width, height), Image.Resampling.LANCZOS)
+        if fmt == 'JPEG' and rendition.mode not in ('RGB', 'L'):
+            rendition = rendition.convert('RGB')
+        content = ContentFile(b'')
+        rendition.save(content, fmt, quality=QUALITY[fmt], optimize=fmt == 'JPEG')
+        path = derivative_path(source, preset)
+        if storage.exists(path):
+            storage.delete(path)
+        path = storage.save(path, content)
+        rows.append({'source': source, 'preset': preset, 'path': path,
+                     'width': rendition.width, 'height': rendition.height})
+    return rows
+
+
+def save_derivatives(rows):
+    ImageDerivative.objects.bulk_create(
+        [ImageDerivative(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['source', 'preset'],
+        update_fields=['path', 'width', 'height', 'created_at'],
+    )
+
+
+def process_image(source, model=None):
+    """Tạo và ghi nhận bản dẫn xuất của một ảnh; làm mới cache của `model`."""
+    rows = render_derivatives(source)
+    with transaction.atomic():
+        save_derivatives(rows)
+        if model is not None:
+            bump_version_on_commit(model)
+    return rows
+
+
+# --- Pool luồng nền ---
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'STORE_IMAGE_WORKERS', 2),
+                thread_name_prefix='store-images',
+            )
+    return _executor
+
+
+def _run(source, model):
+    close_old_connections()
+    try:
+        process_image(source, model)
+    except Exception:
+        logger.exception("Không tạo được ảnh dẫn xuất cho %s", source)
+    finally:
+        close_old_connections()
+
+
+def schedule(source, model=None):
+    """Đẩy ảnh vào pool nền sau khi transaction hiện tại commit."""
+    if source:
+        transaction.on_commit(lambda: get_executor().submit(_run, source, model))
+
+
+# --- Đọc ---
+
+def renditions_for(sources, presets=None):
+    """
+    {ảnh gốc: {preset: {'url', 'width', 'height'}}} cho nhiều ảnh trong một
+    truy vấn. Ảnh chưa có bản dẫn xuất không xuất hiện trong kết quả.
+    """
+    sources = {source for source in sources if source}
+    if not sources:
+        return {}
+    qs = ImageDerivative.objects.filter(source__in=sources)
+    if presets:
+        qs = qs.filter(preset__in=presets)
+    result = {}
+    for source, preset, path, width, height in qs.values_list(
+        'source', 'preset', 'path', 'width', 'height'
+    ):
+        result.setdefault(source, {})[preset] = {
+            'url': default_storage.url(path), 'width': width, 'height': height,
+        }
+    return result
+
+
+async def arenditions_for(sources, presets=None):
+    """Phiên bản async của renditions_for."""
+    sources = {source for source in sources if source}
+    if not sources:
+        return {}
+    qs = ImageDerivative.objects.filter(source__in=sources)
+    if presets:
+        qs = qs.filter(preset__in=presets)
+    result = {}
+    async for source, preset, path, width, height in qs.values_list(
+        'source', 'preset', 'path', 'width', 'height'
+    ):
+        result.setdefault(source, {})[preset] = {
+            'url': default_storage.url(path), 'width': width, 'height': height,
+        }
+    return result
+
+
+def image_data(field, renditions):
+    """Dữ liệu ảnh cho API: URL gốc, bản nhỏ (nếu đã có) và kích thước."""
+    if not field:
+        return None
+    found = renditions.get(field.name, {})
+    original = found.get(ORIGINAL, {})
+    return {
+        'url': field.url,
+        'width': original.get('width'),
+        'height': original.get('height'),
+        'thumb': found.get('thumb', {}).get('url'),
+        'thumb_webp': found.get('thumb_webp', {}).get('url'),
+        'medium_webp': found.get('medium_webp', {}).get('url'),
+    }
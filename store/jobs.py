@@ -0,0 +1,263 @@
+# jobs.py
+"""
+Hàng đợi công việc nền lưu trong bảng Job của CSDL mặc định.
+
+- enqueue() chỉ INSERT một dòng trong transaction hiện tại: job chỉ được
+  nhìn thấy khi transaction commit, nên request trả về ngay sau khi xếp hàng.
+- Worker (lệnh `run_workers`) nhận job theo lô: độ ưu tiên cao trước, rồi
+  run_at sớm nhất, chỉ các job đã đến giờ. Trên PostgreSQL/MySQL dùng
+  SELECT ... FOR UPDATE SKIP LOCKED; trên SQLite transaction ghi (IMMEDIATE)
+  khóa cả CSDL nên SELECT + UPDATE trong cùng transaction đã loại trừ nhau.
+- Job lỗi được xếp lại với thời gian chờ tăng theo cấp số nhân (kèm jitter)
+  cho tới max_attempts thì chuyển FAILED.
+- dedup_key: mỗi khóa chỉ có một job QUEUED (ràng buộc unique một phần),
+  xếp trùng sẽ bị bỏ qua. Job đang chạy không chặn việc xếp job mới, nên
+  thay đổi xảy ra trong lúc chạy vẫn được xử lý ở lần sau.
+- Job RUNNING quá STALE_AFTER (worker chết) được reclaim_stale() xếp lại,
+  hoặc chuyển FAILED nếu đã hết max_attempts: job làm chết worker (hết bộ
+  nhớ, bị kill) không bị chạy lại mãi.
+
+Tác vụ được đăng ký bằng decorator @task (xem store/tasks.py), nhận payload
+dưới dạng tham số keyword và tự dùng transaction.atomic() khi cần.
+"""
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH_SIZE = 20
+POLL_INTERVAL = 1.0
+BACKOFF_BASE = 5
+BACKOFF_MAX = 60 * 60
+STALE_AFTER = timedelta(minutes=15)
+PURGE_BATCH_SIZE = 1000
+MAX_ERROR_LENGTH = 4000
+SUPERSEDED = 'Bỏ qua: đã có job cùng dedup_key đang chờ.'
+STALE_EXHAUSTED = 'Worker dừng giữa chừng ở lần chạy cuối cùng (hết max_attempts).'
+
+# tên tác vụ -> Task
+TASKS = {}
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts, sensitive):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        # Payload chứa dữ liệu nhạy cảm (ví dụ mã OTP): xóa khi job kết thúc
+        self.sensitive = sensitive
+
+    def __call__(self, **payload):
+        return self.func(**payload)
+
+    def enqueue(self, payload=None, **options):
+        return enqueue(self.name, payload, **options)
+
+
+def task(name=None, priority=0, max_attempts=5, sensitive=False):
+    """Đăng ký hàm làm tác vụ nền: `@task()` rồi `func.enqueue({...})`."""
+    def decorator(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', priority, max_attempts, sensitive)
+        TASKS[registered.name] = registered
+        return registered
+    return decorator
+
+
+def backoff(attempts):
+    """Số giây chờ trước lần chạy thứ `attempts + 1`."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+# --- Xếp hàng ---
+
+def _build(name, payload, priority, run_at, delay, dedup_key, max_attempts):
+    registered = TASKS.get(name)
+    if registered is None:
+        raise ValueError(f"Tác vụ chưa được đăng ký: {name}")
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta(0))
+    return Job(
+        task=name,
+        payload=payload or {},
+        priority=registered.priority if priority is None else priority,
+        run_at=run_at,
+        dedup_key=dedup_key,
+        max_attempts=max_attempts or registered.max_attempts,
+    )
+
+
+def enqueue(name, payload=None, priority=None, run_at=None, delay=None, dedup_key=None, max_attempts=None):
+    """
+    Xếp một job. Trả về Job, hoặc None nếu đã có job cùng `dedup_key` đang
+    chờ. `delay` (timedelta) hoặc `run_at` để hẹn giờ.
+    """
+    job = _build(name, payload, priority, run_at, delay, dedup_key, max_attempts)
+    if dedup_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def enqueue_many(name, payloads, priority=None, run_at=None, delay=None, max_attempts=None):
+    """Xếp nhiều job của cùng một tác vụ bằng một bulk_create."""
+    return Job.objects.bulk_create(
+        [_build(name, payload, priority, run_at, delay, None, max_attempts) for payload in payloads],
+        batch_size=1000,
+    )
+
+
+# --- Worker ---
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def ready_jobs(now=None):
+    return Job.objects.filter(status=JobStatus.QUEUED, run_at__lte=now or timezone.now()).order_by(
+        '-priority', 'run_at', 'id',
+    )
+
+
+def claim(worker, batch_size=CLAIM_BATCH_SIZE):
+    """Nhận tối đa `batch_size` job đã đến giờ, chuyển sang RUNNING."""
+    now = timezone.now()
+    ready = ready_jobs(now).only('id', 'task', 'payload', 'attempts', 'max_attempts')
+    connection = connections[router.db_for_write(Job)]
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        jobs = list(ready[:batch_size])
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=JobStatus.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+    return jobs
+
+
+def _finish(done, failed):
+    """Ghi kết quả một lô: các job thành công trong một UPDATE, job lỗi từng dòng."""
+    now = timezone.now()
+    if done:
+        Job.objects.filter(pk__in=[job.pk for job in done]).update(
+            status=JobStatus.DONE, finished_at=now, locked_by='', last_error='',
+        )
+        sensitive = [job.pk for job in done if TASKS[job.task].sensitive]
+        if sensitive:
+            Job.objects.filter(pk__in=sensitive).update(payload={})
+    for job, error in failed:
+        changes = {'locked_by': '', 'last_error': error[-MAX_ERROR_LENGTH:]}
+        if job.attempts >= job.max_attempts:
+            changes.update(status=JobStatus.FAILED, finished_at=now)
+            registered = TASKS.get(job.task)
+            if registered is None or registered.sensitive:
+                changes['payload'] = {}
+        else:
+            changes.update(status=JobStatus.QUEUED, run_at=now + timedelta(seconds=backoff(job.attempts)))
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(**changes)
+        except IntegrityError:
+            # Đã có job cùng dedup_key đang chờ, job đó sẽ làm thay lần thử lại này
+            _supersede(Job.objects.filter(pk=job.pk), now)
+
+
+def _supersede(jobs, now):
+    return jobs.update(status=JobStatus.DONE, finished_at=now, locked_by='', last_error=SUPERSEDED)
+
+
+def run_batch(jobs):
+    """Chạy các job đã nhận. Trả về (số thành công, số lỗi)."""
+    done, failed = [], []
+    for job in jobs:
+        registered = TASKS.get(job.task)
+        try:
+            if registered is None:
+                raise LookupError(f"Tác vụ chưa được đăng ký: {job.task}")
+            # Tác vụ tự mở transaction khi cần: bọc cả tác vụ trong atomic() sẽ
+            # giữ khóa ghi của SQLite (IMMEDIATE) suốt thời gian chạy
+            registered(**job.payload)
+        except Exception:
+            logger.exception("Job %s (%s) lỗi ở lần chạy %s", job.pk, job.task, job.attempts)
+            failed.append((job, traceback.format_exc()))
+        else:
+            done.append(job)
+    _finish(done, failed)
+    return len(done), len(failed)
+
+
+def reclaim_stale(stale_after=STALE_AFTER):
+    """
+    Xếp lại các job RUNNING quá lâu (worker bị dừng giữa chừng); job đã chạy
+    đủ max_attempts lần chuyển FAILED. Trả về số job được xếp lại.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=now - stale_after)
+    exhausted = stale.filter(attempts__gte=F('max_attempts'))
+    with transaction.atomic():
+        # Như _finish(): payload của tác vụ nhạy cảm hoặc chưa đăng ký bị xóa
+        exhausted.exclude(task__in=[name for name, task in TASKS.items() if not task.sensitive]).update(
+            payload={},
+        )
+        exhausted.update(status=JobStatus.FAILED, finished_at=now, locked_by='', last_error=STALE_EXHAUSTED)
+        queued_keys = Job.objects.filter(status=JobStatus.QUEUED, dedup_key__isnull=False).values('dedup_key')
+        _supersede(stale.filter(dedup_key__in=queued_keys), now)
+        return stale.update(status=JobStatus.QUEUED, locked_by='', run_at=now)
+
+
+def work(worker=None, batch_size=CLAIM_BATCH_SIZE, poll_interval=POLL_INTERVAL, should_stop=None,
+         max_jobs=None, idle_exit=False):
+    """
+    Vòng lặp của một worker. Dừng khi `should_stop()` trả về True, khi đã
+    chạy `max_jobs` job, hoặc khi hàng đợi trống nếu `idle_exit`.
+    Trả về (số thành công, số lỗi).
+    """
+    worker = worker or worker_name()
+    should_stop = should_stop or (lambda: False)
+    succeeded = errored = 0
+    while not should_stop():
+        close_old_connections()
+        jobs = claim(worker, batch_size)
+        if not jobs:
+            if idle_exit:
+                break
+            time.sleep(poll_interval)
+            continue
+        ok, failed = run_batch(jobs)
+        succeeded += ok
+        errored += failed
+        if max_jobs is not None and succeeded + errored >= max_jobs:
+            break
+    return succeeded, errored
+
+
+def purge_finished(older_than=timedelta(days=7), batch_size=PURGE_BATCH_SIZE):
+    """Xóa job DONE cũ theo lô. Job FAILED được giữ lại để xem xét."""
+    finished = Job.objects.filter(status=JobStatus.DONE, finished_at__lt=timezone.now() - older_than)
+    total = 0
+    while True:
+        ids = list(finished.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += Job.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,114 @@
+# ledger.py
+"""
+Sổ điểm Yêu Thương: mọi thay đổi số dư đi kèm một dòng LovePointHistory trong
+cùng transaction, và số dư chỉ được cập nhật bằng biểu thức F() trên DB.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import LovePointBalance, LovePointHistory, PointTransactionType
+
+BULK_BATCH_SIZE = 1000
+
+
+class InsufficientPoints(ValueError):
+    pass
+
+
+def _ensure_balances(user_ids):
+    # Tạo dòng số dư còn thiếu; ignore_conflicts để an toàn khi chạy song song
+    LovePointBalance.objects.bulk_create(
+        [LovePointBalance(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def earn_points(user_id, points, reason):
+    """Cộng điểm cho người dùng, trả về dòng lịch sử vừa ghi."""
+    if points <= 0:
+        raise ValueError('Số điểm cộng phải lớn hơn 0.')
+    with transaction.atomic():
+        updated = LovePointBalance.objects.filter(user_id=user_id).update(
+            current_balance=F('current_balance') + points
+        )
+        if not updated:
+            _ensure_balances([user_id])
+            LovePointBalance.objects.filter(user_id=user_id).update(
+                current_balance=F('current_balance') + points
+            )
+        return LovePointHistory.objects.create(
+            user_id=user_id,
+            transaction_type=PointTransactionType.EARNED,
+            points_changed=points,
+            reason=reason,
+        )
+
+
+def spend_points(user_id, points, reason):
+    """
+    Trừ điểm bằng UPDATE có điều kiện `current_balance >= points`, nên hai lệnh
+    trừ đồng thời không thể làm số dư âm. Ném InsufficientPoints nếu không đủ.
+    """
+    if points <= 0:
+        raise ValueError('Số điểm trừ phải lớn hơn 0.')
+    with transaction.atomic():
+        updated = LovePointBalance.objects.filter(
+            user_id=user_id, current_balance__gte=points,
+        ).update(current_balance=F('current_balance') - points)
+        if not updated:
+            raise InsufficientPoints('Số điểm hiện tại không đủ.')
+        return LovePointHistory.objects.create(
+            user_id=user_id,
+            transaction_type=PointTransactionType.SPENT,
+            points_changed=-points,
+            reason=reason,
+        )
+
+
+def award_points_bulk(awards, reason, batch_size=BULK_BATCH_SIZE):
+    """
+    Cộng điểm hàng loạt, ví dụ sau một chiến dịch. `awards` là dict hoặc các
+    cặp (user_id, points); điểm của cùng một người được gộp lại. Mỗi lô là một
+    transaction với số truy vấn cố định: tạo số dư còn thiếu, khóa, một UPDATE
+    CASE theo mức điểm, và một bulk_create lịch sử.
+    Trả về số người dùng đã được cộng điểm.
+    """
+    merged = defaultdict(int)
+    for user_id, points in (awards.items() if isinstance(awards, dict) else awards):
+        merged[user_id] += points
+    items = [(user_id, points) for user_id, points in merged.items() if points > 0]
+    total = 0
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        by_points = defaultdict(list)
+        for user_id, points in chunk:
+            by_points[points].append(user_id)
+        user_ids = sorted(user_id for user_id, _ in chunk)
+
+        with transaction.atomic():
+            _ensure_balances(user_ids)
+            # Khóa theo thứ tự khóa chính để các lô song song không deadlock
+            list(
+                LovePointBalance.objects.select_for_update()
+                .filter(user_id__in=user_ids).order_by('pk').values_list('pk', flat=True)
+            )
+            increment = Case(
+                *[When(user_id__in=ids, then=Value(points)) for points, ids in by_points.items()],
+                output_field=IntegerField(),
+            )
+            LovePointBalance.objects.filter(user_id__in=user_ids).update(
+                current_balance=F('current_balance') + increment
+            )
+            LovePointHistory.objects.bulk_create([
+                LovePointHistory(
+                    user_id=user_id,
+                    transaction_type=PointTransactionType.EARNED,
+                    points_changed=points,
+                    reason=reason,
+                )
+                for user_id, points in chunk
+            ])
+        total += len(chunk)
+    return total
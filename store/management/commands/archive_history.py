@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store.archive import ARCHIVE_BATCH_SIZE, ARCHIVES, archive, cutoff, first_of_month, purge_months
+
+
+class Command(BaseCommand):
+    help = (
+        "Chuyển lịch sử trạng thái đơn, lịch sử điểm và mã OTP cũ sang bảng lưu trữ "
+        "theo lô, có thể xuất kèm JSONL nén theo tháng (chạy định kỳ qua cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=ARCHIVES, help="Chỉ lưu trữ loại này (lặp được).")
+        parser.add_argument('--older-than-days', type=int,
+                            help="Ghi đè settings.STORE_ARCHIVE_AFTER_DAYS cho mọi loại.")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, help='Mỗi loại dừng sau bấy nhiêu lô.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Nghỉ giữa các lô (giây) để giảm tải DB.')
+        parser.add_argument('--export-dir', default=getattr(settings, 'STORE_ARCHIVE_EXPORT_DIR', None),
+                            help="Thư mục ghi <kind>/<YYYY-MM>.jsonl.gz.")
+        parser.add_argument('--no-export', action='store_true', help="Không xuất file dù có --export-dir.")
+        parser.add_argument('--purge-before', metavar='YYYY-MM',
+                            help="Sau khi lưu trữ, xóa các tháng trước tháng này khỏi bảng lưu trữ.")
+
+    def handle(self, *args, **options):
+        export_dir = None if options['no_export'] else options['export_dir']
+        purge_before = None
+        if options['purge_before']:
+            try:
+                purge_before = first_of_month(options['purge_before'])
+            except ValueError:
+                raise CommandError("--purge-before phải có dạng YYYY-MM.")
+
+        started = time.perf_counter()
+
+        def progress(kind, moved):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {kind}: {moved} dòng")
+
+        for kind in options['kind'] or ARCHIVES:
+            if options['older_than_days'] is not None:
+                before = timezone.now() - timedelta(days=options['older_than_days'])
+            else:
+                before = cutoff(kind)
+            moved = archive(
+                kind, before=before, batch_size=options['batch_size'], export_dir=export_dir,
+                max_batches=options['max_batches'], pause=options['pause'], progress=progress,
+            )
+            self.stdout.write(self.style.SUCCESS(f"{kind}: đã lưu trữ {moved} dòng cũ hơn {before:%Y-%m-%d}."))
+            if purge_before:
+                deleted = purge_months(kind, purge_before, batch_size=options['batch_size'])
+                self.stdout.write(f"{kind}: đã xóa {deleted} dòng lưu trữ trước {purge_before:%Y-%m}.")
+        if export_dir:
+            self.stdout.write(f"File xuất nằm trong {export_dir}.")
@@ -0,0 +1,67 @@
+import re
+from collections import Counter
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+
+from store.benchmarks import measure, render_changelist
+
+# Bỏ tham số khỏi câu SQL để nhận ra cùng một truy vấn chạy cho từng dòng
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def _shape(sql):
+    return _LITERALS.sub('?', sql)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render changelist của từng admin trong app store và đếm số truy vấn. "
+        "Báo lỗi nếu vượt ngưỡng hoặc có truy vấn lặp lại theo từng dòng (N+1). "
+        "Bảng có ít hơn 2 dòng bị bỏ qua."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-queries', type=int, default=12,
+                            help='Số truy vấn tối đa cho một trang changelist.')
+        parser.add_argument('--max-repeats', type=int, default=3,
+                            help='Số lần tối đa một câu SQL được lặp lại trong một trang.')
+
+    def handle(self, *args, **options):
+        failures = []
+        skipped = []
+
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'store':
+                continue
+            if not model._default_manager.all()[1:2].exists():
+                # Cần ít nhất hai dòng thì truy vấn lặp theo dòng mới lộ ra
+                skipped.append(model_admin.__class__.__name__)
+                self.stdout.write(self.style.WARNING(
+                    f"{model_admin.__class__.__name__:<28} bỏ qua: bảng có ít hơn 2 dòng"
+                ))
+                continue
+
+            with measure() as m:
+                render_changelist(model_admin)
+
+            total = m['queries']
+            repeats = Counter(_shape(sql) for sql in m['statements']).most_common(1)
+            worst = repeats[0][1] if repeats else 0
+            line = f"{model_admin.__class__.__name__:<28} {total:>4} queries (max repeat {worst})"
+
+            if total > options['max_queries'] or worst > options['max_repeats']:
+                failures.append(line)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            raise CommandError(f"{len(failures)} changelist vượt ngưỡng truy vấn.")
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"{len(skipped)} changelist không được kiểm tra vì thiếu dữ liệu "
+                "(chạy `seed_store` trước, hoặc xem store/tests.py)."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Tất cả changelist nằm trong ngưỡng.'))
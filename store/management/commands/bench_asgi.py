@@ -0,0 +1,148 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+def _wsgi_environ(path, query):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def _asgi_scope(path, query):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh thông lượng WSGI (pool luồng) và ASGI (event loop) của API đọc công khai "
+        "khi có nhiều client chậm. Chạy trong tiến trình, không cần máy chủ HTTP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/products/?limit=20')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--clients', type=int, default=200, help="Số client đồng thời.")
+        parser.add_argument('--threads', type=int, default=16, help="Số luồng worker của WSGI.")
+        parser.add_argument('--delay', type=float, default=0.2,
+                            help="Thời gian (giây) client chậm nhận hết response.")
+
+    def handle(self, *args, **options):
+        from config.asgi import application as asgi_app
+        from config.wsgi import application as wsgi_app
+
+        url = urlsplit(options['path'])
+        path, query = url.path, url.query
+        total, delay = options['requests'], options['delay']
+
+        workers = threading.BoundedSemaphore(options['threads'])
+
+        def wsgi_request():
+            status = []
+            body = wsgi_app(_wsgi_environ(path, query), lambda s, h, exc_info=None: status.append(s))
+            try:
+                b''.join(body)
+                # Luồng worker bị giữ trong lúc client chậm đọc response
+                time.sleep(delay)
+            finally:
+                body.close()
+            return status[0]
+
+        def wsgi_client(_):
+            # Mỗi client là một luồng; chỉ `threads` request được phục vụ cùng lúc
+            started = time.perf_counter()
+            try:
+                with workers:
+                    return wsgi_request(), time.perf_counter() - started
+            finally:
+                connection.close()
+
+        async def asgi_run():
+            semaphore = asyncio.Semaphore(options['clients'])
+
+            async def one():
+                async with semaphore:
+                    started = time.perf_counter()
+                    status = []
+                    sent = False
+
+                    async def receive():
+                        nonlocal sent
+                        if not sent:
+                            sent = True
+                            return {'type': 'http.request', 'body': b'', 'more_body': False}
+                        await asyncio.Event().wait()
+
+                    async def send(message):
+                        if message['type'] == 'http.response.start':
+                            status.append(message['status'])
+                        elif not message.get('more_body'):
+                            # Client chậm: chỉ coroutine này chờ, event loop vẫn phục vụ request khác
+                            await asyncio.sleep(delay)
+
+                    await asgi_app(_asgi_scope(path, query), receive, send)
+                    return status[0], time.perf_counter() - started
+
+            return await asyncio.gather(*(one() for _ in range(total)))
+
+        # Làm ấm cache để hai bên cùng đo đường phục vụ từ cache
+        status = wsgi_request()
+        if not str(status).startswith('200'):
+            raise CommandError(f"{options['path']} trả về {status}.")
+        connection.close()
+
+        self.stdout.write(
+            f"{options['path']}: {total} request, độ trễ client {delay * 1000:.0f} ms, "
+            f"{options['clients']} client đồng thời"
+        )
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+            wsgi_results = list(pool.map(wsgi_client, range(total)))
+        self._report(f"WSGI ({options['threads']} luồng)", wsgi_results, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        asgi_results = asyncio.run(asgi_run())
+        self._report("ASGI (1 event loop)", asgi_results, time.perf_counter() - started)
+        connection.close()
+
+    def _report(self, name, results, seconds):
+        errors = sum(1 for status, _ in results if not str(status).startswith('200'))
+        latencies = sorted(latency for _, latency in results)
+        p50, p99 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 98))
+        self.stdout.write(
+            f"{name:<22} {len(results) / seconds:>8.1f} req/s  "
+            f"p50 {p50 * 1000:>7.1f} ms  p99 {p99 * 1000:>7.1f} ms  lỗi {errors}"
+        )
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+import traceback
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from store.benchmarks import measure
+from store.cart import Cart
+from store.checkout import checkout
+from store.models import Order, Product, ProductStatus, ShippingAddress, User
+
+
+def _fill_cart(user_id, product_ids, lines, rng):
+    cart = Cart.for_user(user_id)
+    cart.items = {product_id: rng.randint(1, 3) for product_id in rng.sample(product_ids, lines)}
+    cart.dirty.clear()
+    cart._store()
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo số truy vấn mỗi lần đặt hàng theo số dòng giỏ, rồi chạy nhiều luồng "
+        "đặt hàng đồng thời và in số đơn/giây. Dữ liệu thử được xóa khi kết thúc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=50, help='Số đơn mỗi luồng.')
+        parser.add_argument('--lines', type=int, default=5, help='Số dòng mỗi giỏ khi chạy tải.')
+
+    def handle(self, *args, **options):
+        product_ids = list(
+            Product.objects.filter(status=ProductStatus.FOR_SALE).values_list('pk', flat=True)
+        )
+        if len(product_ids) < options['lines']:
+            raise CommandError(f"Cần ít nhất {options['lines']} sản phẩm đang bán.")
+        run = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(email=f'checkout-{run}-{i}@bench.local', full_name='Bench', phone_number='0',
+                 password=password)
+            for i in range(options['users'])
+        ])
+        user_ids = [u.pk for u in users]
+        ShippingAddress.objects.bulk_create([
+            ShippingAddress(user_id=user_id, recipient_name='Bench', phone_number='0',
+                            province='HN', district='HK', ward='HT', street_address='1',
+                            is_default=True)
+            for user_id in user_ids
+        ])
+        rng = random.Random(0)
+        try:
+            self.stdout.write(f"{'lines':>6} {'queries':>8}")
+            for lines in sorted({1, 10, min(50, len(product_ids)), options['lines']}):
+                _fill_cart(user_ids[0], product_ids, lines, rng)
+                with measure() as m:
+                    checkout(user_ids[0])
+                self.stdout.write(f"{lines:>6} {m['queries']:>8}")
+
+            measured = Order.objects.filter(user_id__in=user_ids).count()
+            stats = self._run_workers(user_ids, product_ids, options)
+            self.stdout.write(
+                f"{stats['orders']} đơn / {stats['elapsed']:.2f}s = "
+                f"{stats['orders'] / stats['elapsed']:.0f} đơn/s; lỗi: {stats['errors']}"
+            )
+            self._verify(user_ids, stats, measured)
+        finally:
+            Order.objects.filter(user_id__in=user_ids).delete()
+            User.objects.filter(pk__in=user_ids).delete()
+            for user_id in user_ids:
+                Cart.for_user(user_id).delete()
+
+    def _run_workers(self, user_ids, product_ids, options):
+        lock = threading.Lock()
+        stats = {'orders': 0, 'errors': 0, 'elapsed': 0.0, 'first_error': None}
+        # Mỗi luồng dùng một nhóm người dùng riêng để giỏ không bị ghi đè lẫn nhau
+        groups = [user_ids[i::options['workers']] for i in range(options['workers'])]
+
+        def worker(seed, group):
+            rng = random.Random(seed)
+            carts = [rng.choice(group) for _ in range(options['orders'])]
+            orders = errors = 0
+            first_error = None
+            started = time.perf_counter()
+            try:
+                for user_id in carts:
+                    try:
+                        _fill_cart(user_id, product_ids, options['lines'], rng)
+                        checkout(user_id)
+                        orders += 1
+                    except Exception:
+                        errors += 1
+                        first_error = first_error or traceback.format_exc()
+            finally:
+                connection.close()
+                with lock:
+                    stats['orders'] += orders
+                    stats['errors'] += errors
+                    stats['first_error'] = stats['first_error'] or first_error
+                    stats['elapsed'] = max(stats['elapsed'], time.perf_counter() - started)
+
+        threads = [
+            threading.Thread(target=worker, args=(i, group))
+            for i, group in enumerate(groups) if group
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return stats
+
+    def _verify(self, user_ids, stats, measured):
+        created = Order.objects.filter(user_id__in=user_ids).count() - measured
+        if created != stats['orders']:
+            raise CommandError(f"Sai lệch: {created} đơn trong DB, {stats['orders']} lượt đặt thành công.")
+        if stats['errors']:
+            raise CommandError(f"{stats['errors']} lượt đặt hàng bị lỗi, lỗi đầu tiên:\n{stats['first_error']}")
+        self.stdout.write(self.style.SUCCESS('Mỗi lượt đặt thành công tạo đúng một đơn.'))
@@ -0,0 +1,59 @@
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.benchmarks import measure
+from store.fulfillment import complete_orders, get_default_program
+from store.models import Order, OrderDetail, PaymentMethod, Product, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo chi phí mỗi đơn của complete_orders theo kích thước lô. Dữ liệu thử "
+        "được tạo trong transaction và rollback sau mỗi lần đo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--lines', type=int, default=3, help='Số dòng chi tiết mỗi đơn.')
+        parser.add_argument('--batch-sizes', default='1,10,100,1000')
+
+    def handle(self, *args, **options):
+        program = get_default_program()
+        products = list(Product.objects.order_by('pk')[:options['lines']])
+        if len(products) < options['lines']:
+            self.stderr.write('Cần ít nhất --lines sản phẩm trong DB (xem seed_store).')
+            return
+
+        self.stdout.write(f"{'batch':>6} {'orders':>7} {'queries':>8} {'q/order':>8} {'ms/order':>9}")
+        for batch_size in [int(b) for b in options['batch_sizes'].split(',')]:
+            with transaction.atomic():
+                order_ids = self._make_orders(options['orders'], products)
+                with measure() as m:
+                    for start in range(0, len(order_ids), batch_size):
+                        complete_orders(order_ids[start:start + batch_size], program=program)
+                transaction.set_rollback(True)
+
+            n = len(order_ids)
+            self.stdout.write(
+                f"{batch_size:>6} {n:>7} {m['queries']:>8} "
+                f"{m['queries'] / n:>8.2f} {m['seconds'] * 1000 / n:>9.3f}"
+            )
+
+    def _make_orders(self, count, products):
+        run = uuid.uuid4().hex[:8]
+        user = User.objects.create(email=f'bench-{run}@fulfillment.local', full_name='Bench', phone_number='0')
+        orders = Order.objects.bulk_create([
+            Order(
+                order_code=f'B{run}{i:07d}', user=user, payment_method=PaymentMethod.COD,
+                total_amount=sum(p.price for p in products),
+            )
+            for i in range(count)
+        ])
+        OrderDetail.objects.bulk_create([
+            OrderDetail(order=order, product=p, quantity=1, price_at_purchase=p.price or Decimal('0'))
+            for order in orders for p in products
+        ])
+        return [order.pk for order in orders]
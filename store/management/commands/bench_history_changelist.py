@@ -0,0 +1,75 @@
+import uuid
+
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.benchmarks import measure, render_changelist
+from store.models import LovePointHistory, PointTransactionType, User
+
+INSERT_BATCH = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian tải changelist LovePointHistory (keyset) ở trang đầu và "
+        "trang sâu khi bảng lớn dần, so với phân trang OFFSET mặc định. "
+        "Dữ liệu thử được rollback khi kết thúc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', default='10000,100000,1000000',
+                            help='Các mốc số dòng, ví dụ 10000,100000,1000000,10000000.')
+        parser.add_argument('--offset-max', type=int, default=1000000,
+                            help='Bỏ qua đo OFFSET khi bảng lớn hơn mốc này.')
+
+    def handle(self, *args, **options):
+        levels = sorted(int(level) for level in options['levels'].split(','))
+        keyset_admin = admin.site._registry[LovePointHistory]
+        offset_admin = admin.ModelAdmin(LovePointHistory, admin.site)
+        per_page = keyset_admin.list_per_page
+
+        self.stdout.write(f"{'rows':>10} {'first ms':>9} {'deep ms':>9} {'offset deep ms':>15}")
+        with transaction.atomic():
+            user = User.objects.create(
+                email=f'bench-{uuid.uuid4().hex[:8]}@history.local', full_name='Bench',
+                phone_number='0', password=make_password(None),
+            )
+            inserted = LovePointHistory.objects.count()
+            for level in levels:
+                while inserted < level:
+                    size = min(INSERT_BATCH, level - inserted)
+                    LovePointHistory.objects.bulk_create([
+                        LovePointHistory(
+                            user=user, transaction_type=PointTransactionType.EARNED,
+                            points_changed=1, reason='Bench',
+                        )
+                        for _ in range(size)
+                    ])
+                    inserted += size
+
+                with measure() as first:
+                    render_changelist(keyset_admin)
+
+                # Con trỏ tại vị trí ~90% bảng, lấy ngoài phần đo thời gian
+                deep_row = (
+                    LovePointHistory.objects.order_by('-transaction_date', '-id')
+                    .values_list('transaction_date', 'id')[int(inserted * 0.9)]
+                )
+                cursor = f'{deep_row[0].isoformat()}|{deep_row[1]}'
+                with measure() as deep:
+                    render_changelist(keyset_admin, {'cursor': cursor})
+
+                offset_ms = '-'
+                if inserted <= options['offset_max']:
+                    page = max(int(inserted * 0.9) // per_page, 1)
+                    with measure() as offset:
+                        render_changelist(offset_admin, {'p': page})
+                    offset_ms = f"{offset['seconds'] * 1000:.1f}"
+
+                self.stdout.write(
+                    f"{inserted:>10} {first['seconds'] * 1000:>9.1f} "
+                    f"{deep['seconds'] * 1000:>9.1f} {offset_ms:>15}"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,74 @@
+import multiprocessing
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from store.benchmarks import measure
+from store.jobs import enqueue, enqueue_many
+from store.management.commands.run_workers import _worker
+from store.models import Job, JobStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo chi phí xếp job trong request và thông lượng/độ trễ của worker theo số "
+        "tiến trình. Job thử được gắn nhãn lần đo và chỉ các job đó bị xóa khi kết thúc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=2000)
+        parser.add_argument('--processes', default='1,2,4', help='Các mức số tiến trình worker.')
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--sleep', type=float, default=0.0, help='Thời gian (giây) mỗi job giả lập.')
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        bench_jobs = Job.objects.filter(task='store.noop', payload__run=run)
+        # Xếp từng job như trong một request
+        with measure() as m:
+            for _ in range(100):
+                enqueue('store.noop', {'run': run})
+        self.stdout.write(
+            f"enqueue: {m['seconds'] * 10:.3f} ms/job, {m['queries'] / 100:.0f} truy vấn"
+        )
+        with measure() as m:
+            enqueue('store.noop', {'run': run}, dedup_key=f'bench-{run}')
+            duplicate = enqueue('store.noop', {'run': run}, dedup_key=f'bench-{run}')
+        self.stdout.write(f"enqueue trùng dedup_key: bị bỏ qua={duplicate is None}, {m['queries']} truy vấn")
+        bench_jobs.delete()
+
+        ctx = multiprocessing.get_context('spawn')
+        self.stdout.write(f"{'processes':>9} {'jobs/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'chạy lặp':>9}")
+        for processes in (int(p) for p in options['processes'].split(',')):
+            # Worker chạy sẵn và chờ việc như khi triển khai thật
+            stop = ctx.Event()
+            worker_options = {'batch_size': options['batch_size'], 'poll_interval': 0.05, 'burst': False}
+            connections.close_all()
+            workers = [ctx.Process(target=_worker, args=(i, stop, worker_options)) for i in range(processes)]
+            for worker in workers:
+                worker.start()
+            time.sleep(2)
+
+            started = timezone.now()
+            with transaction.atomic():
+                enqueue_many('store.noop', [{'sleep': options['sleep'], 'run': run}] * options['jobs'])
+            while bench_jobs.filter(status__in=(JobStatus.QUEUED, JobStatus.RUNNING)).exists():
+                time.sleep(0.1)
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+            rows = list(bench_jobs.values_list('created_at', 'finished_at', 'status', 'attempts'))
+            done = [row for row in rows if row[2] == JobStatus.DONE]
+            latencies = sorted((finished - created).total_seconds() * 1000 for created, finished, _, _ in done)
+            elapsed = (max(finished for _, finished, _, _ in done) - started).total_seconds()
+            repeated = sum(1 for row in rows if row[3] > 1)
+            p50, p99 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 98))
+            self.stdout.write(
+                f"{processes:>9} {len(done) / elapsed:>9.0f} {p50:>9.0f} {p99:>9.0f} {repeated:>9}"
+            )
+            bench_jobs.delete()
@@ -0,0 +1,53 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.benchmarks import measure
+from store.catalog_import import import_products
+
+
+def _jsonl(rows, start_price):
+    lines = (
+        json.dumps({
+            'name': f'Bench box {i:06d}',
+            'description': f'Hộp quà thử nghiệm số {i}',
+            'price': str(start_price + i % 500),
+            'charity_percentage': '10',
+        })
+        for i in range(rows)
+    )
+    return io.BytesIO(('\n'.join(lines) + '\n').encode())
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thông lượng import_products: thêm mới, dry-run, cập nhật giá và "
+        "lần chạy không đổi. Dữ liệu thử được rollback khi kết thúc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows, chunk_size = options['rows'], options['chunk_size']
+        passes = [
+            ('create', 100000, False),
+            ('dry-run', 120000, True),
+            ('update', 120000, False),
+            ('unchanged', 120000, False),
+        ]
+        self.stdout.write(f"{'pass':<10} {'seconds':>8} {'rows/s':>9} {'queries':>8}  kết quả")
+        with transaction.atomic():
+            for name, price, dry_run in passes:
+                with measure() as m:
+                    report = import_products(
+                        _jsonl(rows, price), 'jsonl', dry_run=dry_run, chunk_size=chunk_size,
+                    )
+                self.stdout.write(
+                    f"{name:<10} {m['seconds']:>8.2f} {rows / m['seconds']:>9.0f} "
+                    f"{m['queries']:>8}  {report.summary()}"
+                )
+            transaction.set_rollback(True)
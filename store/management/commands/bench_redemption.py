@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from store.ledger import InsufficientPoints, award_points_bulk
+from store.models import (
+    LovePointBalance, RedeemedOffer, User, Voucher, VoucherCode, VoucherType,
+)
+from store.redemption import VoucherUnavailable, generate_codes, redeem
+
+
+class Command(BaseCommand):
+    help = (
+        "Nhiều luồng đồng thời đổi điểm lấy một ưu đãi có kho mã cấp sẵn; in số "
+        "lượt đổi/giây và kiểm tra không trùng mã, không âm điểm. Dữ liệu thử "
+        "được xóa khi kết thúc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=200, help='Số lượt đổi mỗi luồng.')
+        parser.add_argument('--pool', type=int, default=1000, help='Số mã cấp sẵn.')
+        parser.add_argument('--points', type=int, default=30, help='Điểm khởi tạo mỗi người.')
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(email=f'redeem-{run}-{i}@bench.local', full_name='Bench', phone_number='0',
+                 password=password)
+            for i in range(options['users'])
+        ])
+        user_ids = [u.pk for u in users]
+        voucher = Voucher.objects.create(
+            name=f'Bench {run}', points_required=10, discount_value=10000,
+            voucher_type=VoucherType.FIXED_AMOUNT, conditions='Bench', valid_days=30,
+        )
+        try:
+            award_points_bulk({user_id: options['points'] for user_id in user_ids}, 'Bench: điểm khởi tạo')
+            started = time.perf_counter()
+            generate_codes(voucher, options['pool'])
+            self.stdout.write(f"Sinh {options['pool']} mã: {time.perf_counter() - started:.3f}s")
+
+            stats = self._run_workers(user_ids, voucher, options)
+            self.stdout.write(
+                f"{stats['redeemed']} lượt đổi / {stats['elapsed']:.2f}s = "
+                f"{stats['redeemed'] / stats['elapsed']:.0f} lượt/s; thiếu điểm: {stats['no_points']}; "
+                f"hết mã: {stats['sold_out']}; lỗi: {stats['errors']}"
+            )
+            self._verify(user_ids, voucher, stats)
+        finally:
+            User.objects.filter(pk__in=user_ids).delete()
+            voucher.delete()
+
+    def _run_workers(self, user_ids, voucher, options):
+        lock = threading.Lock()
+        stats = {'redeemed': 0, 'no_points': 0, 'sold_out': 0, 'errors': 0}
+        first_errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            counts = dict.fromkeys(stats, 0)
+            first_error = None
+            try:
+                for _ in range(options['attempts']):
+                    try:
+                        redeem(rng.choice(user_ids), voucher)
+                        counts['redeemed'] += 1
+                    except InsufficientPoints:
+                        counts['no_points'] += 1
+                    except VoucherUnavailable:
+                        counts['sold_out'] += 1
+                    except Exception as exc:
+                        counts['errors'] += 1
+                        first_error = first_error or f'{type(exc).__name__}: {exc}'
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in counts.items():
+                        stats[key] += value
+                    if first_error:
+                        first_errors.append(first_error)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats['elapsed'] = time.perf_counter() - started
+        stats['first_error'] = first_errors[0] if first_errors else None
+        return stats
+
+    def _verify(self, user_ids, voucher, stats):
+        offers = RedeemedOffer.objects.filter(voucher=voucher)
+        duplicated = offers.values('redeemed_code').annotate(n=Count('id')).filter(n__gt=1).count()
+        claimed = VoucherCode.objects.filter(voucher=voucher, claimed_at__isnull=False).count()
+        negative = LovePointBalance.objects.filter(user_id__in=user_ids, current_balance__lt=0).count()
+        if offers.count() != stats['redeemed'] or claimed != stats['redeemed'] or duplicated or negative:
+            raise CommandError(
+                f"Sai lệch: {offers.count()} ưu đãi, {claimed} mã đã cấp, "
+                f"{duplicated} mã trùng, {negative} số dư âm."
+            )
+        if stats['errors']:
+            raise CommandError(
+                f"{stats['errors']} lượt đổi bị lỗi ngoài thiếu điểm/hết mã, ví dụ: {stats['first_error']}"
+            )
+        self.stdout.write(self.style.SUCCESS('Mỗi lượt đổi nhận đúng một mã, không có số dư âm.'))
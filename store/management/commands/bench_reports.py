@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from store import rollups
+from store.benchmarks import measure
+from store.models import Order, OrderStatus
+
+
+class Command(BaseCommand):
+    help = "So sánh thời gian báo cáo doanh thu theo ngày: GROUP BY trên Order và đọc bảng tổng hợp."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'] - 1)
+        active = ~Q(order_status=OrderStatus.CANCELLED)
+
+        def raw():
+            return list(
+                Order.objects.filter(created_at__date__range=(start, end))
+                .annotate(day=TruncDate('created_at')).values('day')
+                .annotate(order_count=Count('pk', filter=active), revenue=Sum('total_amount', filter=active))
+                .order_by('day')
+            )
+
+        def rollup():
+            return list(rollups.sales_by_day(start, end))
+
+        for name, func in (('GROUP BY', raw), ('rollup', rollup)):
+            best = None
+            for _ in range(options['repeat']):
+                with measure() as m:
+                    rows = func()
+                best = m['seconds'] if best is None else min(best, m['seconds'])
+            self.stdout.write(f"{name:<10} {best * 1000:>9.2f} ms  {len(rows)} ngày")
@@ -0,0 +1,202 @@
+import json
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from store import rollups
+from store.benchmarks import compare_results, environment, render_changelist, run_case
+from store.cart import Cart
+from store.checkout import checkout
+from store.fulfillment import COMPLETABLE_STATUSES, complete_orders
+from store.ledger import award_points_bulk, earn_points
+from store.models import (
+    CharityProgram, DonationHistory, LovePointHistory, Order, OrderDetail, OrderStatus, Product,
+    ProductStatus, ShippingAddress, User, Voucher, VoucherType,
+)
+from store.redemption import generate_codes, redeem
+from store.search import search
+from store.totals import compute_program_totals
+
+GROUPS = ('changelists', 'aggregates', 'writes')
+ROW_MODELS = (User, Product, Order, OrderDetail, DonationHistory, LovePointHistory)
+
+
+def changelist_cases():
+    for model, model_admin in admin.site._registry.items():
+        if model._meta.app_label == 'store':
+            yield f'changelist.{model._meta.model_name}', (lambda ma=model_admin: render_changelist(ma)), {}
+
+
+def aggregate_cases():
+    end = timezone.localdate()
+    start = end - timedelta(days=364)
+    active = ~Q(order_status=OrderStatus.CANCELLED)
+    line_total = ExpressionWrapper(
+        F('price_at_purchase') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+
+    def sales_raw():
+        list(
+            Order.objects.filter(created_at__date__range=(start, end))
+            .annotate(day=TruncDate('created_at')).values('day')
+            .annotate(order_count=Count('pk', filter=active), revenue=Sum('total_amount', filter=active))
+            .order_by('day')
+        )
+
+    def top_products_raw():
+        list(
+            OrderDetail.objects.filter(order__created_at__date__range=(start, end))
+            .exclude(order__order_status=OrderStatus.CANCELLED)
+            .values('product_id', 'product__name')
+            .annotate(units_sold=Sum('quantity'), revenue=Sum(line_total))
+            .order_by('-units_sold', 'product_id')[:10]
+        )
+
+    yield 'aggregate.sales_by_day.raw', sales_raw, {}
+    yield 'aggregate.sales_by_day.rollup', lambda: list(rollups.sales_by_day(start, end)), {}
+    yield 'aggregate.top_products.raw', top_products_raw, {}
+    yield 'aggregate.top_products.rollup', lambda: list(rollups.top_products(start, end)), {}
+    yield 'aggregate.program_totals', compute_program_totals, {}
+    yield 'aggregate.search', lambda: search('hộp quà'), {}
+
+
+def write_cases(fixture):
+    rng = random.Random(0)
+    user_id, product_ids, voucher = fixture['user_id'], fixture['product_ids'], fixture['voucher']
+
+    def fill_cart(lines, dirty=False):
+        cart = Cart.for_user(user_id)
+        cart.items = {product_id: rng.randint(1, 3) for product_id in product_ids[:lines]}
+        cart.dirty = set(cart.items) if dirty else set()
+        cart._store()
+        return cart
+
+    def open_orders():
+        return list(
+            Order.objects.filter(order_status__in=COMPLETABLE_STATUSES)
+            .order_by('pk').values_list('pk', flat=True)[:100]
+        )
+
+    rollback = {'rollback': True}
+    yield 'write.checkout_5_lines', lambda _: checkout(user_id), {**rollback, 'setup': lambda: fill_cart(5)}
+    yield 'write.cart_flush_20_lines', lambda cart: cart.flush(), {
+        **rollback, 'setup': lambda: fill_cart(20, dirty=True),
+    }
+    yield 'write.redeem_voucher', lambda: redeem(user_id, voucher), rollback
+    yield 'write.complete_100_orders', complete_orders, {**rollback, 'setup': open_orders}
+    yield 'write.award_points_1000_users', lambda ids: award_points_bulk(
+        {pk: 1 for pk in ids}, reason='Bench',
+    ), {**rollback, 'setup': lambda: list(User.objects.order_by('pk').values_list('pk', flat=True)[:1000])}
+
+
+def create_write_fixture():
+    """Người dùng, giỏ và ưu đãi riêng cho phép đo ghi; rollback cùng phép đo."""
+    product_ids = list(
+        Product.objects.filter(status=ProductStatus.FOR_SALE).order_by('pk').values_list('pk', flat=True)[:20]
+    )
+    if len(product_ids) < 20:
+        raise CommandError("Cần ít nhất 20 sản phẩm đang bán; chạy `seed_store` trước.")
+    if not CharityProgram.objects.exists():
+        raise CommandError("Cần ít nhất một chương trình thiện nguyện; chạy `seed_store` trước.")
+    user = User.objects.create(
+        email=f'bench-{uuid.uuid4().hex[:8]}@bench.local', full_name='Bench', phone_number='0',
+        password=make_password(None),
+    )
+    ShippingAddress.objects.create(
+        user=user, recipient_name='Bench', phone_number='0', province='HN', district='HK',
+        ward='HT', street_address='1', is_default=True,
+    )
+    voucher = Voucher.objects.create(
+        name='Bench', points_required=1, discount_value=10, voucher_type=VoucherType.PERCENTAGE,
+        conditions='Bench', valid_days=30,
+    )
+    generate_codes(voucher, 100)
+    earn_points(user.pk, 1000, 'Bench')
+    return {'user_id': user.pk, 'product_ids': product_ids, 'voucher': voucher}
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian và số truy vấn của changelist admin, truy vấn tổng hợp và các "
+        "thao tác ghi chính, ghi kết quả ra JSON để so sánh giữa các commit. "
+        "Các thao tác ghi được rollback. Dùng dữ liệu từ `seed_store`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='bench_store.json', help="File JSON kết quả.")
+        parser.add_argument('--compare', help="File JSON của lần chạy trước để so sánh.")
+        parser.add_argument('--group', action='append', choices=GROUPS, help="Chỉ chạy nhóm này (lặp được).")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--max-regression', type=float,
+                            help="Báo lỗi nếu median chậm hơn lần trước quá tỉ lệ này, ví dụ 1.5.")
+
+    def handle(self, *args, **options):
+        groups = options['group'] or GROUPS
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as fh:
+                    previous = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Không đọc được {options['compare']}: {exc}")
+
+        results = {}
+
+        def run(cases):
+            for name, func, kwargs in cases:
+                results[name] = run_case(func, repeat=options['repeat'], **kwargs)
+                result = results[name]
+                self.stdout.write(
+                    f"{name:<40} {result['median_ms']:>10.2f} ms  {result['queries']:>4} queries"
+                )
+
+        if 'changelists' in groups:
+            run(changelist_cases())
+        if 'aggregates' in groups:
+            # Bảng rollup phải theo kịp dữ liệu gốc thì so sánh rollup/raw mới có nghĩa
+            processed = rollups.run()
+            if processed:
+                self.stdout.write(f"Đã tính rollup cho {processed} ngày đang chờ.")
+            run(aggregate_cases())
+        if 'writes' in groups:
+            with transaction.atomic():
+                fixture = create_write_fixture()
+                try:
+                    run(write_cases(fixture))
+                finally:
+                    Cart.for_user(fixture['user_id']).delete()
+                    transaction.set_rollback(True)
+
+        payload = {'environment': environment(ROW_MODELS), 'results': results}
+        with open(options['output'], 'w', encoding='utf-8') as fh:
+            json.dump(payload, fh, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Đã ghi {len(results)} phép đo vào {options['output']}."))
+
+        if previous is not None:
+            self._compare(previous, payload, options['max_regression'])
+
+    def _compare(self, previous, current, max_regression):
+        commit = previous.get('environment', {}).get('commit')
+        self.stdout.write(f"\nSo với {commit or 'lần trước'}:")
+        regressions = []
+        for name, old_ms, new_ms, ratio, old_queries, new_queries in compare_results(previous, current):
+            line = f"{name:<40} {old_ms:>10.2f} -> {new_ms:>10.2f} ms"
+            if ratio is not None:
+                line += f"  x{ratio:.2f}"
+            if old_queries != new_queries:
+                line += f"  queries {old_queries} -> {new_queries}"
+            if max_regression and ratio is not None and ratio > max_regression:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} phép đo chậm hơn ngưỡng x{max_regression}.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.redemption import EXPIRE_BATCH_SIZE, expire_offers
+
+
+class Command(BaseCommand):
+    help = "Đánh dấu EXPIRED cho các ưu đãi đã đổi nhưng chưa dùng và đã quá hạn (chạy định kỳ)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=EXPIRE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated = expire_offers(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Đã đánh dấu hết hạn {updated} ưu đãi."))
@@ -0,0 +1,89 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from store.models import (
+    LovePointHistory, Order, OrderStatus, OrderStatusHistory, OTPVerification,
+    RedeemedOffer, RedeemedStatus, Review, ReviewStatus, VoucherCode,
+)
+
+# Dấu hiệu quét toàn bảng trong kế hoạch thực thi của từng backend
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'SCAN (\w+)\b(?! USING)'),
+    'mysql': re.compile(r'Table scan on (\w+)'),
+}
+
+
+def canonical_queries():
+    """
+    Các truy vấn "nóng" cần được index phục vụ. Tham số chỉ mang tính đại diện,
+    kế hoạch thực thi không phụ thuộc vào giá trị cụ thể.
+    """
+    now = timezone.now()
+    return {
+        'order_by_user': Order.objects.filter(user_id=1).order_by('-created_at')[:20],
+        'order_by_status': Order.objects.filter(order_status=OrderStatus.NEW).order_by('-created_at')[:100],
+        'reviews_for_product': Review.objects.filter(
+            product_id=1, display_status=ReviewStatus.VISIBLE,
+        ).order_by('-created_at')[:20],
+        'point_history_for_user': LovePointHistory.objects.filter(user_id=1).order_by('-transaction_date')[:50],
+        'status_history_by_status': OrderStatusHistory.objects.filter(
+            new_status=OrderStatus.DELIVERED,
+        ).order_by('-updated_at')[:100],
+        'otp_lookup': OTPVerification.objects.filter(
+            email='user@example.com', is_used=False, expires_at__gt=now,
+        ),
+        'otp_purge_expired': OTPVerification.objects.filter(expires_at__lt=now).values('pk'),
+        'otp_purge_used': OTPVerification.objects.filter(is_used=True).values('pk'),
+        'unused_offers_for_user': RedeemedOffer.objects.filter(
+            user_id=1, usage_status=RedeemedStatus.NOT_USED,
+        ),
+        'offers_to_expire': RedeemedOffer.objects.filter(
+            usage_status=RedeemedStatus.NOT_USED, expires_at__lt=now,
+        ).values('pk'),
+        'voucher_free_code': VoucherCode.objects.filter(
+            voucher_id=1, claimed_at__isnull=True,
+        ).order_by('pk').values('pk', 'code')[:1],
+    }
+
+
+class Command(BaseCommand):
+    help = "Chạy EXPLAIN cho các truy vấn nóng và báo các kế hoạch quét toàn bảng."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Chỉ EXPLAIN các truy vấn có tên này.')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Dùng EXPLAIN ANALYZE (chỉ PostgreSQL).')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Trả về lỗi nếu có truy vấn quét toàn bảng.')
+
+    def handle(self, *args, **options):
+        queries = canonical_queries()
+        unknown = set(options['names']) - set(queries)
+        if unknown:
+            raise CommandError(f"Không có truy vấn: {', '.join(sorted(unknown))}")
+
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                raise CommandError('--analyze chỉ hỗ trợ PostgreSQL.')
+            explain_options = {'analyze': True, 'buffers': True}
+
+        scan_pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        scans = []
+        for name, qs in queries.items():
+            if options['names'] and name not in options['names']:
+                continue
+            plan = qs.explain(**explain_options)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            if scan_pattern and scan_pattern.search(plan):
+                scans.append(name)
+                self.stdout.write(self.style.WARNING('  -> quét toàn bảng'))
+            self.stdout.write('')
+
+        if scans and options['fail_on_scan']:
+            raise CommandError(f"Quét toàn bảng: {', '.join(scans)}")
@@ -0,0 +1,47 @@
+import argparse
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import CHUNK_SIZE, EXPORTS, FORMATS, stream_export
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        # Hàm `type=` của argparse: lỗi được in như lỗi cú pháp lệnh
+        raise argparse.ArgumentTypeError(f"Ngày không hợp lệ: {value} (định dạng YYYY-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "Xuất đơn hàng/quyên góp/giải ngân dạng CSV hoặc JSONL theo luồng, bộ nhớ cố định."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Nén gzip khi ghi.')
+        parser.add_argument('--start', type=_date, help='Từ ngày (YYYY-MM-DD).')
+        parser.add_argument('--end', type=_date, help='Đến hết ngày (YYYY-MM-DD).')
+        parser.add_argument('--program', type=int, help='ID chương trình thiện nguyện.')
+        parser.add_argument('--output', '-o', default='-', help="Đường dẫn file, '-' là stdout.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(
+                options['kind'], options['format'], options['gzip'],
+                start=options['start'], end=options['end'],
+                program=options['program'], chunk_size=options['chunk_size'],
+            )
+            if options['output'] == '-':
+                for chunk in chunks:
+                    sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+            else:
+                with open(options['output'], 'wb') as fh:
+                    for chunk in chunks:
+                        fh.write(chunk)
+        except ValueError as exc:
+            raise CommandError(str(exc))
@@ -0,0 +1,90 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+# Module này được tiến trình con import lại (spawn) trước khi Django sẵn sàng,
+# nên các import từ store.* nằm trong hàm.
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _render(source):
+    from store.images import render_derivatives
+
+    try:
+        return source, render_derivatives(source), None
+    except Exception as exc:
+        return source, [], f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Dựng bù thumbnail/WebP và kích thước cho ảnh của sản phẩm, chương trình "
+        "từ thiện và bài viết bằng pool tiến trình."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Số tiến trình xử lý ảnh.')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Số ảnh mỗi lần ghi ImageDerivative.')
+        parser.add_argument('--force', action='store_true',
+                            help='Dựng lại cả ảnh đã có bản dẫn xuất.')
+
+    def handle(self, *args, **options):
+        from django.db import connections
+
+        from store.cache import bump_version
+        from store.images import IMAGE_FIELDS, ORIGINAL, save_derivatives
+        from store.models import ImageDerivative
+
+        sources = set()
+        for model, field in IMAGE_FIELDS.items():
+            sources.update(
+                model._default_manager.exclude(**{field: ''}).values_list(field, flat=True).distinct()
+            )
+        if not options['force']:
+            sources -= set(
+                ImageDerivative.objects.filter(preset=ORIGINAL).values_list('source', flat=True)
+            )
+        sources = sorted(sources)
+        if not sources:
+            self.stdout.write("Không có ảnh cần xử lý.")
+            return
+
+        # Không để tiến trình con (fork) thừa hưởng kết nối DB đang mở
+        connections.close_all()
+        started = time.perf_counter()
+        done = failed = 0
+        pending = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            chunksize = max(len(sources) // (options['workers'] * 4), 1)
+            for source, rows, error in pool.map(_render, sources, chunksize=chunksize):
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{source}: {error}")
+                    continue
+                pending.extend(rows)
+                done += 1
+                if done % options['batch_size'] == 0:
+                    save_derivatives(pending)
+                    pending = []
+                    self.stdout.write(f"{done}/{len(sources)} ảnh")
+        if pending:
+            save_derivatives(pending)
+        for model in IMAGE_FIELDS:
+            bump_version(model)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã xử lý {done} ảnh, lỗi {failed}, {elapsed:.1f}s "
+            f"({done / elapsed if elapsed else 0:.1f} ảnh/s)."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.models import Voucher
+from store.redemption import POOL_BATCH_SIZE, free_codes, generate_codes
+
+
+class Command(BaseCommand):
+    help = "Sinh sẵn mã vào kho của một ưu đãi trước chiến dịch đổi điểm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('voucher_id', type=int)
+        parser.add_argument('--count', type=int, default=POOL_BATCH_SIZE)
+        parser.add_argument('--batch-size', type=int, default=POOL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        voucher = Voucher.objects.filter(pk=options['voucher_id']).first()
+        if voucher is None:
+            raise CommandError(f"Không có ưu đãi #{options['voucher_id']}.")
+        created = generate_codes(voucher, options['count'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã thêm {created} mã cho '{voucher}'; còn trống {free_codes(voucher).count()}."
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.catalog_import import (
+    CHUNK_SIZE, FORMATS, ProductImportError, detect_format, import_products,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Nhập/cập nhật sản phẩm từ CSV hoặc JSONL, đối chiếu theo tên. "
+        "Cột: name, description, price, charity_percentage, image, status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Mặc định đoán theo đuôi file.')
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ in khác biệt, không ghi.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as fh:
+                report = import_products(
+                    fh, fmt, dry_run=options['dry_run'], chunk_size=options['chunk_size'],
+                )
+        except (OSError, ProductImportError) as exc:
+            raise CommandError(str(exc))
+
+        for line in report.samples:
+            self.stdout.write(line)
+        for line_no, error in report.errors:
+            self.stderr.write(f"Dòng {line_no}: {error}")
+        if report.changed_columns:
+            self.stdout.write("Cột thay đổi: " + ', '.join(
+                f"{column}={count}" for column, count in report.changed_columns
+            ))
+        prefix = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(prefix + report.summary()))
@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Module này được tiến trình con import lại (spawn) trước khi Django sẵn sàng,
+# nên các import từ store.* nằm trong hàm.
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _hash(password):
+    from django.contrib.auth.hashers import make_password
+
+    return make_password(password)
+
+
+class Command(BaseCommand):
+    help = (
+        "Nhập người dùng từ CSV hoặc JSONL, đối chiếu theo email; mật khẩu được băm "
+        "song song bằng pool tiến trình. Cột: email, full_name, phone_number, password "
+        "hoặc password_hash, points, recipient_name, province, district, ward, street_address."
+    )
+
+    def add_arguments(self, parser):
+        from store.user_import import CHUNK_SIZE, DUPLICATE_MODES, FORMATS
+
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Mặc định đoán theo đuôi file.')
+        parser.add_argument('--duplicates', choices=DUPLICATE_MODES, default='skip',
+                            help='Email đã có: bỏ qua (mặc định) hoặc cập nhật họ tên, SĐT, mật khẩu.')
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ kiểm tra file, không băm và không ghi.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Số tiến trình băm mật khẩu.')
+
+    def handle(self, *args, **options):
+        from django.db import connections
+
+        from store.user_import import UserImportError, detect_format, import_users
+
+        fmt = options['format'] or detect_format(options['path'])
+        workers = options['workers']
+        started = time.perf_counter()
+
+        def progress(report):
+            self.stdout.write(
+                f"[{time.perf_counter() - started:7.1f}s] {report.rows} dòng, "
+                f"băm {report.hashed} mật khẩu ({report.rows_per_second:.0f} dòng/s)"
+            )
+
+        # Không để tiến trình con (fork) thừa hưởng kết nối DB đang mở
+        connections.close_all()
+        try:
+            with open(options['path'], 'rb') as fh, \
+                    ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+
+                def hasher(passwords):
+                    # pool.map gửi cả lô ngay; kết quả được đọc khi ghi lô
+                    chunksize = max(len(passwords) // (workers * 4), 1)
+                    return pool.map(_hash, passwords, chunksize=chunksize)
+
+                report = import_users(
+                    fh, fmt, duplicates=options['duplicates'], dry_run=options['dry_run'],
+                    chunk_size=options['chunk_size'], hasher=hasher, progress=progress,
+                )
+        except (OSError, UserImportError) as exc:
+            raise CommandError(str(exc))
+
+        for line_no, error in report.errors:
+            self.stderr.write(f"Dòng {line_no}: {error}")
+        prefix = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(prefix + report.summary()))
+        if report.hashed:
+            self.stdout.write(f"Băm mật khẩu: {report.hashed / report.seconds:.1f} mật khẩu/s với {workers} tiến trình.")
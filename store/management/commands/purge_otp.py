@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from store.otp import PURGE_BATCH_SIZE, purge_codes
+
+
+class Command(BaseCommand):
+    help = "Xóa mã OTP đã hết hạn hoặc đã dùng theo từng lô (chạy định kỳ qua cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, help='Dừng sau bấy nhiêu lô.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Nghỉ giữa các lô (giây) để giảm tải DB.')
+
+    def handle(self, *args, **options):
+        deleted = purge_codes(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Đã xóa {deleted} mã OTP."))
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.cache import bump_version_on_commit
+from store.models import CharityProgram
+from store.totals import PROGRAM_TOTAL_FIELDS, compute_program_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Tính lại tổng quyên góp/giải ngân của mọi chương trình từ sổ, "
+        "báo chênh lệch so với giá trị đang lưu và ghi đè hàng loạt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Chỉ báo chênh lệch, không ghi vào DB.')
+
+    def handle(self, *args, **options):
+        fields = list(PROGRAM_TOTAL_FIELDS.values())
+        with transaction.atomic():
+            totals = compute_program_totals()
+            programs = list(CharityProgram.objects.select_for_update().only('pk', 'name', *fields))
+            drifted = []
+            for program in programs:
+                changed = False
+                for field in fields:
+                    expected = totals.get(program.pk, {}).get(field) or Decimal('0')
+                    stored = getattr(program, field)
+                    if stored != expected:
+                        self.stdout.write(
+                            f"{program.name}: {field} {stored} -> {expected} (lệch {expected - stored})"
+                        )
+                        setattr(program, field, expected)
+                        changed = True
+                if changed:
+                    drifted.append(program)
+
+            if drifted and not options['dry_run']:
+                CharityProgram.objects.bulk_update(drifted, fields, batch_size=500)
+                # bulk_update bỏ qua signal: cache danh sách/chi tiết/tiến độ chương trình
+                bump_version_on_commit(CharityProgram)
+
+        verb = 'cần sửa' if options['dry_run'] else 'đã sửa'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(programs)} chương trình, {len(drifted)} {verb}."
+        ))
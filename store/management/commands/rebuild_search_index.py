@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.search import INDEXED_MODELS, REBUILD_BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Dựng lại tài liệu tìm kiếm (SearchEntry) cho sản phẩm, bài viết và đánh giá."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for model in INDEXED_MODELS:
+            started = time.perf_counter()
+            count = rebuild_index(model, batch_size=options['batch_size'])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {count} tài liệu "
+                f"trong {time.perf_counter() - started:.2f}s"
+            )
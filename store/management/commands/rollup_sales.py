@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Tính lại bảng tổng hợp doanh thu/doanh số/quyên góp theo ngày cho các "
+        "ngày có thay đổi (chạy định kỳ qua cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Tính lại mọi ngày có đơn hàng.')
+        parser.add_argument('--batch-days', type=int, default=rollups.DAYS_PER_BATCH,
+                            help='Số ngày mỗi transaction.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        processed = rollups.run(batch_days=options['batch_days'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã tổng hợp {processed} ngày trong {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,86 @@
+import multiprocessing
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+# Tiến trình con (spawn) import lại module này trước khi Django sẵn sàng,
+# nên các import từ store.* nằm trong hàm.
+
+MAINTENANCE_INTERVAL = 60
+
+
+def _worker(index, stop, options):
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from store.jobs import work, worker_name
+
+    # Ctrl-C gửi tới cả nhóm tiến trình: để tiến trình cha quyết định dừng,
+    # worker chạy nốt lô hiện tại
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(
+        worker=f'{worker_name()}#{index}',
+        batch_size=options['batch_size'],
+        poll_interval=options['poll_interval'],
+        should_stop=stop.is_set,
+        idle_exit=options['burst'],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Chạy N tiến trình worker xử lý hàng đợi Job. Tiến trình cha định kỳ xếp "
+        "lại job bị treo và xóa job đã xong cũ. Ctrl-C/SIGTERM: dừng sau lô hiện tại."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=20, help='Số job mỗi lần nhận.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Số giây chờ khi hàng đợi trống.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Thoát khi hàng đợi trống thay vì chờ job mới.')
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='Giữ job đã xong bao nhiêu ngày trước khi xóa.')
+
+    def handle(self, *args, **options):
+        from django.db import connections
+
+        from store.jobs import purge_finished, reclaim_stale
+
+        ctx = multiprocessing.get_context('spawn')
+        stop = ctx.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write("Đang dừng, chờ các worker xong lô hiện tại...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        connections.close_all()
+        processes = [
+            ctx.Process(target=_worker, args=(index, stop, options), name=f'store-worker-{index}')
+            for index in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Đã chạy {len(processes)} worker.")
+
+        next_maintenance = 0
+        while any(process.is_alive() for process in processes):
+            if time.monotonic() >= next_maintenance and not stop.is_set():
+                reclaimed = reclaim_stale()
+                purged = purge_finished(timedelta(days=options['keep_days']))
+                if reclaimed or purged:
+                    self.stdout.write(f"Xếp lại {reclaimed} job bị treo, xóa {purged} job cũ.")
+                connections.close_all()
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+            for process in processes:
+                process.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS("Các worker đã dừng."))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.seeding import SCALES, counts, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinh dữ liệu giả lập (người dùng, địa chỉ, sản phẩm, đơn hàng, quyên góp, "
+        "lịch sử điểm, ưu đãi) theo tỉ lệ cố định để đo hiệu năng. "
+        "Chạy `rollup_sales` sau đó để có bảng tổng hợp. Chỉ dùng cho CSDL đo hiệu năng: "
+        "không chạy khi ứng dụng đang ghi vào cùng CSDL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k', help='Quy mô theo số đơn hàng.')
+        parser.add_argument('--orders', type=int, help='Số đơn hàng tùy ý (ghi đè --scale).')
+        parser.add_argument('--seed', type=int, default=0, help='Cùng seed sinh cùng dữ liệu.')
+
+    def handle(self, *args, **options):
+        orders = options['orders'] or SCALES[options['scale']]
+        if orders <= 0:
+            raise CommandError("Số đơn hàng phải lớn hơn 0.")
+        plan = ', '.join(f'{name}={count}' for name, count in counts(orders).items())
+        self.stdout.write(f"Dự kiến: {plan}")
+
+        started = time.perf_counter()
+
+        def progress(message):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+        created = seed(orders, seed=options['seed'], progress=progress)
+        elapsed = time.perf_counter() - started
+        for name, count in created.items():
+            self.stdout.write(f"{name:<22} {count:>12}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã sinh {orders} đơn hàng trong {elapsed:.1f}s ({orders / elapsed:.0f} đơn/s)."
+        ))
@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from store.ledger import InsufficientPoints, award_points_bulk, earn_points, spend_points
+from store.models import LovePointBalance, LovePointHistory, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Chạy nhiều luồng cộng/trừ điểm đồng thời trên DB cục bộ, sau đó kiểm "
+        "tra số dư khớp tổng lịch sử và không âm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--ops', type=int, default=200, help='Số thao tác mỗi luồng.')
+        parser.add_argument('--spend-ratio', type=float, default=0.5)
+        parser.add_argument('--keep', action='store_true', help='Giữ lại dữ liệu thử nghiệm.')
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(email=f'stress-{run}-{i}@ledger.local', full_name='Stress', phone_number='0',
+                 password=password)
+            for i in range(options['users'])
+        ])
+        user_ids = [u.pk for u in users]
+        try:
+            started = time.perf_counter()
+            award_points_bulk({user_id: 50 for user_id in user_ids}, reason='Stress: điểm khởi tạo')
+            self.stdout.write(f"award_points_bulk: {len(user_ids)} người dùng trong "
+                              f"{time.perf_counter() - started:.3f}s")
+
+            stats = self._run_workers(user_ids, options)
+            self.stdout.write(
+                f"{stats['ops']} thao tác / {stats['elapsed']:.2f}s = "
+                f"{stats['ops'] / stats['elapsed']:.0f} ops/s; "
+                f"từ chối do thiếu điểm: {stats['rejected']}; lỗi: {stats['errors']}"
+            )
+            self._verify(user_ids)
+            if stats['errors']:
+                raise CommandError(
+                    f"{stats['errors']} thao tác bị lỗi ngoài thiếu điểm, ví dụ: {stats['first_error']}"
+                )
+        finally:
+            if not options['keep']:
+                User.objects.filter(pk__in=user_ids).delete()
+
+    def _run_workers(self, user_ids, options):
+        lock = threading.Lock()
+        stats = {'ops': 0, 'rejected': 0, 'errors': 0, 'first_error': None}
+
+        def worker(seed):
+            rng = random.Random(seed)
+            ops = rejected = errors = 0
+            first_error = None
+            try:
+                for _ in range(options['ops']):
+                    user_id = rng.choice(user_ids)
+                    points = rng.randint(1, 20)
+                    try:
+                        if rng.random() < options['spend_ratio']:
+                            spend_points(user_id, points, 'Stress: trừ điểm')
+                        else:
+                            earn_points(user_id, points, 'Stress: cộng điểm')
+                    except InsufficientPoints:
+                        rejected += 1
+                    except Exception as exc:
+                        errors += 1
+                        first_error = first_error or f'{type(exc).__name__}: {exc}'
+                    ops += 1
+            finally:
+                connection.close()
+                with lock:
+                    stats['ops'] += ops
+                    stats['rejected'] += rejected
+                    stats['errors'] += errors
+                    stats['first_error'] = stats['first_error'] or first_error
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats['elapsed'] = time.perf_counter() - started
+        return stats
+
+    def _verify(self, user_ids):
+        ledger = dict(
+            LovePointHistory.objects.filter(user_id__in=user_ids)
+            .values('user_id').annotate(total=Sum('points_changed')).values_list('user_id', 'total')
+        )
+        balances = dict(
+            LovePointBalance.objects.filter(user_id__in=user_ids).values_list('user_id', 'current_balance')
+        )
+        mismatched = [uid for uid in user_ids if balances.get(uid, 0) != (ledger.get(uid) or 0)]
+        negative = [uid for uid, balance in balances.items() if balance < 0]
+        if mismatched or negative:
+            raise CommandError(f"Sai lệch số dư: {len(mismatched)} người dùng, âm: {len(negative)}.")
+        self.stdout.write(self.style.SUCCESS('Số dư khớp lịch sử cho mọi người dùng.'))
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def sqlite_path(alias):
+    settings_dict = connections[alias].settings_dict
+    if settings_dict['ENGINE'] != 'django.db.backends.sqlite3':
+        raise CommandError(f"'{alias}' không phải SQLite; replica thật do CSDL tự sao chép.")
+    name = str(settings_dict['NAME'])
+    # NAME của bản sao có dạng URI file:<đường dẫn>?mode=ro
+    return urlsplit(name).path if name.startswith('file:') else name
+
+
+class Command(BaseCommand):
+    help = (
+        "Chép CSDL SQLite chính sang các bản sao giả lập (STORE_REPLICA_DB) bằng "
+        "backup API. Với --interval, chép lặp lại để mô phỏng độ trễ sao chép."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Chép lại sau mỗi số giây này cho tới khi dừng (Ctrl+C).')
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'STORE_REPLICA_DATABASES', ())
+        if not replicas:
+            raise CommandError("Chưa cấu hình bản sao; đặt biến môi trường STORE_REPLICA_DB.")
+        source = sqlite_path(DEFAULT_DB_ALIAS)
+        targets = {alias: sqlite_path(alias) for alias in replicas}
+
+        while True:
+            for alias, target in targets.items():
+                started = time.perf_counter()
+                with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+                    src.backup(dst)
+                src.close()
+                dst.close()
+                self.stdout.write(f"{alias}: đã chép trong {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options['interval']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
+        self.stdout.write(self.style.SUCCESS("Đã đồng bộ bản sao."))
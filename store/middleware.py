@@ -0,0 +1,224 @@
+# middleware.py
+"""
+Đo chi phí từng request: số truy vấn, tổng thời gian SQL, truy vấn lặp lại
+(kèm nơi gọi trong mã nguồn dự án) và hit/miss của cache store.
+
+Bật bằng settings.STORE_PROFILING. Kết quả được trả trong header
+`Server-Timing` và ghi một dòng JSON vào logger 'store.profiling' (mức
+WARNING nếu request chậm hơn STORE_PROFILING_SLOW_MS). Nếu đặt
+STORE_PROFILING_DIR, một tỉ lệ STORE_PROFILING_SAMPLE_RATE request được chạy
+dưới cProfile và file .prof của request chậm được lưu vào thư mục đó.
+
+Truy vấn được bắt bằng execute_wrapper gắn vào mọi kết nối DB; bộ thu thập
+nằm trong ContextVar nên truy vấn của view async (chạy qua sync_to_async)
+vẫn được tính cho đúng request.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .cache import track_request_stats
+
+logger = logging.getLogger('store.profiling')
+
+SLOW_MS = 500
+MAX_DUPLICATES = 5
+MAX_CALL_SITES = 3
+STACK_DEPTH = 4
+
+_collector = ContextVar('store_query_collector', default=None)
+# cProfile chỉ chạy được một profiler mỗi lúc
+_profile_lock = threading.Lock()
+
+
+class QueryCollector:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # (sql, params) -> [số lần, {nơi gọi: số lần}]
+        self.seen = defaultdict(lambda: [0, defaultdict(int)])
+
+    def record(self, sql, params, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.seen[(sql, repr(params))]
+        entry[0] += 1
+        entry[1][_call_site()] += 1
+
+    def duplicates(self):
+        found = sorted(
+            ((sql, count, sites) for (sql, _), (count, sites) in self.seen.items() if count > 1),
+            key=lambda item: -item[1],
+        )
+        return [
+            {
+                'sql': sql,
+                'count': count,
+                'call_sites': [
+                    site for site, _ in sorted(sites.items(), key=lambda s: -s[1])[:MAX_CALL_SITES]
+                ],
+            }
+            for sql, count, sites in found[:MAX_DUPLICATES]
+        ]
+
+
+def _project_frame(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and filename != __file__
+    )
+
+
+def _call_site():
+    """Vài frame gần nhất thuộc mã nguồn dự án (bỏ qua Django và thư viện)."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < STACK_DEPTH:
+        code = frame.f_code
+        if _project_frame(code.co_filename):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            frames.append(f'{path}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return ' < '.join(frames) or '?'
+
+
+def _record_query(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.record(sql, params, time.perf_counter() - started)
+
+
+def _install_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STORE_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'STORE_PROFILING_SLOW_MS', SLOW_MS)
+        self.profile_dir = getattr(settings, 'STORE_PROFILING_DIR', None)
+        self.sample_rate = getattr(settings, 'STORE_PROFILING_SAMPLE_RATE', 0.0)
+        if self.profile_dir:
+            Path(self.profile_dir).mkdir(parents=True, exist_ok=True)
+        connection_created.connect(_install_wrapper, dispatch_uid='store-query-profiling')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+        collector = QueryCollector()
+        token = _collector.set(collector)
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        try:
+            with track_request_stats() as cache_counts:
+                response = self.get_response(request)
+        finally:
+            self._stop_profiler(profiler)
+            _collector.reset(token)
+        return self._finish(request, response, collector, cache_counts, started, profiler)
+
+    async def __acall__(self, request):
+        collector = QueryCollector()
+        token = _collector.set(collector)
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        try:
+            with track_request_stats() as cache_counts:
+                response = await self.get_response(request)
+        finally:
+            self._stop_profiler(profiler)
+            _collector.reset(token)
+        return self._finish(request, response, collector, cache_counts, started, profiler)
+
+    # --- cProfile ---
+
+    def _start_profiler(self):
+        if not self.profile_dir or random.random() >= self.sample_rate:
+            return None
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Đã có profiler khác đang chạy (ví dụ trình debug)
+            _profile_lock.release()
+            return None
+        return profiler
+
+    def _stop_profiler(self, profiler):
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+
+    def _dump_profile(self, request, profiler, elapsed_ms):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{request.method}-{slug[:80]}-{elapsed_ms:.0f}ms.prof'
+        path = Path(self.profile_dir) / name
+        profiler.dump_stats(path)
+        return str(path)
+
+    # --- Báo cáo ---
+
+    def _finish(self, request, response, collector, cache_counts, started, profiler):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        sql_ms = collector.seconds * 1000
+        hits = sum(cache_counts[name] for name in ('hits', 'stale_hits', 'waited_hits'))
+        misses = cache_counts['misses']
+        duplicates = collector.duplicates()
+
+        response.headers['Server-Timing'] = ', '.join(filter(None, [
+            response.headers.get('Server-Timing'),
+            f'db;dur={sql_ms:.1f};desc="{collector.count} queries"',
+            f'cache;desc="hit={hits} miss={misses}"',
+            f'app;dur={elapsed_ms:.1f}',
+        ]))
+
+        slow = elapsed_ms >= self.slow_ms
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(elapsed_ms, 1),
+            'queries': collector.count,
+            'sql_ms': round(sql_ms, 1),
+            'duplicate_queries': duplicates,
+            'cache': dict(cache_counts),
+        }
+        if profiler is not None and slow:
+            record['profile'] = self._dump_profile(request, profiler, elapsed_ms)
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record, ensure_ascii=False))
+        return response
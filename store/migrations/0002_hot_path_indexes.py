@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lovepointhistory',
+            index=models.Index(fields=['user', '-transaction_date'], name='point_hist_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_status', '-created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatushistory',
+            index=models.Index(fields=['new_status', '-updated_at'], name='status_hist_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['email', 'expires_at'], name='otp_unused_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redeemedoffer',
+            index=models.Index(condition=models.Q(('usage_status', 'NOT_USED')), fields=['user', 'voucher'], name='redeemed_not_used_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'display_status', '-created_at'], name='review_product_status_idx'),
+        ),
+    ]
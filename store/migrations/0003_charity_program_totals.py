@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    CharityProgram = apps.get_model('store', 'CharityProgram')
+    DonationHistory = apps.get_model('store', 'DonationHistory')
+    Disbursement = apps.get_model('store', 'Disbursement')
+
+    def total_of(model):
+        subquery = (
+            model.objects.filter(program=OuterRef('pk'))
+            .values('program').annotate(total=Sum('amount')).values('total')
+        )
+        return Coalesce(Subquery(subquery), Value(0), output_field=models.DecimalField())
+
+    CharityProgram.objects.update(
+        raised_amount=total_of(DonationHistory),
+        disbursed_amount=total_of(Disbursement),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='charityprogram',
+            name='disbursed_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Đã giải ngân'),
+        ),
+        migrations.AddField(
+            model_name='charityprogram',
+            name='raised_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Đã quyên góp'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Review = apps.get_model('store', 'Review')
+    visible = (
+        Review.objects.filter(product=OuterRef('pk'), display_status='VISIBLE')
+        .values('product')
+    )
+    Product.objects.update(
+        rating_count=Coalesce(Subquery(visible.annotate(n=Count('pk')).values('n')), Value(0)),
+        rating_sum=Coalesce(Subquery(visible.annotate(s=Sum('rating')).values('s')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_charity_program_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Số đánh giá'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tổng điểm sao'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
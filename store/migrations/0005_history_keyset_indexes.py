@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lovepointhistory',
+            index=models.Index(fields=['-transaction_date', '-id'], name='point_hist_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatushistory',
+            index=models.Index(fields=['-updated_at', '-id'], name='status_hist_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:57
+
+import unicodedata
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+BACKFILL_BATCH_SIZE = 1000
+
+# SQLite: bảng FTS5 "external content" đồng bộ bằng trigger.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE store_searchentry_fts USING fts5("
+    "document, content='store_searchentry', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER store_searchentry_fts_ai AFTER INSERT ON store_searchentry BEGIN "
+    "INSERT INTO store_searchentry_fts(rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER store_searchentry_fts_ad AFTER DELETE ON store_searchentry BEGIN "
+    "INSERT INTO store_searchentry_fts(store_searchentry_fts, rowid, document) "
+    "VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER store_searchentry_fts_au AFTER UPDATE ON store_searchentry BEGIN "
+    "INSERT INTO store_searchentry_fts(store_searchentry_fts, rowid, document) "
+    "VALUES ('delete', old.id, old.document); "
+    "INSERT INTO store_searchentry_fts(rowid, document) VALUES (new.id, new.document); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS store_searchentry_fts_au",
+    "DROP TRIGGER IF EXISTS store_searchentry_fts_ad",
+    "DROP TRIGGER IF EXISTS store_searchentry_fts_ai",
+    "DROP TABLE IF EXISTS store_searchentry_fts",
+]
+
+# PostgreSQL: GIN trên biểu thức tsvector, truy vấn phải dùng đúng biểu thức này.
+POSTGRES_FORWARD = [
+    "CREATE INDEX store_searchentry_fts_idx ON store_searchentry "
+    "USING GIN (to_tsvector('simple', document))",
+]
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS store_searchentry_fts_idx"]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except OperationalError:
+            # SQLite không có FTS5: store/search.py quay về tìm kiếm LIKE
+            _run(schema_editor, SQLITE_REVERSE)
+
+
+def _fold(text):
+    # Như store.search.fold_text, chép lại để migration không phụ thuộc mã hiện tại
+    text = (text or '').replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def backfill_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('store', 'SearchEntry')
+    sources = (
+        ('Product', 'PRODUCT', lambda obj: {
+            'title': obj.name,
+            'document': _fold(f'{obj.name} {obj.description}'),
+            'is_public': obj.status == 'FOR_SALE',
+        }),
+        ('ContentPost', 'POST', lambda obj: {
+            'title': obj.title,
+            'document': _fold(f'{obj.title} {obj.content}'),
+            'is_public': True,
+        }),
+        ('Review', 'REVIEW', lambda obj: {
+            'title': obj.comment[:255],
+            'document': _fold(obj.comment),
+            'is_public': obj.display_status == 'VISIBLE',
+        }),
+    )
+    for model_name, kind, build in sources:
+        model = apps.get_model('store', model_name)
+        batch = []
+        for obj in model.objects.order_by('pk').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+            batch.append(SearchEntry(kind=kind, object_id=obj.pk, **build(obj)))
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_history_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PRODUCT', 'Sản phẩm'), ('POST', 'Bài viết'), ('REVIEW', 'Đánh giá')], max_length=20, verbose_name='Loại')),
+                ('object_id', models.BigIntegerField(verbose_name='ID đối tượng')),
+                ('title', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('document', models.TextField(verbose_name='Nội dung tìm kiếm')),
+                ('is_public', models.BooleanField(default=True, verbose_name='Công khai')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        # Sau khi có bảng FTS: trigger đưa các dòng backfill vào chỉ mục
+        migrations.RunPython(backfill_entries, migrations.RunPython.noop),
+    ]
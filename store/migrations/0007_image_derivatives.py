@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_search_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Ảnh gốc')),
+                ('preset', models.CharField(max_length=20, verbose_name='Preset')),
+                ('path', models.CharField(max_length=255, verbose_name='Đường dẫn')),
+                ('width', models.PositiveIntegerField(verbose_name='Chiều rộng')),
+                ('height', models.PositiveIntegerField(verbose_name='Chiều cao')),
+                ('created_at', models.DateTimeField(auto_now=True, verbose_name='Ngày tạo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'preset'), name='image_derivative_uniq')],
+            },
+        ),
+    ]
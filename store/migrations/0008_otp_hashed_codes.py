@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:06
+
+from django.db import migrations, models
+
+
+def retire_plaintext_codes(apps, schema_editor):
+    # Mã cũ lưu dạng thô, không còn xác thực được sau khi chuyển sang HMAC
+    OTPVerification = apps.get_model('store', 'OTPVerification')
+    OTPVerification.objects.filter(is_used=False).update(is_used=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otpverification',
+            name='otp_code',
+            field=models.CharField(max_length=64, verbose_name='Mã OTP (đã băm)'),
+        ),
+        migrations.RunPython(retire_plaintext_codes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(condition=models.Q(('is_used', True)), fields=['id'], name='otp_used_idx'),
+        ),
+    ]
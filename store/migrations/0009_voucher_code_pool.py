@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_otp_hashed_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoucherCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Mã')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Thời điểm cấp')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='redeemedoffer',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Hết hạn lúc'),
+        ),
+        migrations.AddField(
+            model_name='voucher',
+            name='valid_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Để trống nếu mã đã đổi không hết hạn', null=True, verbose_name='Số ngày hiệu lực'),
+        ),
+        migrations.AddIndex(
+            model_name='redeemedoffer',
+            index=models.Index(condition=models.Q(('usage_status', 'NOT_USED')), fields=['expires_at'], name='redeemed_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='vouchercode',
+            name='voucher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='codes', to='store.voucher', verbose_name='Ưu đãi'),
+        ),
+        migrations.AddIndex(
+            model_name='vouchercode',
+            index=models.Index(condition=models.Q(('claimed_at__isnull', True)), fields=['voucher', 'id'], name='voucher_code_free_idx'),
+        ),
+    ]
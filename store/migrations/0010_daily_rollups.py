@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_existing_days(apps, schema_editor):
+    # Lần chạy rollup_sales đầu tiên sẽ tổng hợp toàn bộ dữ liệu cũ
+    Order = apps.get_model('store', 'Order')
+    RollupDirtyDay = apps.get_model('store', 'RollupDirtyDay')
+    RollupDirtyDay.objects.bulk_create(
+        [RollupDirtyDay(day=day) for day in Order.objects.dates('created_at', 'day')],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_voucher_code_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Ngày')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Số đơn')),
+                ('cancelled_count', models.PositiveIntegerField(default=0, verbose_name='Số đơn hủy')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Tổng tiền các đơn không bị hủy', max_digits=15, verbose_name='Doanh thu')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Ngày')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyDonation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('donation_type', models.CharField(choices=[('FROM_PRODUCT', 'Từ % Sản phẩm'), ('FROM_VOUCHER', 'Từ Ưu đãi 10%')], max_length=50, verbose_name='Loại quyên góp')),
+                ('donation_count', models.PositiveIntegerField(default=0, verbose_name='Số lượt')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Số tiền')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_donations', to='store.charityprogram', verbose_name='Chương trình')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['program', 'day'], name='daily_donation_program_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'program', 'donation_type'), name='daily_donation_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('units_sold', models.PositiveIntegerField(default=0, verbose_name='Số lượng bán')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Số đơn')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Doanh thu')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='store.product', verbose_name='Sản phẩm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'day'], name='daily_product_sales_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='daily_product_sales_uniq')],
+            },
+        ),
+        migrations.RunPython(mark_existing_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=100, verbose_name='Tác vụ')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Tham số')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Số lớn chạy trước', verbose_name='Độ ưu tiên')),
+                ('status', models.CharField(choices=[('QUEUED', 'Chờ chạy'), ('RUNNING', 'Đang chạy'), ('DONE', 'Hoàn thành'), ('FAILED', 'Thất bại')], default='QUEUED', max_length=20, verbose_name='Trạng thái')),
+                ('dedup_key', models.CharField(blank=True, help_text='Mỗi khóa chỉ có một job đang chờ', max_length=255, null=True, verbose_name='Khóa chống trùng')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Chạy lúc')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Số lần chạy')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Số lần chạy tối đa')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Nhận lúc')),
+                ('last_error', models.TextField(blank=True, verbose_name='Lỗi gần nhất')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Kết thúc lúc')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'QUEUED')), fields=['-priority', 'run_at', 'id'], name='job_ready_idx'), models.Index(condition=models.Q(('status', 'RUNNING')), fields=['locked_at'], name='job_running_idx'), models.Index(fields=['status', 'finished_at'], name='job_finished_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'QUEUED')), fields=('dedup_key',), name='job_dedup_queued_uniq')],
+            },
+        ),
+    ]
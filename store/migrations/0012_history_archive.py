@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOTPVerification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('expires_at', models.DateTimeField(verbose_name='Thời gian hết hạn')),
+                ('is_used', models.BooleanField(verbose_name='Đã sử dụng')),
+                ('month', models.DateField(verbose_name='Tháng')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Lưu trữ lúc')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'id'], name='otp_arch_month_idx'), models.Index(fields=['email', '-expires_at'], name='otp_arch_email_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedLovePointHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('EARNED', 'Cộng điểm'), ('SPENT', 'Trừ điểm')], max_length=50, verbose_name='Loại giao dịch')),
+                ('points_changed', models.IntegerField(verbose_name='Số điểm thay đổi')),
+                ('reason', models.CharField(max_length=255, verbose_name='Lý do')),
+                ('transaction_date', models.DateTimeField(verbose_name='Ngày giao dịch')),
+                ('month', models.DateField(verbose_name='Tháng')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Lưu trữ lúc')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_point_history', to=settings.AUTH_USER_MODEL, verbose_name='Người dùng')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'id'], name='point_arch_month_idx'), models.Index(fields=['user', '-id'], name='point_arch_user_idx'), models.Index(fields=['-transaction_date', '-id'], name='point_arch_keyset_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderStatusHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('new_status', models.CharField(choices=[('NEW', 'Mới'), ('PENDING', 'Chờ xác nhận'), ('SHIPPING', 'Đang giao'), ('DELIVERED', 'Đã giao'), ('CANCELLED', 'Đã hủy')], max_length=50, verbose_name='Trạng thái mới')),
+                ('updated_at', models.DateTimeField(verbose_name='Thời gian cập nhật')),
+                ('month', models.DateField(verbose_name='Tháng')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Lưu trữ lúc')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_status_history', to='store.order', verbose_name='Đơn hàng')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người cập nhật')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'id'], name='status_arch_month_idx'), models.Index(fields=['-updated_at', '-id'], name='status_arch_keyset_idx')],
+            },
+        ),
+    ]
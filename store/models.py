@@ -5,6 +5,7 @@ from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin
 )
 from django.conf import settings
+from django.utils import timezone
 
 # --- Choices ---
 
@@ -63,6 +64,17 @@ class PostType(models.TextChoices):
     NEWS = 'NEWS', 'Tin tức'
     REPORT = 'REPORT', 'Báo cáo Minh bạch'
 
+class SearchKind(models.TextChoices):
+    PRODUCT = 'PRODUCT', 'Sản phẩm'
+    POST = 'POST', 'Bài viết'
+    REVIEW = 'REVIEW', 'Đánh giá'
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'QUEUED', 'Chờ chạy'
+    RUNNING = 'RUNNING', 'Đang chạy'
+    DONE = 'DONE', 'Hoàn thành'
+    FAILED = 'FAILED', 'Thất bại'
+
 # --- I. User Management ---
 
 class CustomUserManager(BaseUserManager):
@@ -146,10 +158,24 @@ class ShippingAddress(models.Model):
 
 class OTPVerification(models.Model):
     email = models.EmailField(verbose_name="Email")
-    otp_code = models.CharField(max_length=6, verbose_name="Mã OTP")
+    # HMAC-SHA256 của mã, xem store/otp.py
+    otp_code = models.CharField(max_length=64, verbose_name="Mã OTP (đã băm)")
     expires_at = models.DateTimeField(verbose_name="Thời gian hết hạn")
     is_used = models.BooleanField(default=False, verbose_name="Đã sử dụng")
 
+    class Meta:
+        indexes = [
+            # Chỉ index các mã chưa dùng: tra cứu xác thực không quét mã cũ
+            models.Index(
+                fields=['email', 'expires_at'],
+                condition=models.Q(is_used=False),
+                name='otp_unused_email_idx',
+            ),
+            # Cho job dọn dẹp (store.otp.purge_codes)
+            models.Index(fields=['expires_at'], name='otp_expires_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_used=True), name='otp_used_idx'),
+        ]
+
     def __str__(self):
         return f"OTP cho {self.email}"
 
@@ -172,10 +198,19 @@ class Product(models.Model):
         default=ProductStatus.FOR_SALE,
         verbose_name="Trạng thái"
     )
+    # Tổng hợp đánh giá đang hiển thị, cập nhật qua signals của Review
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Số đánh giá")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tổng điểm sao")
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating_avg(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
 class Review(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -200,6 +235,14 @@ class Review(models.Model):
         verbose_name="Trạng thái hiển thị"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'display_status', '-created_at'], name='review_product_status_idx'),
+        ]
+
+    # Các quan hệ mà __str__ truy cập, admin dùng để tính select_related
+    str_related_fields = ('product', 'user')
+
     def __str__(self):
         return f"Đánh giá cho {self.product.name} bởi {self.user.email}"
 
@@ -242,6 +285,12 @@ class Order(models.Model):
     )
     donate_voucher = models.BooleanField(default=False, verbose_name="Quyên góp ưu đãi")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+            models.Index(fields=['order_status', '-created_at'], name='order_status_created_idx'),
+        ]
+
     def __str__(self):
         return self.order_code
 
@@ -268,6 +317,8 @@ class OrderDetail(models.Model):
     class Meta:
         unique_together = ('order', 'product') # Đảm bảo mỗi sản phẩm chỉ xuất hiện 1 lần trong đơn
 
+    str_related_fields = ('product', 'order')
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} (Đơn: {self.order.order_code})"
 
@@ -292,6 +343,15 @@ class OrderStatusHistory(models.Model):
     )
     updated_at = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian cập nhật")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['new_status', '-updated_at'], name='status_hist_status_idx'),
+            # Phân trang keyset trong admin theo (updated_at, id)
+            models.Index(fields=['-updated_at', '-id'], name='status_hist_keyset_idx'),
+        ]
+
+    str_related_fields = ('order',)
+
     def __str__(self):
         return f"{self.order.order_code} -> {self.new_status}"
 
@@ -312,6 +372,8 @@ class ShoppingCart(models.Model):
     class Meta:
         unique_together = ('user', 'product')
 
+    str_related_fields = ('user', 'product')
+
     def __str__(self):
         return f"Giỏ hàng của {self.user.email} - {self.product.name}"
 
@@ -328,10 +390,23 @@ class CharityProgram(models.Model):
         default=CharityProgramStatus.ACTIVE,
         verbose_name="Trạng thái"
     )
+    # Tổng tích lũy, cập nhật tăng dần qua signals (xem store/signals.py)
+    raised_amount = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0, editable=False, verbose_name="Đã quyên góp"
+    )
+    disbursed_amount = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0, editable=False, verbose_name="Đã giải ngân"
+    )
 
     def __str__(self):
         return self.name
 
+    @property
+    def progress_percent(self):
+        if not self.target_amount:
+            return 0
+        return round(self.raised_amount * 100 / self.target_amount, 2)
+
 class DonationHistory(models.Model):
     order = models.ForeignKey(
         Order, 
@@ -353,6 +428,8 @@ class DonationHistory(models.Model):
         verbose_name="Loại quyên góp"
     )
 
+    str_related_fields = ('program',)
+
     def __str__(self):
         return f"Quyên góp {self.amount} cho {self.program.name}"
 
@@ -369,6 +446,8 @@ class Disbursement(models.Model):
     notes = models.TextField(verbose_name="Ghi chú")
     proof_link = models.FileField(upload_to='disbursements_proof/', blank=True, null=True, verbose_name="Link chứng từ")
 
+    str_related_fields = ('program',)
+
     def __str__(self):
         return f"Giải ngân {self.amount} cho {self.program.name}"
 
@@ -384,6 +463,8 @@ class LovePointBalance(models.Model):
     )
     current_balance = models.PositiveIntegerField(default=0, verbose_name="Tổng điểm hiện tại")
 
+    str_related_fields = ('user',)
+
     def __str__(self):
         return f"Điểm của {self.user.email}: {self.current_balance}"
 
@@ -403,6 +484,14 @@ class LovePointHistory(models.Model):
     reason = models.CharField(max_length=255, verbose_name="Lý do")
     transaction_date = models.DateTimeField(auto_now_add=True, verbose_name="Ngày giao dịch")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-transaction_date'], name='point_hist_user_date_idx'),
+            models.Index(fields=['-transaction_date', '-id'], name='point_hist_keyset_idx'),
+        ]
+
+    str_related_fields = ('user',)
+
     def __str__(self):
         return f"{self.user.email}: {self.transaction_type} {self.points_changed} điểm"
 
@@ -416,10 +505,42 @@ class Voucher(models.Model):
         verbose_name="Loại ưu đãi"
     )
     conditions = models.TextField(verbose_name="Điều kiện sử dụng")
+    valid_days = models.PositiveIntegerField(
+        null=True, blank=True,
+        verbose_name="Số ngày hiệu lực",
+        help_text="Để trống nếu mã đã đổi không hết hạn"
+    )
 
     def __str__(self):
         return self.name
 
+class VoucherCode(models.Model):
+    """
+    Kho mã cấp sẵn cho một ưu đãi (store/redemption.py). Khi đổi điểm, một mã
+    chưa dùng được nhận (claim) thay vì sinh mã mới rồi thử lại khi trùng.
+    """
+    voucher = models.ForeignKey(
+        Voucher,
+        on_delete=models.CASCADE,
+        related_name='codes',
+        verbose_name="Ưu đãi"
+    )
+    code = models.CharField(max_length=50, unique=True, verbose_name="Mã")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Thời điểm cấp")
+
+    class Meta:
+        indexes = [
+            # Tìm nhanh mã còn trống của một ưu đãi
+            models.Index(
+                fields=['voucher', 'id'],
+                condition=models.Q(claimed_at__isnull=True),
+                name='voucher_code_free_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.code
+
 class RedeemedOffer(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -441,6 +562,24 @@ class RedeemedOffer(models.Model):
         default=RedeemedStatus.NOT_USED,
         verbose_name="Trạng thái sử dụng"
     )
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Hết hạn lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'voucher'],
+                condition=models.Q(usage_status=RedeemedStatus.NOT_USED),
+                name='redeemed_not_used_idx',
+            ),
+            # Cho job đánh dấu hết hạn (store.redemption.expire_offers)
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(usage_status=RedeemedStatus.NOT_USED),
+                name='redeemed_expiry_idx',
+            ),
+        ]
+
+    str_related_fields = ('user',)
 
     def __str__(self):
         return f"{self.redeemed_code} ({self.user.email})"
@@ -467,4 +606,267 @@ class ContentPost(models.Model):
     )
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+# --- VII. Search ---
+
+class SearchEntry(models.Model):
+    """
+    Tài liệu tìm kiếm dựng sẵn cho mỗi Product/ContentPost/Review, văn bản đã bỏ
+    dấu tiếng Việt. Index full-text tạo theo backend (xem store/search.py).
+    """
+    kind = models.CharField(max_length=20, choices=SearchKind.choices, verbose_name="Loại")
+    object_id = models.BigIntegerField(verbose_name="ID đối tượng")
+    title = models.CharField(max_length=255, verbose_name="Tiêu đề")
+    document = models.TextField(verbose_name="Nội dung tìm kiếm")
+    is_public = models.BooleanField(default=True, verbose_name="Công khai")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_entry_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+# --- VIII. Media ---
+
+class ImageDerivative(models.Model):
+    """
+    Bản dựng sẵn (thumbnail, WebP) và kích thước của một ảnh gốc, khóa theo
+    đường dẫn file gốc trong storage. Preset 'original' lưu kích thước ảnh gốc.
+    """
+    source = models.CharField(max_length=255, verbose_name="Ảnh gốc")
+    preset = models.CharField(max_length=20, verbose_name="Preset")
+    path = models.CharField(max_length=255, verbose_name="Đường dẫn")
+    width = models.PositiveIntegerField(verbose_name="Chiều rộng")
+    height = models.PositiveIntegerField(verbose_name="Chiều cao")
+    created_at = models.DateTimeField(auto_now=True, verbose_name="Ngày tạo")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'preset'], name='image_derivative_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} [{self.preset}]"
+
+# --- IX. Reports ---
+# Bảng tổng hợp theo ngày, do lệnh `rollup_sales` tính lại (store/rollups.py)
+
+class DailySales(models.Model):
+    day = models.DateField(unique=True, verbose_name="Ngày")
+    order_count = models.PositiveIntegerField(default=0, verbose_name="Số đơn")
+    cancelled_count = models.PositiveIntegerField(default=0, verbose_name="Số đơn hủy")
+    revenue = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0,
+        verbose_name="Doanh thu",
+        help_text="Tổng tiền các đơn không bị hủy"
+    )
+
+    def __str__(self):
+        return f"{self.day}: {self.revenue}"
+
+class DailyProductSales(models.Model):
+    day = models.DateField(verbose_name="Ngày")
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='daily_sales',
+        verbose_name="Sản phẩm"
+    )
+    units_sold = models.PositiveIntegerField(default=0, verbose_name="Số lượng bán")
+    order_count = models.PositiveIntegerField(default=0, verbose_name="Số đơn")
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Doanh thu")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='daily_product_sales_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='daily_product_sales_idx'),
+        ]
+
+    str_related_fields = ('product',)
+
+    def __str__(self):
+        return f"{self.day}: {self.product}"
+
+class DailyDonation(models.Model):
+    day = models.DateField(verbose_name="Ngày")
+    program = models.ForeignKey(
+        CharityProgram,
+        on_delete=models.CASCADE,
+        related_name='daily_donations',
+        verbose_name="Chương trình"
+    )
+    donation_type = models.CharField(
+        max_length=50,
+        choices=DonationType.choices,
+        verbose_name="Loại quyên góp"
+    )
+    donation_count = models.PositiveIntegerField(default=0, verbose_name="Số lượt")
+    amount = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Số tiền")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'program', 'donation_type'], name='daily_donation_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['program', 'day'], name='daily_donation_program_idx'),
+        ]
+
+    str_related_fields = ('program',)
+
+    def __str__(self):
+        return f"{self.day}: {self.program} ({self.donation_type})"
+
+class RollupDirtyDay(models.Model):
+    """Ngày có đơn hàng/quyên góp thay đổi, chờ được tổng hợp lại."""
+    day = models.DateField(unique=True, verbose_name="Ngày")
+
+    def __str__(self):
+        return str(self.day)
+
+# --- X. Jobs ---
+# Hàng đợi công việc nền trong CSDL, do lệnh `run_workers` xử lý (store/jobs.py)
+
+class Job(models.Model):
+    task = models.CharField(max_length=100, verbose_name="Tác vụ")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Tham số")
+    priority = models.SmallIntegerField(default=0, verbose_name="Độ ưu tiên", help_text="Số lớn chạy trước")
+    status = models.CharField(
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.QUEUED,
+        verbose_name="Trạng thái"
+    )
+    dedup_key = models.CharField(
+        max_length=255, null=True, blank=True,
+        verbose_name="Khóa chống trùng",
+        help_text="Mỗi khóa chỉ có một job đang chờ"
+    )
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Chạy lúc")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Số lần chạy")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Số lần chạy tối đa")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Nhận lúc")
+    last_error = models.TextField(blank=True, verbose_name="Lỗi gần nhất")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Kết thúc lúc")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='QUEUED'),
+                name='job_dedup_queued_uniq',
+            ),
+        ]
+        indexes = [
+            # Thứ tự nhận job của worker, chỉ trên các job đang chờ
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=models.Q(status='QUEUED'),
+                name='job_ready_idx',
+            ),
+            models.Index(
+                fields=['locked_at'],
+                condition=models.Q(status='RUNNING'),
+                name='job_running_idx',
+            ),
+            models.Index(fields=['status', 'finished_at'], name='job_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+# --- XI. Archive ---
+# Dòng lịch sử cũ được chuyển khỏi bảng chính theo lô (store/archive.py). Giữ
+# nguyên id gốc; `month` (ngày đầu tháng) là khóa phân vùng theo tháng để
+# xuất/dọn cả tháng bằng một điều kiện có index.
+
+class ArchivedOrderStatusHistory(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='archived_status_history',
+        verbose_name="Đơn hàng"
+    )
+    new_status = models.CharField(
+        max_length=50,
+        choices=OrderStatus.choices,
+        verbose_name="Trạng thái mới"
+    )
+    updated_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Người cập nhật"
+    )
+    updated_at = models.DateTimeField(verbose_name="Thời gian cập nhật")
+    month = models.DateField(verbose_name="Tháng")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Lưu trữ lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'id'], name='status_arch_month_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='status_arch_keyset_idx'),
+        ]
+
+    str_related_fields = ('order',)
+
+    def __str__(self):
+        return f"{self.order.order_code} -> {self.new_status}"
+
+class ArchivedLovePointHistory(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_point_history',
+        verbose_name="Người dùng"
+    )
+    transaction_type = models.CharField(
+        max_length=50,
+        choices=PointTransactionType.choices,
+        verbose_name="Loại giao dịch"
+    )
+    points_changed = models.IntegerField(verbose_name="Số điểm thay đổi")
+    reason = models.CharField(max_length=255, verbose_name="Lý do")
+    transaction_date = models.DateTimeField(verbose_name="Ngày giao dịch")
+    month = models.DateField(verbose_name="Tháng")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Lưu trữ lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'id'], name='point_arch_month_idx'),
+            models.Index(fields=['user', '-id'], name='point_arch_user_idx'),
+            models.Index(fields=['-transaction_date', '-id'], name='point_arch_keyset_idx'),
+        ]
+
+    str_related_fields = ('user',)
+
+    def __str__(self):
+        return f"{self.user.email}: {self.transaction_type} {self.points_changed} điểm"
+
+class ArchivedOTPVerification(models.Model):
+    # Không lưu mã đã băm: mã hết hạn không còn giá trị, chỉ giữ dấu vết gửi mã
+    id = models.BigIntegerField(primary_key=True)
+    email = models.EmailField(verbose_name="Email")
+    expires_at = models.DateTimeField(verbose_name="Thời gian hết hạn")
+    is_used = models.BooleanField(verbose_name="Đã sử dụng")
+    month = models.DateField(verbose_name="Tháng")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Lưu trữ lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'id'], name='otp_arch_month_idx'),
+            models.Index(fields=['email', '-expires_at'], name='otp_arch_email_idx'),
+        ]
+
+    def __str__(self):
+        return f"OTP cho {self.email}"
@@ -0,0 +1,107 @@
+# otp.py
+"""
+Dịch vụ mã OTP qua email.
+
+- Chỉ lưu HMAC-SHA256 của mã (khóa theo SECRET_KEY và email), không lưu mã gốc.
+- Xác thực bằng một lệnh UPDATE có điều kiện trên index một phần
+  otp_unused_email_idx: đúng mã, chưa dùng, chưa hết hạn. Hai request
+  đồng thời không thể cùng dùng một mã.
+- Giới hạn số lần cấp và số lần thử mã theo email bằng cửa sổ trượt trong cache.
+- purge_codes() xóa mã hết hạn/đã dùng theo từng lô giới hạn.
+"""
+import secrets
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .cache import hit_rate_limit
+from .jobs import enqueue
+from .models import OTPVerification
+
+OTP_LENGTH = 6
+OTP_TTL = timedelta(minutes=5)
+# (số lượt, trong bao nhiêu giây)
+ISSUE_LIMIT = (5, 60 * 60)
+VERIFY_LIMIT = (10, 15 * 60)
+PURGE_BATCH_SIZE = 1000
+
+
+class OTPRateLimited(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Thao tác quá nhiều lần, thử lại sau {retry_after} giây.")
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def hash_code(email, code):
+    return salted_hmac('store.otp', f'{email}:{code}', algorithm='sha256').hexdigest()
+
+
+def issue_code(email, ttl=OTP_TTL):
+    """
+    Tạo mã mới cho `email` và vô hiệu hóa các mã chưa dùng trước đó. Trả về
+    mã gốc để gửi cho người dùng; ném OTPRateLimited nếu cấp quá nhiều.
+    """
+    email = normalize_email(email)
+    allowed, retry_after = hit_rate_limit('otp-issue', email, *ISSUE_LIMIT)
+    if not allowed:
+        raise OTPRateLimited(retry_after)
+    code = ''.join(secrets.choice('0123456789') for _ in range(OTP_LENGTH))
+    with transaction.atomic():
+        OTPVerification.objects.filter(email=email, is_used=False).update(is_used=True)
+        OTPVerification.objects.create(
+            email=email, otp_code=hash_code(email, code), expires_at=timezone.now() + ttl,
+        )
+    return code
+
+
+def send_code(email, ttl=OTP_TTL):
+    """Cấp mã mới và xếp job gửi email; request không phải chờ máy chủ mail."""
+    email = normalize_email(email)
+    code = issue_code(email, ttl)
+    enqueue('store.send_otp_email', {
+        'email': email, 'code': code, 'ttl_minutes': int(ttl.total_seconds() // 60),
+    })
+
+
+def verify_code(email, code):
+    """Đánh dấu mã đã dùng nếu hợp lệ. Trả về True khi xác thực thành công."""
+    email = normalize_email(email)
+    allowed, retry_after = hit_rate_limit('otp-verify', email, *VERIFY_LIMIT)
+    if not allowed:
+        raise OTPRateLimited(retry_after)
+    return OTPVerification.objects.filter(
+        email=email,
+        otp_code=hash_code(email, (code or '').strip()),
+        is_used=False,
+        expires_at__gt=timezone.now(),
+    ).update(is_used=True) == 1
+
+
+def purge_codes(batch_size=PURGE_BATCH_SIZE, max_batches=None, pause=0.0):
+    """
+    Xóa mã đã hết hạn hoặc đã dùng, mỗi lô tối đa `batch_size` dòng để không
+    giữ khóa lâu. Trả về số dòng đã xóa.
+    """
+    deleted = 0
+    batches = 0
+    now = timezone.now()
+    for condition in ({'expires_at__lt': now}, {'is_used': True}):
+        while max_batches is None or batches < max_batches:
+            ids = list(
+                OTPVerification.objects.filter(**condition)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted += OTPVerification.objects.filter(pk__in=ids).delete()[0]
+            batches += 1
+            if pause:
+                time.sleep(pause)
+    return deleted
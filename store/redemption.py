@@ -0,0 +1,108 @@
+# redemption.py
+"""
+Đổi điểm Yêu Thương lấy ưu đãi.
+
+Mã ưu đãi được sinh sẵn thành kho (VoucherCode). Khi đổi, một mã còn trống
+được nhận bằng SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8) nên
+các request đồng thời không chờ nhau; trên SQLite (không có khóa dòng) mã
+được nhận bằng UPDATE có điều kiện `claimed_at IS NULL`. Việc nhận mã, trừ
+điểm (store.ledger.spend_points) và tạo RedeemedOffer nằm trong một
+transaction: thiếu điểm thì mã được trả lại kho.
+"""
+import secrets
+from datetime import timedelta
+
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+
+from .ledger import spend_points
+from .models import RedeemedOffer, RedeemedStatus, VoucherCode
+
+# Bỏ các ký tự dễ nhầm (0/O, 1/I)
+CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 10
+POOL_BATCH_SIZE = 1000
+EXPIRE_BATCH_SIZE = 1000
+MAX_CLAIM_ATTEMPTS = 5
+
+
+class VoucherUnavailable(ValueError):
+    pass
+
+
+def _new_code(voucher_id):
+    return f'V{voucher_id}-' + ''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+def generate_codes(voucher, count, batch_size=POOL_BATCH_SIZE):
+    """Thêm `count` mã vào kho của `voucher` theo lô. Trả về số mã đã tạo."""
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        try:
+            with transaction.atomic():
+                VoucherCode.objects.bulk_create([
+                    VoucherCode(voucher_id=voucher.pk, code=_new_code(voucher.pk))
+                    for _ in range(size)
+                ])
+        except IntegrityError:
+            # Trùng mã (rất hiếm): sinh lại cả lô
+            continue
+        created += size
+    return created
+
+
+def free_codes(voucher):
+    return VoucherCode.objects.filter(voucher_id=voucher.pk, claimed_at__isnull=True)
+
+
+def _claim_code(voucher, now):
+    free = free_codes(voucher).order_by('pk')
+    connection = connections[router.db_for_write(VoucherCode)]
+    if connection.features.has_select_for_update_skip_locked:
+        row = free.select_for_update(skip_locked=True).values_list('pk', 'code').first()
+        if row is None:
+            raise VoucherUnavailable('Ưu đãi đã hết mã.')
+        VoucherCode.objects.filter(pk=row[0]).update(claimed_at=now)
+        return row[1]
+
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        row = free.values_list('pk', 'code').first()
+        if row is None:
+            raise VoucherUnavailable('Ưu đãi đã hết mã.')
+        if VoucherCode.objects.filter(pk=row[0], claimed_at__isnull=True).update(claimed_at=now):
+            return row[1]
+    raise VoucherUnavailable('Ưu đãi đang được đổi quá nhiều, vui lòng thử lại.')
+
+
+def redeem(user_id, voucher):
+    """
+    Đổi `voucher` cho người dùng, trả về RedeemedOffer. Ném
+    VoucherUnavailable khi kho hết mã, InsufficientPoints khi không đủ điểm.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        code = _claim_code(voucher, now)
+        if voucher.points_required:
+            spend_points(user_id, voucher.points_required, f'Đổi ưu đãi: {voucher.name}')
+        return RedeemedOffer.objects.create(
+            user_id=user_id,
+            voucher=voucher,
+            redeemed_code=code,
+            expires_at=now + timedelta(days=voucher.valid_days) if voucher.valid_days else None,
+        )
+
+
+def expire_offers(batch_size=EXPIRE_BATCH_SIZE, now=None):
+    """
+    Chuyển các ưu đãi chưa dùng đã quá hạn sang EXPIRED, mỗi lô một UPDATE
+    theo pk. Trả về số dòng đã cập nhật.
+    """
+    now = now or timezone.now()
+    pending = RedeemedOffer.objects.filter(usage_status=RedeemedStatus.NOT_USED, expires_at__lt=now)
+    total = 0
+    while True:
+        ids = list(pending.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += pending.filter(pk__in=ids).update(usage_status=RedeemedStatus.EXPIRED)
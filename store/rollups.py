@@ -0,0 +1,158 @@
+# rollups.py
+"""
+Tổng hợp doanh thu, doanh số sản phẩm và quyên góp theo ngày.
+
+Mỗi thay đổi của Order/OrderDetail/DonationHistory đánh dấu ngày của đơn
+hàng vào RollupDirtyDay (signals.py, hoặc gọi trực tiếp từ các thao tác bulk).
+Lệnh `rollup_sales` (hoặc job nền 'store.rollup_sales', tự xếp hàng khi có
+ngày bị đánh dấu) chỉ tính lại các ngày bị đánh dấu: xóa dòng tổng hợp của
+những ngày đó rồi ghi lại bằng bulk_create. Báo cáo đọc các bảng Daily*.
+
+Ngày được tính theo múi giờ hiện hành (settings.TIME_ZONE). Quyên góp không
+gắn với đơn hàng không có ngày nên không được tổng hợp.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import (
+    DailyDonation, DailyProductSales, DailySales, DonationHistory, Order, OrderDetail,
+    OrderStatus, RollupDirtyDay,
+)
+
+# Số ngày tối đa tính lại trong một transaction
+DAYS_PER_BATCH = 31
+# Gom các thay đổi trong khoảng này vào một lần tổng hợp nền
+ROLLUP_DELAY = timedelta(minutes=1)
+
+
+def mark_days(days):
+    days = {day for day in days if day is not None}
+    if days:
+        RollupDirtyDay.objects.bulk_create(
+            [RollupDirtyDay(day=day) for day in days], ignore_conflicts=True,
+        )
+        enqueue('store.rollup_sales', dedup_key='store.rollup_sales', delay=ROLLUP_DELAY)
+
+
+def mark_datetimes(values):
+    mark_days(timezone.localdate(value) for value in values if value is not None)
+
+
+def mark_orders(order_ids):
+    """Đánh dấu ngày của các đơn hàng (dùng sau các thao tác bulk bỏ qua signal)."""
+    mark_days(Order.objects.filter(pk__in=list(order_ids)).dates('created_at', 'day'))
+
+
+def _bounds(days):
+    start = timezone.make_aware(datetime.combine(min(days), time.min))
+    end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), time.min))
+    return start, end
+
+
+def _aggregate(days):
+    start, end = _bounds(days)
+    day_set = set(days)
+    active = ~Q(order_status=OrderStatus.CANCELLED)
+
+    sales = [
+        DailySales(day=row['day'], order_count=row['order_count'],
+                   cancelled_count=row['cancelled_count'], revenue=row['revenue'] or 0)
+        for row in Order.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at')).values('day')
+        .annotate(
+            order_count=Count('pk', filter=active),
+            cancelled_count=Count('pk', filter=~active),
+            revenue=Sum('total_amount', filter=active),
+        )
+        if row['day'] in day_set
+    ]
+
+    line_total = ExpressionWrapper(
+        F('price_at_purchase') * F('quantity'),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    products = [
+        DailyProductSales(day=row['day'], product_id=row['product_id'], units_sold=row['units_sold'],
+                          order_count=row['order_count'], revenue=row['revenue'])
+        for row in OrderDetail.objects.filter(
+            order__created_at__gte=start, order__created_at__lt=end,
+        ).exclude(order__order_status=OrderStatus.CANCELLED)
+        .annotate(day=TruncDate('order__created_at')).values('day', 'product_id')
+        .annotate(
+            units_sold=Sum('quantity'),
+            order_count=Count('order_id', distinct=True),
+            revenue=Sum(line_total),
+        )
+        if row['day'] in day_set
+    ]
+
+    donations = [
+        DailyDonation(day=row['day'], program_id=row['program_id'], donation_type=row['donation_type'],
+                      donation_count=row['donation_count'], amount=row['amount'])
+        for row in DonationHistory.objects.filter(
+            order__created_at__gte=start, order__created_at__lt=end,
+        )
+        .annotate(day=TruncDate('order__created_at')).values('day', 'program_id', 'donation_type')
+        .annotate(donation_count=Count('pk'), amount=Sum('amount'))
+        if row['day'] in day_set
+    ]
+    return sales, products, donations
+
+
+def rebuild_days(days):
+    """Tính lại các bảng tổng hợp cho `days` trong một transaction."""
+    days = sorted(set(days))
+    if not days:
+        return
+    with transaction.atomic():
+        # Nhận các ngày trước khi đọc dữ liệu: thay đổi xảy ra trong lúc tính
+        # sẽ đánh dấu lại ngày đó cho lần chạy sau
+        RollupDirtyDay.objects.filter(day__in=days).delete()
+        sales, products, donations = _aggregate(days)
+        for model, rows in ((DailySales, sales), (DailyProductSales, products), (DailyDonation, donations)):
+            model.objects.filter(day__in=days).delete()
+            model.objects.bulk_create(rows, batch_size=1000)
+
+
+def run(batch_days=DAYS_PER_BATCH, full=False):
+    """
+    Tính lại các ngày đang chờ (hoặc mọi ngày có đơn hàng nếu `full`).
+    Trả về số ngày đã xử lý.
+    """
+    if full:
+        mark_days(Order.objects.dates('created_at', 'day'))
+    processed = 0
+    while True:
+        days = list(RollupDirtyDay.objects.order_by('day').values_list('day', flat=True)[:batch_days])
+        if not days:
+            return processed
+        rebuild_days(days)
+        processed += len(days)
+
+
+# --- Đọc báo cáo ---
+
+def sales_by_day(start, end):
+    return DailySales.objects.filter(day__range=(start, end)).order_by('day').values(
+        'day', 'order_count', 'cancelled_count', 'revenue',
+    )
+
+
+def top_products(start, end, limit=10):
+    return (
+        DailyProductSales.objects.filter(day__range=(start, end), product__isnull=False)
+        .values('product_id', 'product__name')
+        .annotate(units_sold=Sum('units_sold'), revenue=Sum('revenue'))
+        .order_by('-units_sold', 'product_id')[:limit]
+    )
+
+
+def donations_by_day(program_id, start, end):
+    return DailyDonation.objects.filter(program_id=program_id, day__range=(start, end)).order_by(
+        'day', 'donation_type',
+    ).values('day', 'donation_type', 'donation_count', 'amount')
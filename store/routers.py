@@ -0,0 +1,224 @@
+# routers.py
+"""
+Định tuyến đọc sang bản sao chỉ đọc (read replica) cho app store.
+
+- Chỉ các model trong settings.STORE_REPLICA_MODELS (mặc định REPLICA_MODELS:
+  catalog, nội dung, chương trình và các bảng lịch sử) được đọc từ bản sao
+  (settings.STORE_REPLICA_DATABASES). Mọi thao tác ghi và các model khác luôn
+  dùng CSDL chính 'default'.
+- Bản sao chỉ được dùng trong request (ReplicaRoutingMiddleware) hoặc trong
+  khối use_replica(). Lệnh quản trị, worker và mã tự chạy ngoài request đọc CSDL
+  chính, vì chúng thường đọc rồi ghi dữ liệu suy ra (tổng tiền, rollup).
+- Đọc từ CSDL chính khi: đang trong transaction của 'default'; request có
+  method ghi (POST, ...); view hoặc khối mã được đánh dấu use_primary; hoặc
+  cùng phiên vừa ghi. Sau khi ghi, cookie PIN_COOKIE giữ phiên ở CSDL chính
+  trong STORE_REPLICA_MAX_LAG giây (độ trễ sao chép tối đa chấp nhận được),
+  nên người dùng luôn đọc thấy dữ liệu mình vừa ghi.
+- Cấu hình theo view: decorator @use_primary / @use_replica, hoặc
+  settings.STORE_VIEW_DATABASES = {'<view_name>': 'primary' | 'replica'}.
+
+Không cấu hình bản sao thì router trả về None cho mọi truy vấn, tức là hành vi
+mặc định của Django.
+"""
+import math
+import random
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+ROUTED_APPS = {'store'}
+REPLICA_MODELS = (
+    'store.product',
+    'store.review',
+    'store.contentpost',
+    'store.charityprogram',
+    'store.orderstatushistory',
+    'store.donationhistory',
+    'store.lovepointhistory',
+    'store.archivedorderstatushistory',
+    'store.archivedlovepointhistory',
+)
+MAX_LAG = 5
+PIN_COOKIE = 'store_db_pin'
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+# Trạng thái của request hoặc khối use_replica() hiện tại
+_state = ContextVar('store_db_routing', default=None)
+# Chỉ định tường minh bằng use_primary / use_replica
+_route = ContextVar('store_db_route', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'STORE_REPLICA_DATABASES', ())
+
+
+def max_lag():
+    """Độ trễ sao chép tối đa (giây); 0 nếu không có bản sao."""
+    return getattr(settings, 'STORE_REPLICA_MAX_LAG', MAX_LAG) if replica_aliases() else 0
+
+
+@lru_cache(maxsize=8)
+def _replica_labels(labels):
+    return frozenset(labels)
+
+
+def replica_models():
+    return _replica_labels(tuple(getattr(settings, 'STORE_REPLICA_MODELS', REPLICA_MODELS)))
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        # Đọc từ CSDL chính cho tới hết request/khối
+        self.pinned = pinned
+        self.wrote = False
+        # Một request chỉ đọc từ một bản sao để các truy vấn nhất quán với nhau
+        self.replica = None
+
+    def pick_replica(self, aliases):
+        if self.replica not in aliases:
+            self.replica = random.choice(aliases)
+        return self.replica
+
+
+class _Route(ContextDecorator):
+    """Context manager và decorator (cho cả view/hàm async) chọn CSDL để đọc."""
+
+    def __init__(self, route):
+        self.route = route
+        self._tokens = []
+
+    def __enter__(self):
+        state = _state.get()
+        if self.route == REPLICA and state is None:
+            # Ngoài request: vẫn cần theo dõi thao tác ghi trong khối
+            state = RoutingState()
+        self._tokens.append((_route.set(self.route), _state.set(state)))
+        return self
+
+    def __exit__(self, *exc):
+        route_token, state_token = self._tokens.pop()
+        _state.reset(state_token)
+        _route.reset(route_token)
+        return False
+
+    def __call__(self, func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self._recreate_cm():
+                    return await func(*args, **kwargs)
+            return wrapper
+        return super().__call__(func)
+
+    def _recreate_cm(self):
+        return _Route(self.route)
+
+
+def use_primary(func=None):
+    """`@use_primary` hoặc `with use_primary():` — đọc từ CSDL chính."""
+    route = _Route(PRIMARY)
+    return route(func) if func is not None else route
+
+
+def use_replica(func=None):
+    """`@use_replica` hoặc `with use_replica():` — đọc model trong STORE_REPLICA_MODELS từ bản sao."""
+    route = _Route(REPLICA)
+    return route(func) if func is not None else route
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replica_aliases()
+        if not aliases or model._meta.label_lower not in replica_models():
+            return None
+        state = _state.get()
+        if state is None or state.pinned or state.wrote or _route.get() == PRIMARY:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Đọc trong transaction phải thấy dữ liệu của chính transaction đó
+            return None
+        return state.pick_replica(aliases)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in ROUTED_APPS:
+            state = _state.get()
+            if state is not None:
+                state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Bản sao nhận schema cùng dữ liệu từ CSDL chính (xem `sync_replica`)
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Gắn RoutingState cho từng request và giữ phiên ở CSDL chính sau khi ghi."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        route = getattr(settings, 'STORE_VIEW_DATABASES', {}).get(match.view_name if match else None)
+        if route == PRIMARY:
+            _state.get().pinned = True
+        elif route == REPLICA and request.method in SAFE_METHODS:
+            _state.get().pinned = False
+        return None
+
+    def _state_for(self, request):
+        try:
+            pinned_until = int(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return RoutingState(pinned=request.method not in SAFE_METHODS or pinned_until > time.time())
+
+    def _finish(self, state, response):
+        if state.wrote:
+            lag = math.ceil(max_lag())
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + lag), max_age=lag, httponly=True, samesite='Lax',
+            )
+        return response
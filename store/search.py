@@ -0,0 +1,193 @@
+# search.py
+"""
+Tìm kiếm full-text trên SearchEntry.
+
+- PostgreSQL: to_tsvector('simple', document) có index GIN, xếp hạng ts_rank.
+- SQLite: bảng FTS5 store_searchentry_fts, xếp hạng bm25.
+- Backend khác (hoặc SQLite thiếu FTS5): quay về LIKE trên document.
+
+Văn bản được bỏ dấu tiếng Việt trước khi lưu và trước khi tìm, nên
+"hop qua" khớp với "Hộp quà".
+"""
+import re
+import unicodedata
+
+from django.db import connections, router
+
+from .models import (
+    ContentPost, Product, ProductStatus, Review, ReviewStatus, SearchEntry, SearchKind,
+)
+
+FTS_TABLE = 'store_searchentry_fts'
+MAX_TERMS = 8
+DEFAULT_LIMIT = 20
+# Số kết quả tối đa dùng để lọc changelist trong admin
+MAX_ADMIN_MATCHES = 1000
+REBUILD_BATCH_SIZE = 1000
+
+
+def fold_text(text):
+    """Bỏ dấu tiếng Việt và chuyển về chữ thường: 'Đồ Chơi' -> 'do choi'."""
+    text = (text or '').replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(query):
+    return re.findall(r'\w+', fold_text(query))[:MAX_TERMS]
+
+
+# --- Dựng tài liệu tìm kiếm ---
+
+def _product_entry(product):
+    return {
+        'title': product.name,
+        'document': fold_text(f'{product.name} {product.description}'),
+        'is_public': product.status == ProductStatus.FOR_SALE,
+    }
+
+
+def _post_entry(post):
+    return {
+        'title': post.title,
+        'document': fold_text(f'{post.title} {post.content}'),
+        'is_public': True,
+    }
+
+
+def _review_entry(review):
+    return {
+        'title': review.comment[:255],
+        'document': fold_text(review.comment),
+        'is_public': review.display_status == ReviewStatus.VISIBLE,
+    }
+
+
+INDEXED_MODELS = {
+    Product: (SearchKind.PRODUCT, _product_entry),
+    ContentPost: (SearchKind.POST, _post_entry),
+    Review: (SearchKind.REVIEW, _review_entry),
+}
+KIND_MODELS = {kind: model for model, (kind, _) in INDEXED_MODELS.items()}
+
+
+def index_object(obj):
+    kind, build = INDEXED_MODELS[type(obj)]
+    SearchEntry.objects.update_or_create(kind=kind, object_id=obj.pk, defaults=build(obj))
+
+
+def index_objects(objs):
+    """Upsert tài liệu cho nhiều đối tượng, dùng sau các thao tác bulk bỏ qua signal."""
+    entries = []
+    for obj in objs:
+        kind, build = INDEXED_MODELS[type(obj)]
+        entries.append(SearchEntry(kind=kind, object_id=obj.pk, **build(obj)))
+    return _upsert(entries) if entries else 0
+
+
+def unindex_object(obj):
+    kind, _ = INDEXED_MODELS[type(obj)]
+    SearchEntry.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+def rebuild_index(model, batch_size=REBUILD_BATCH_SIZE):
+    """Dựng lại toàn bộ tài liệu của một model theo lô upsert. Trả về số dòng."""
+    kind, build = INDEXED_MODELS[model]
+    total = 0
+    batch = []
+    for obj in model._default_manager.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(SearchEntry(kind=kind, object_id=obj.pk, **build(obj)))
+        if len(batch) >= batch_size:
+            total += _upsert(batch)
+            batch = []
+    if batch:
+        total += _upsert(batch)
+    # Xóa tài liệu của đối tượng không còn tồn tại
+    SearchEntry.objects.filter(kind=kind).exclude(
+        object_id__in=model._default_manager.values('pk')
+    ).delete()
+    return total
+
+
+def _upsert(entries):
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'document', 'is_public'],
+    )
+    return len(entries)
+
+
+# --- Truy vấn ---
+
+def _has_fts5(connection):
+    if not hasattr(connection, '_store_has_fts5'):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            connection._store_has_fts5 = cursor.fetchone() is not None
+    return connection._store_has_fts5
+
+
+def _filters(kinds, public_only, alias):
+    clauses, params = [], []
+    if kinds:
+        clauses.append(f"{alias}.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    if public_only:
+        clauses.append(f'{alias}.is_public = %s')
+        params.append(True)
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def search(query, kinds=None, public_only=False, limit=DEFAULT_LIMIT):
+    """
+    Tìm theo mọi từ trong `query` (khớp tiền tố), sắp theo độ liên quan.
+    Trả về danh sách dict: kind, object_id, title, rank.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    using = router.db_for_read(SearchEntry)
+    connection = connections[using]
+    extra_sql, extra_params = _filters(kinds, public_only, 'e')
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        sql = (
+            "SELECT e.kind, e.object_id, e.title, "
+            "ts_rank(to_tsvector('simple', e.document), to_tsquery('simple', %s)) AS rank "
+            "FROM store_searchentry e "
+            "WHERE to_tsvector('simple', e.document) @@ to_tsquery('simple', %s)"
+            f"{extra_sql} ORDER BY rank DESC, e.id DESC LIMIT %s"
+        )
+        params = [tsquery, tsquery, *extra_params, limit]
+    elif connection.vendor == 'sqlite' and _has_fts5(connection):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        sql = (
+            f"SELECT e.kind, e.object_id, e.title, -bm25({FTS_TABLE}) AS rank "
+            f"FROM {FTS_TABLE} JOIN store_searchentry e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s{extra_sql} ORDER BY bm25({FTS_TABLE}), e.id DESC LIMIT %s"
+        )
+        params = [match, *extra_params, limit]
+    else:
+        qs = SearchEntry.objects.using(using)
+        for token in tokens:
+            qs = qs.filter(document__contains=token)
+        if kinds:
+            qs = qs.filter(kind__in=kinds)
+        if public_only:
+            qs = qs.filter(is_public=True)
+        rows = qs.order_by('-id').values('kind', 'object_id', 'title')[:limit]
+        return [{**row, 'rank': None} for row in rows]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {'kind': kind, 'object_id': object_id, 'title': title, 'rank': rank}
+            for kind, object_id, title, rank in cursor.fetchall()
+        ]
+
+
+def search_ids(kind, query, limit=MAX_ADMIN_MATCHES):
+    return [row['object_id'] for row in search(query, kinds=[kind], limit=limit)]
@@ -0,0 +1,361 @@
+# seeding.py
+"""
+Sinh dữ liệu giả lập cho đo hiệu năng (lệnh `seed_store`).
+
+Quy mô được tính theo số đơn hàng; các bảng khác theo tỉ lệ cố định (RATIOS)
+nên kết quả đo ở 10k, 1M và 10M đơn so sánh được với nhau. Dữ liệu được ghi
+bằng bulk_create theo lô, khóa chính được gán trước để tham chiếu chéo mà
+không cần đọc lại. Vì bulk_create bỏ qua signal, cuối cùng các cột tổng của
+CharityProgram được tính lại, các ngày có đơn được đánh dấu cho rollup, sản
+phẩm được đưa vào chỉ mục tìm kiếm và phiên bản cache được làm mới.
+
+Cùng `seed` sẽ sinh cùng dữ liệu. Chạy lại sẽ thêm dữ liệu mới nối tiếp.
+Khóa chính được tính từ MAX(pk) lúc bắt đầu và sequence (PostgreSQL) được đặt
+lại ở cuối, nên chỉ chạy trên CSDL đo hiệu năng, không chạy song song với ứng
+dụng đang ghi vào cùng CSDL.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import rollups, search
+from .cache import bump_version
+from .checkout import encode_order_code
+from .fulfillment import points_for_amount
+from .models import (
+    CharityProgram, ContentPost, DonationHistory, DonationType, LovePointBalance,
+    LovePointHistory, Order, OrderDetail, OrderStatus, OrderStatusHistory, PaymentMethod,
+    PointTransactionType, Product, RedeemedOffer, RedeemedStatus, Review, ShippingAddress,
+    User, Voucher, VoucherType,
+)
+from .totals import refresh_program_totals
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# Tỉ lệ so với số đơn hàng (trừ khi ghi chú khác)
+RATIOS = {
+    'users': 0.1,
+    'products': 0.002,
+    'redeemed_offers': 0.02,
+}
+# Các model được gán khóa chính trước khi bulk_create
+EXPLICIT_PK_MODELS = (Product, CharityProgram, User, ShippingAddress, Order)
+MIN_PRODUCTS = 50
+MAX_PRODUCTS = 5000
+PROGRAMS = 20
+VOUCHERS = 20
+# Số địa chỉ mỗi người dùng và số dòng mỗi đơn (trung bình ~1.5 và ~2.5)
+ADDRESSES_PER_USER = (1, 2)
+DETAILS_PER_ORDER = (1, 4)
+# Phân bố trạng thái đơn hàng
+STATUS_WEIGHTS = {
+    OrderStatus.DELIVERED: 70,
+    OrderStatus.NEW: 10,
+    OrderStatus.PENDING: 5,
+    OrderStatus.SHIPPING: 5,
+    OrderStatus.CANCELLED: 10,
+}
+# Đơn hàng trải đều trong bấy nhiêu ngày gần nhất
+DAYS = 365
+ORDER_CHUNK = 5000
+USER_CHUNK = 10000
+
+CENT = Decimal('0.01')
+# Mật khẩu không dùng được: người dùng giả lập không đăng nhập
+UNUSABLE_PASSWORD = '!seed'
+
+FAMILY_NAMES = ('Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng')
+GIVEN_NAMES = ('An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Khánh', 'Linh', 'Minh', 'Nam', 'Thảo', 'Vy')
+PROVINCES = ('Hà Nội', 'TP. Hồ Chí Minh', 'Đà Nẵng', 'Hải Phòng', 'Cần Thơ', 'Huế', 'Nghệ An')
+PRODUCT_WORDS = ('Hộp quà', 'Giỏ quà', 'Set quà', 'Combo')
+PRODUCT_THEMES = ('Trung Thu', 'Tết', 'Sinh nhật', 'Cảm ơn', 'Đồ chơi', 'Sách', 'Trà', 'Bánh')
+
+
+@contextmanager
+def historical_dates():
+    """Tạm tắt auto_now_add để bulk_create ghi được ngày trong quá khứ."""
+    fields = [
+        Order._meta.get_field('created_at'),
+        OrderStatusHistory._meta.get_field('updated_at'),
+        LovePointHistory._meta.get_field('transaction_date'),
+        RedeemedOffer._meta.get_field('redeemed_at'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def counts(orders):
+    """Số dòng dự kiến của các bảng chính cho `orders` đơn hàng."""
+    return {
+        'orders': orders,
+        'users': max(int(orders * RATIOS['users']), 1),
+        'products': min(max(int(orders * RATIOS['products']), MIN_PRODUCTS), MAX_PRODUCTS),
+        'programs': PROGRAMS,
+        'vouchers': VOUCHERS,
+        'redeemed_offers': int(orders * RATIOS['redeemed_offers']),
+    }
+
+
+class Seeder:
+    def __init__(self, orders, seed=0, progress=None):
+        self.plan = counts(orders)
+        self.rng = random.Random(seed)
+        self.progress = progress or (lambda message: None)
+        self.now = timezone.now()
+        self.created = {}
+
+    def _done(self, name, count):
+        self.created[name] = self.created.get(name, 0) + count
+
+    def _person(self):
+        return f'{self.rng.choice(FAMILY_NAMES)} {self.rng.choice(GIVEN_NAMES)}'
+
+    def _phone(self):
+        return '09' + ''.join(self.rng.choice('0123456789') for _ in range(8))
+
+    # --- Danh mục ---
+
+    def seed_catalog(self):
+        first_product = _next_id(Product)
+        self.products = []
+        products = []
+        for pk in range(first_product, first_product + self.plan['products']):
+            price = Decimal(self.rng.randrange(10, 200) * 10000)
+            percentage = Decimal(self.rng.choice((5, 10, 15, 20)))
+            self.products.append((pk, price, percentage))
+            products.append(Product(
+                pk=pk,
+                name=f'{self.rng.choice(PRODUCT_WORDS)} {self.rng.choice(PRODUCT_THEMES)} #{pk}',
+                description='Sản phẩm giả lập cho đo hiệu năng.',
+                price=price,
+                charity_percentage=percentage,
+                image=f'products/seed-{pk % 50}.jpg',
+            ))
+        Product.objects.bulk_create(products, batch_size=1000)
+        search.index_objects(products)
+        self._done('products', len(products))
+
+        first_program = _next_id(CharityProgram)
+        programs = [
+            CharityProgram(
+                pk=pk,
+                name=f'Chương trình thiện nguyện #{pk}',
+                description='Chương trình giả lập cho đo hiệu năng.',
+                image=f'charity_programs/seed-{pk % 10}.jpg',
+                target_amount=Decimal(self.rng.randrange(100, 5000) * 1000000),
+            )
+            for pk in range(first_program, first_program + self.plan['programs'])
+        ]
+        CharityProgram.objects.bulk_create(programs)
+        self.program_ids = [program.pk for program in programs]
+        self._done('programs', len(programs))
+
+        vouchers = [
+            Voucher(
+                name=f'Ưu đãi {value}{"%" if kind == VoucherType.PERCENTAGE else "đ"}',
+                points_required=points,
+                discount_value=Decimal(value),
+                voucher_type=kind,
+                conditions='Áp dụng cho mọi đơn hàng.',
+                valid_days=30,
+            )
+            for kind, value, points in (
+                self.rng.choice((
+                    (VoucherType.PERCENTAGE, 10, 20),
+                    (VoucherType.PERCENTAGE, 20, 50),
+                    (VoucherType.FIXED_AMOUNT, 50000, 30),
+                    (VoucherType.FIXED_AMOUNT, 100000, 60),
+                ))
+                for _ in range(self.plan['vouchers'])
+            )
+        ]
+        self.vouchers = [
+            (voucher.pk, voucher.points_required, voucher.valid_days)
+            for voucher in Voucher.objects.bulk_create(vouchers)
+        ]
+        self._done('vouchers', len(vouchers))
+
+    # --- Người dùng ---
+
+    def seed_users(self):
+        self.first_user = _next_id(User)
+        first_address = _next_id(ShippingAddress)
+        # Chỉ số người dùng -> id địa chỉ mặc định
+        self.default_address = []
+        address_id = first_address
+        total = self.plan['users']
+        for start in range(0, total, USER_CHUNK):
+            users, addresses = [], []
+            for index in range(start, min(start + USER_CHUNK, total)):
+                pk = self.first_user + index
+                name = self._person()
+                users.append(User(
+                    pk=pk, email=f'seed{pk}@seed.local', full_name=name,
+                    phone_number=self._phone(), password=UNUSABLE_PASSWORD,
+                ))
+                self.default_address.append(address_id)
+                for n in range(self.rng.randint(*ADDRESSES_PER_USER)):
+                    addresses.append(ShippingAddress(
+                        pk=address_id, user_id=pk, recipient_name=name, phone_number=self._phone(),
+                        province=self.rng.choice(PROVINCES), district=f'Quận {self.rng.randint(1, 12)}',
+                        ward=f'Phường {self.rng.randint(1, 20)}',
+                        street_address=f'{self.rng.randint(1, 500)} Đường số {self.rng.randint(1, 50)}',
+                        is_default=n == 0,
+                    ))
+                    address_id += 1
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                ShippingAddress.objects.bulk_create(addresses)
+            self._done('users', len(users))
+            self._done('addresses', len(addresses))
+            self.progress(f'users {start + len(users)}/{total}')
+        # Điểm hiện tại của từng người dùng, ghi vào LovePointBalance ở cuối
+        self.balances = [0] * total
+
+    # --- Đơn hàng ---
+
+    def _order_rows(self, pk, created_at):
+        rng = self.rng
+        user_index = rng.randrange(self.plan['users'])
+        user_id = self.first_user + user_index
+        status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+
+        details, total, donation = [], Decimal(0), Decimal(0)
+        for product_id, price, percentage in rng.sample(self.products, rng.randint(*DETAILS_PER_ORDER)):
+            quantity = rng.choices((1, 2, 3), weights=(80, 15, 5))[0]
+            details.append(OrderDetail(
+                order_id=pk, product_id=product_id, quantity=quantity, price_at_purchase=price,
+            ))
+            total += price * quantity
+            donation += price * quantity * percentage / 100
+
+        order = Order(
+            pk=pk, order_code=encode_order_code(pk), user_id=user_id, created_at=created_at,
+            total_amount=total, shipping_address_id=self.default_address[user_index],
+            payment_method=rng.choice(PaymentMethod.values), order_status=status,
+        )
+        history = [OrderStatusHistory(order_id=pk, new_status=OrderStatus.NEW, updated_at=created_at)]
+        if status != OrderStatus.NEW:
+            history.append(OrderStatusHistory(
+                order_id=pk, new_status=status, updated_at=created_at + timedelta(hours=rng.randint(1, 72)),
+            ))
+
+        donations, points = [], []
+        if status == OrderStatus.DELIVERED:
+            donations.append(DonationHistory(
+                order_id=pk, program_id=rng.choice(self.program_ids),
+                amount=donation.quantize(CENT, rounding=ROUND_HALF_UP),
+                donation_type=DonationType.FROM_PRODUCT,
+            ))
+            earned = points_for_amount(total)
+            if earned:
+                self.balances[user_index] += earned
+                points.append(LovePointHistory(
+                    user_id=user_id, transaction_type=PointTransactionType.EARNED, points_changed=earned,
+                    reason='Tích điểm từ đơn hàng đã giao', transaction_date=history[-1].updated_at,
+                ))
+        return user_index, order, details, history, donations, points
+
+    def _offer_rows(self, order_id, user_index, redeemed_at):
+        voucher_id, points_required, valid_days = self.rng.choice(self.vouchers)
+        if self.balances[user_index] < points_required:
+            return None, None
+        self.balances[user_index] -= points_required
+        user_id = self.first_user + user_index
+        expires_at = redeemed_at + timedelta(days=valid_days)
+        if expires_at < self.now:
+            status = self.rng.choice((RedeemedStatus.USED, RedeemedStatus.EXPIRED))
+        else:
+            status = self.rng.choice((RedeemedStatus.USED, RedeemedStatus.NOT_USED))
+        offer = RedeemedOffer(
+            user_id=user_id, voucher_id=voucher_id,
+            redeemed_code=f'S{voucher_id}-{order_id}',
+            redeemed_at=redeemed_at, usage_status=status, expires_at=expires_at,
+        )
+        spent = LovePointHistory(
+            user_id=user_id, transaction_type=PointTransactionType.SPENT, points_changed=-points_required,
+            reason='Đổi ưu đãi', transaction_date=redeemed_at,
+        )
+        return offer, spent
+
+    def seed_orders(self):
+        total = self.plan['orders']
+        first_order = _next_id(Order)
+        start_at = self.now - timedelta(days=DAYS)
+        step = timedelta(days=DAYS) / total
+        offer_rate = self.plan['redeemed_offers'] / total
+
+        for start in range(0, total, ORDER_CHUNK):
+            rows = {model: [] for model in (
+                Order, OrderDetail, OrderStatusHistory, DonationHistory, LovePointHistory, RedeemedOffer,
+            )}
+            for index in range(start, min(start + ORDER_CHUNK, total)):
+                created_at = start_at + step * index + timedelta(seconds=self.rng.random() * 60)
+                user_index, order, details, history, donations, points = self._order_rows(
+                    first_order + index, created_at,
+                )
+                rows[Order].append(order)
+                rows[OrderDetail].extend(details)
+                rows[OrderStatusHistory].extend(history)
+                rows[DonationHistory].extend(donations)
+                rows[LovePointHistory].extend(points)
+                if points and self.rng.random() < offer_rate / (STATUS_WEIGHTS[OrderStatus.DELIVERED] / 100):
+                    offer, spent = self._offer_rows(order.pk, user_index, created_at + timedelta(days=3))
+                    if offer is not None:
+                        rows[RedeemedOffer].append(offer)
+                        rows[LovePointHistory].append(spent)
+
+            with historical_dates(), transaction.atomic():
+                for model, objs in rows.items():
+                    model.objects.bulk_create(objs, batch_size=2000)
+                    self._done(model._meta.model_name, len(objs))
+            self.progress(f'orders {start + len(rows[Order])}/{total}')
+
+    # --- Hoàn tất ---
+
+    def finish(self):
+        balances = [
+            LovePointBalance(user_id=self.first_user + index, current_balance=balance)
+            for index, balance in enumerate(self.balances)
+        ]
+        LovePointBalance.objects.bulk_create(balances, batch_size=USER_CHUNK)
+        refresh_program_totals(self.program_ids)
+        first_day = timezone.localdate(self.now) - timedelta(days=DAYS + 1)
+        rollups.mark_days(first_day + timedelta(days=n) for n in range(DAYS + 2))
+        for model in (Product, Review, CharityProgram, Voucher, ContentPost):
+            bump_version(model)
+        # Sequence không tự tăng khi khóa chính được gán tay: create() sau đó sẽ trùng id
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), EXPLICIT_PK_MODELS):
+                cursor.execute(sql)
+
+    def run(self):
+        self.seed_catalog()
+        self.seed_users()
+        self.seed_orders()
+        self.finish()
+        return self.created
+
+
+def seed(orders, seed=0, progress=None):
+    """Sinh dữ liệu cho `orders` đơn hàng. Trả về số dòng đã tạo theo bảng."""
+    return Seeder(orders, seed=seed, progress=progress).run()
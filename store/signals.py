@@ -0,0 +1,227 @@
+# signals.py
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import images
+from .cart import Cart, merge_anonymous_cart
+from .rollups import mark_datetimes, mark_orders
+from .cache import bump_version_on_commit
+from .search import INDEXED_MODELS, index_object, unindex_object
+from .models import (
+    CharityProgram, ContentPost, Disbursement, DonationHistory, ImageDerivative, Order,
+    OrderDetail, Product, Review, ReviewStatus, Voucher,
+)
+from .totals import (
+    PROGRAM_TOTAL_FIELDS, apply_program_delta, apply_rating_delta,
+    refresh_product_ratings, refresh_program_totals,
+)
+
+# --- Tổng quyên góp / giải ngân của CharityProgram ---
+
+_UNKNOWN = object()
+
+
+def _snapshot(instance):
+    # Không đọc cột bị defer để tránh sinh truy vấn khi khởi tạo instance
+    if {'program_id', 'amount'} & instance.get_deferred_fields():
+        instance._program_total_snapshot = _UNKNOWN
+    else:
+        instance._program_total_snapshot = (instance.program_id, instance.amount)
+
+
+@receiver(post_init, sender=DonationHistory)
+@receiver(post_init, sender=Disbursement)
+def remember_program_amount(sender, instance, **kwargs):
+    if instance.pk is None:
+        # Bản ghi mới chưa được tính vào tổng
+        instance._program_total_snapshot = (None, 0)
+    else:
+        _snapshot(instance)
+
+
+@receiver(post_save, sender=DonationHistory)
+@receiver(post_save, sender=Disbursement)
+def update_program_total_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    field = PROGRAM_TOTAL_FIELDS[sender]
+    snapshot = getattr(instance, '_program_total_snapshot', _UNKNOWN)
+    if snapshot is _UNKNOWN:
+        # Không biết giá trị cũ: tính lại riêng chương trình này
+        refresh_program_totals([instance.program_id])
+    else:
+        old_program_id, old_amount = snapshot
+        if old_program_id == instance.program_id:
+            apply_program_delta(field, instance.program_id, instance.amount - old_amount)
+        else:
+            apply_program_delta(field, old_program_id, -old_amount)
+            apply_program_delta(field, instance.program_id, instance.amount)
+    _snapshot(instance)
+
+
+@receiver(pre_delete, sender=DonationHistory)
+@receiver(pre_delete, sender=Disbursement)
+def load_program_amount_before_delete(sender, instance, **kwargs):
+    # Sau khi xóa không thể đọc lại cột bị defer, nên lấy trước ở đây
+    if getattr(instance, '_program_total_snapshot', _UNKNOWN) is _UNKNOWN:
+        instance._program_total_snapshot = (
+            sender.objects.filter(pk=instance.pk).values_list('program_id', 'amount').first()
+            or (None, 0)
+        )
+
+
+@receiver(post_delete, sender=DonationHistory)
+@receiver(post_delete, sender=Disbursement)
+def update_program_total_on_delete(sender, instance, **kwargs):
+    old_program_id, old_amount = instance._program_total_snapshot
+    apply_program_delta(PROGRAM_TOTAL_FIELDS[sender], old_program_id, -old_amount)
+
+
+# --- Tổng hợp đánh giá của Product ---
+
+def _rating_snapshot(instance):
+    if {'product_id', 'rating', 'display_status'} & instance.get_deferred_fields():
+        instance._rating_snapshot = _UNKNOWN
+    elif instance.display_status == ReviewStatus.VISIBLE:
+        instance._rating_snapshot = (instance.product_id, 1, instance.rating)
+    else:
+        instance._rating_snapshot = (instance.product_id, 0, 0)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._rating_snapshot = (None, 0, 0)
+    else:
+        _rating_snapshot(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_rating_snapshot', _UNKNOWN)
+    if old is _UNKNOWN:
+        refresh_product_ratings([instance.product_id])
+        _rating_snapshot(instance)
+    else:
+        _rating_snapshot(instance)
+        old_product_id, old_count, old_sum = old
+        new_product_id, new_count, new_sum = instance._rating_snapshot
+        if old_product_id == new_product_id:
+            apply_rating_delta(new_product_id, new_count - old_count, new_sum - old_sum)
+        else:
+            apply_rating_delta(old_product_id, -old_count, -old_sum)
+            apply_rating_delta(new_product_id, new_count, new_sum)
+
+
+@receiver(pre_delete, sender=Review)
+def load_review_rating_before_delete(sender, instance, **kwargs):
+    if getattr(instance, '_rating_snapshot', _UNKNOWN) is _UNKNOWN:
+        row = sender.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'rating', 'display_status',
+        ).first()
+        if row is None or row[2] != ReviewStatus.VISIBLE:
+            instance._rating_snapshot = (None, 0, 0)
+        else:
+            instance._rating_snapshot = (row[0], 1, row[1])
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    product_id, count, total = instance._rating_snapshot
+    apply_rating_delta(product_id, -count, -total)
+
+
+# --- Đồng bộ tài liệu tìm kiếm (xem store/search.py) ---
+
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def delete_search_entry(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+for _model in INDEXED_MODELS:
+    post_save.connect(update_search_entry, sender=_model, dispatch_uid=f'search-{_model.__name__}-save')
+    post_delete.connect(delete_search_entry, sender=_model, dispatch_uid=f'search-{_model.__name__}-delete')
+
+
+# --- Vô hiệu hóa cache theo model (xem store/cache.py) ---
+
+CACHED_MODELS = (Product, Review, CharityProgram, Voucher, ContentPost)
+
+
+def invalidate_model_cache(sender, **kwargs):
+    bump_version_on_commit(sender)
+
+
+for _model in CACHED_MODELS:
+    post_save.connect(invalidate_model_cache, sender=_model, dispatch_uid=f'cache-{_model.__name__}-save')
+    post_delete.connect(invalidate_model_cache, sender=_model, dispatch_uid=f'cache-{_model.__name__}-delete')
+
+
+# --- Ảnh dẫn xuất (xem store/images.py) ---
+
+def remember_image(sender, instance, **kwargs):
+    field = images.IMAGE_FIELDS[sender]
+    if instance.pk is None:
+        instance._image_snapshot = ''
+    elif field in instance.get_deferred_fields():
+        instance._image_snapshot = _UNKNOWN
+    else:
+        instance._image_snapshot = getattr(instance, field).name
+
+
+def schedule_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = getattr(instance, images.IMAGE_FIELDS[sender]).name
+    old = getattr(instance, '_image_snapshot', _UNKNOWN)
+    if old is _UNKNOWN:
+        changed = name and not ImageDerivative.objects.filter(source=name).exists()
+    else:
+        changed = name != old
+    if changed:
+        images.schedule(name, sender)
+    instance._image_snapshot = name
+
+
+for _model in images.IMAGE_FIELDS:
+    post_init.connect(remember_image, sender=_model, dispatch_uid=f'image-{_model.__name__}-init')
+    post_save.connect(schedule_image_derivatives, sender=_model, dispatch_uid=f'image-{_model.__name__}-save')
+
+
+# --- Giỏ hàng (xem store/cart.py) ---
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None:
+        merge_anonymous_cart(request, user)
+
+
+@receiver(user_logged_out)
+def flush_cart_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        Cart.for_user(user.pk).flush()
+
+
+# --- Đánh dấu ngày cần tổng hợp lại (xem store/rollups.py) ---
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_order_day(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_datetimes([instance.created_at])
+
+
+@receiver(post_save, sender=OrderDetail)
+@receiver(post_delete, sender=OrderDetail)
+@receiver(post_save, sender=DonationHistory)
+@receiver(post_delete, sender=DonationHistory)
+def mark_order_line_day(sender, instance, raw=False, **kwargs):
+    if not raw and instance.order_id is not None:
+        mark_orders([instance.order_id])
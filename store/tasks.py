@@ -0,0 +1,56 @@
+# tasks.py
+"""
+Các tác vụ nền của app store (store/jobs.py). Module được import trong
+StoreConfig.ready() để đăng ký tác vụ trước khi worker chạy.
+"""
+import time
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from . import rollups
+from .fulfillment import complete_orders
+from .jobs import task
+from .ledger import award_points_bulk
+from .models import CharityProgram, User
+from .totals import refresh_program_totals
+
+
+@task(name='store.send_otp_email', priority=10, max_attempts=3, sensitive=True)
+def send_otp_email(email, code, ttl_minutes):
+    send_mail(
+        subject='Mã xác thực của bạn',
+        message=f'Mã xác thực: {code}\nMã có hiệu lực trong {ttl_minutes} phút.',
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+        recipient_list=[email],
+    )
+
+
+@task(name='store.complete_orders', priority=5)
+def complete_orders_task(order_ids, updated_by_id=None, program_id=None):
+    updated_by = User.objects.filter(pk=updated_by_id).first() if updated_by_id else None
+    program = CharityProgram.objects.get(pk=program_id) if program_id else None
+    complete_orders(order_ids, updated_by=updated_by, program=program)
+
+
+@task(name='store.award_points', priority=5)
+def award_points(awards, reason):
+    # JSON không có khóa số nên awards là danh sách cặp [user_id, points]
+    award_points_bulk([(user_id, points) for user_id, points in awards], reason=reason)
+
+
+@task(name='store.rollup_sales')
+def rollup_sales():
+    rollups.run()
+
+
+@task(name='store.refresh_program_totals')
+def refresh_program_totals_task(program_ids):
+    refresh_program_totals(program_ids)
+
+
+@task(name='store.noop', max_attempts=1)
+def noop(sleep=0, run=None):
+    """Tác vụ rỗng, dùng cho bench_jobs và kiểm tra worker. `run` chỉ để gắn nhãn lần đo."""
+    if sleep:
+        time.sleep(sleep)
@@ -1,3 +1,539 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+
+from . import rollups
+from .archive import archive, archive_batch, read_through
+from .benchmarks import render_changelist
+from .cart import MAX_QUANTITY, Cart
+from .cache import get_version
+from .catalog_import import import_products
+from .checkout import CheckoutError, checkout
+from .images import render_derivatives
+from .jobs import enqueue, reclaim_stale
+from .ledger import earn_points
+from .models import (
+    ArchivedLovePointHistory, CharityProgram, ContentPost, Disbursement, DonationHistory, Job, JobStatus, LovePointHistory, Order,
+    OrderDetail, OrderStatus,
+    LovePointBalance, OTPVerification, PaymentMethod, Product, ProductStatus, Review, ShippingAddress, ShoppingCart, User,
+)
+from .otp import ISSUE_LIMIT, OTPRateLimited, hash_code, issue_code, verify_code
+from .routers import PIN_COOKIE, ReplicaRoutingMiddleware, use_primary
+from .seeding import seed
+from .user_import import IMPORT_REASON, import_users
+
+
+def _csv(*lines):
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+class ProductImportTests(TestCase):
+    def setUp(self):
+        for name in ('Hộp A', 'Hộp B'):
+            Product.objects.create(name=name, description='', price=Decimal('100.00'),
+                                   charity_percentage=Decimal('10.00'), image='')
+
+    def _import(self, dry_run):
+        return import_products(_csv(
+            'name,price,status',
+            'Hộp A,120.00,SOLD_OUT',
+            'Hộp B,130.00,SOLD_OUT',
+        ), 'csv', dry_run=dry_run)
+
+    def test_changed_columns_counts_rows_per_column(self):
+        # Cột Decimal và cột chuỗi cùng đổi ở nhiều dòng
+        for dry_run in (True, False):
+            report = self._import(dry_run)
+            self.assertEqual(report.updated, 2)
+            self.assertEqual(sorted(report.changed_columns), [('price', 2), ('status', 2)])
+        self.assertEqual(Product.objects.get(name='Hộp B').price, Decimal('130.00'))
+        self.assertEqual(Product.objects.get(name='Hộp A').status, ProductStatus.SOLD_OUT)
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Số truy vấn của changelist không được tăng theo số dòng hiển thị (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(300)
+        rollups.run()
+        users = list(User.objects.order_by('pk')[:3])
+        products = list(Product.objects.order_by('pk')[:3])
+        programs = list(CharityProgram.objects.order_by('pk')[:3])
+        now = timezone.now()
+        for user, product, program in zip(users, products, programs):
+            Review.objects.create(user=user, product=product, rating=5, comment='Tốt')
+            ShoppingCart.objects.create(user=user, product=product)
+            ContentPost.objects.create(title=f'Bài {user.pk}', content='Nội dung', author=user)
+            Disbursement.objects.create(program=program, amount=Decimal('1000'), disbursed_at=now.date(),
+                                        recipient_partner='Đối tác', notes='')
+            OTPVerification.objects.create(email=user.email, otp_code='0' * 64,
+                                           expires_at=now - timedelta(days=60))
+            OTPVerification.objects.create(email=user.email, otp_code='1' * 64, expires_at=now)
+            enqueue('store.noop')
+        before = now - timedelta(days=180)
+        for kind in ('status_history', 'point_history'):
+            archive(kind, before=before)
+        archive('otp', before=now - timedelta(days=30))
+
+    def _render(self, model_admin):
+        # Cache catalog/phiên bản không được làm lệch số truy vấn giữa hai lần render
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            render_changelist(model_admin)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'store':
+                continue
+            with self.subTest(admin=type(model_admin).__name__):
+                self.assertGreaterEqual(model._default_manager.count(), 2)
+                with mock.patch.object(model_admin, 'list_per_page', 1):
+                    single_row = self._render(model_admin)
+                cache.clear()
+                with self.assertNumQueries(single_row):
+                    render_changelist(model_admin)
+
+
+class RebuildProgramTotalsTests(TestCase):
+    def test_rebuild_bumps_program_cache_version(self):
+        program = CharityProgram.objects.create(name='Chương trình A', description='', image='',
+                                                target_amount=Decimal('1000'))
+        CharityProgram.objects.filter(pk=program.pk).update(raised_amount=Decimal('50'))
+        before = get_version(CharityProgram)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_program_totals', stdout=io.StringIO())
+        program.refresh_from_db()
+        self.assertEqual(program.raised_amount, Decimal('0'))
+        self.assertNotEqual(get_version(CharityProgram), before)
+
+
+class ReclaimStaleJobTests(TestCase):
+    def test_exhausted_stale_job_fails_instead_of_requeueing(self):
+        locked_at = timezone.now() - timedelta(hours=1)
+        retry = Job.objects.create(task='store.noop', status=JobStatus.RUNNING, attempts=1, max_attempts=3,
+                                   locked_by='w', locked_at=locked_at)
+        exhausted = Job.objects.create(task='store.noop', status=JobStatus.RUNNING, attempts=3, max_attempts=3,
+                                       locked_by='w', locked_at=locked_at)
+        self.assertEqual(reclaim_stale(), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retry.status, JobStatus.QUEUED)
+        self.assertEqual(exhausted.status, JobStatus.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+
+
+class AutocompleteSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', 'Quản trị', '0900000000', 'pw')
+        cls.user = User.objects.create_user('an@example.com', 'Nguyễn Văn An', '0912345678')
+        cls.program = CharityProgram.objects.create(name='Chương trình thiện nguyện mùa đông', description='',
+                                                    image='', target_amount=Decimal('1000'))
+
+    def _search(self, model_name, field_name, term):
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'store', 'model_name': model_name, 'field_name': field_name, 'term': term,
+        })
+        self.assertEqual(response.status_code, 200)
+        return [int(item['id']) for item in response.json()['results']]
+
+    def test_prefix_match(self):
+        self.assertEqual(self._search('order', 'user', 'an@'), [self.user.pk])
+
+    def test_falls_back_to_search_fields(self):
+        self.assertEqual(self._search('order', 'user', 'Nguyễn'), [self.user.pk])
+        self.assertEqual(self._search('order', 'user', '0912'), [self.user.pk])
+        self.assertEqual(self._search('donationhistory', 'program', 'thiện'), [self.program.pk])
+
+
+class OrderCompletionAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', 'Quản trị', '0900000000', 'pw')
+        cls.programs = [
+            CharityProgram.objects.create(name=f'Chương trình {n}', description='', image='',
+                                          target_amount=Decimal('1000'))
+            for n in range(2)
+        ]
+        product = Product.objects.create(name='Hộp A', description='', price=Decimal('100000'),
+                                         charity_percentage=Decimal('10'), image='')
+        cls.orders = {}
+        for status in (OrderStatus.NEW, OrderStatus.CANCELLED):
+            order = Order.objects.create(order_code=f'T-{status}', user=cls.admin, total_amount=Decimal('100000'),
+                                         payment_method=PaymentMethod.choices[0][0], order_status=status)
+            OrderDetail.objects.create(order=order, product=product, quantity=1, price_at_purchase=Decimal('100000'))
+            cls.orders[status] = order
+
+    @override_settings(STORE_DONATION_PROGRAM_ID=None)
+    def test_mark_delivered_warns_about_skipped_orders(self):
+        self.client.force_login(self.admin)
+        response = self.client.post('/admin/store/order/', {
+            'action': 'mark_delivered', '_selected_action': [order.pk for order in self.orders.values()],
+        }, follow=True)
+        texts = [str(message) for message in response.context['messages']]
+        self.assertIn("Đã hoàn tất 1 đơn hàng.", texts)
+        self.assertTrue(any(f"T-{OrderStatus.CANCELLED} (Đã hủy)" in text for text in texts))
+        self.assertEqual(Order.objects.get(pk=self.orders[OrderStatus.CANCELLED].pk).order_status,
+                         OrderStatus.CANCELLED)
+        self.assertEqual(DonationHistory.objects.get().program, self.programs[0])
+
+    def test_donation_program_setting(self):
+        with override_settings(STORE_DONATION_PROGRAM_ID=self.programs[1].pk):
+            self.client.force_login(self.admin)
+            self.client.post('/admin/store/order/', {
+                'action': 'mark_delivered', '_selected_action': [self.orders[OrderStatus.NEW].pk],
+            })
+        self.assertEqual(DonationHistory.objects.get().program, self.programs[1])
+
+
+class ApiImageShapeTests(TestCase):
+    def test_products_programs_and_cart_share_image_shape(self):
+        cache.clear()
+        product = Product.objects.create(name='Hộp A', description='', price=Decimal('100'),
+                                         charity_percentage=Decimal('10'), image='products/a.jpg')
+        CharityProgram.objects.create(name='Chương trình A', description='', image='charity_programs/a.jpg',
+                                      target_amount=Decimal('1000'))
+        product_image = self.client.get('/api/products/').json()['results'][0]['image']
+        program_image = self.client.get('/api/programs/').json()['results'][0]['image']
+        self.assertEqual(set(product_image), set(program_image))
+        self.assertTrue(product_image['url'].endswith('products/a.jpg'))
+
+        user = User.objects.create_user('an@example.com', 'An', '0900000000')
+        cart = Cart.for_user(user.pk)
+        cart.items = {product.pk: 1}
+        self.assertEqual(cart.lines()[0]['image'], product_image)
+
+
+class ImageDerivativeTests(TestCase):
+    def _save(self, storage, name, fmt, color):
+        from PIL import Image
+
+        content = ContentFile(b'')
+        Image.new('RGB', (400, 300), color).save(content, fmt)
+        return storage.save(name, content)
+
+    def test_sources_differing_only_by_extension_get_distinct_renditions(self):
+        storage = InMemoryStorage()
+        jpg = render_derivatives(self._save(storage, 'products/a.jpg', 'JPEG', 'red'), storage)
+        png = render_derivatives(self._save(storage, 'products/a.png', 'PNG', 'blue'), storage)
+        jpg_paths = {row['preset']: row['path'] for row in jpg}
+        png_paths = {row['preset']: row['path'] for row in png}
+        self.assertEqual(jpg_paths['thumb'], 'derivatives/thumb/products/a.jpg.jpg')
+        for preset in ('thumb', 'thumb_webp', 'medium_webp'):
+            self.assertNotEqual(jpg_paths[preset], png_paths[preset])
+            self.assertTrue(storage.exists(jpg_paths[preset]))
+            self.assertTrue(storage.exists(png_paths[preset]))
+
+
+class KeysetCountLabelTests(TestCase):
+    def test_only_estimated_counts_are_labelled_approximate(self):
+        for n in range(3):
+            user = User.objects.create_user(f'u{n}@example.com', 'An', '0900000000')
+            earn_points(user.pk, 10, 'Thử')
+        model_admin = admin.site._registry[LovePointHistory]
+        estimated = render_changelist(model_admin).rendered_content
+        exact = render_changelist(model_admin, {'q': 'u1@example.com'}).rendered_content
+        self.assertIn('khoảng 3', estimated)
+        self.assertNotIn('khoảng', exact)
+        self.assertIn('1 love point historys', exact)
+
+
+def _read_product_db():
+    return Product.objects.all().db
+
+
+@override_settings(STORE_REPLICA_DATABASES=['replica'], STORE_REPLICA_MAX_LAG=5, STORE_VIEW_DATABASES={})
+class ReplicaRoutingTests(TransactionTestCase):
+    # TestCase bọc mọi test trong atomic(), khi đó router luôn đọc CSDL chính
+
+    def _request(self, view=_read_product_db, method='get', path='/api/products/', cookies=None):
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            seen['db'] = view()
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return seen['db'], response
+
+    def test_reads_go_to_replica_inside_requests_only(self):
+        self.assertEqual(self._request()[0], 'replica')
+        self.assertEqual(self._request(lambda: User.objects.all().db)[0], 'default')
+        self.assertEqual(_read_product_db(), 'default')
+
+    def test_write_pins_session_to_primary(self):
+        def write_then_read():
+            Product.objects.create(name='Hộp', description='', price=Decimal('100.00'),
+                                   charity_percentage=Decimal('10.00'), image='')
+            return _read_product_db()
+
+        db, response = self._request(write_then_read)
+        self.assertEqual(db, 'default')
+        pin = response.cookies[PIN_COOKIE].value
+        self.assertEqual(self._request(cookies={PIN_COOKIE: pin})[0], 'default')
+        self.assertEqual(self._request(cookies={PIN_COOKIE: '0'})[0], 'replica')
+        self.assertNotIn(PIN_COOKIE, self._request()[1].cookies)
+
+    def test_primary_is_forced_for_unsafe_methods_use_primary_and_view_settings(self):
+        self.assertEqual(self._request(method='post')[0], 'default')
+
+        def read_on_primary():
+            with use_primary():
+                return _read_product_db()
+
+        self.assertEqual(self._request(read_on_primary)[0], 'default')
+        view_name = resolve('/api/products/').view_name
+        with self.settings(STORE_VIEW_DATABASES={view_name: 'primary'}):
+            self.assertEqual(self._request()[0], 'default')
+            self.assertEqual(self._request(path='/api/programs/')[0], 'replica')
+
+    def test_reads_inside_atomic_go_to_primary(self):
+        def read_in_atomic():
+            with transaction.atomic():
+                return _read_product_db()
+
+        self.assertEqual(self._request(read_in_atomic)[0], 'default')
+
+
+class OTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_code_is_stored_hashed_and_single_use(self):
+        code = issue_code(' An@Example.com ')
+        row = OTPVerification.objects.get()
+        self.assertEqual(row.email, 'an@example.com')
+        self.assertNotEqual(row.otp_code, code)
+        self.assertEqual(row.otp_code, hash_code('an@example.com', code))
+        self.assertFalse(verify_code('an@example.com', '000000' if code != '000000' else '111111'))
+        self.assertTrue(verify_code('AN@example.com', code))
+        self.assertFalse(verify_code('an@example.com', code))
+
+    def test_new_code_retires_previous_ones(self):
+        first = issue_code('an@example.com')
+        second = issue_code('an@example.com')
+        self.assertEqual(OTPVerification.objects.filter(is_used=False).count(), 1)
+        if first != second:
+            self.assertFalse(verify_code('an@example.com', first))
+        self.assertTrue(verify_code('an@example.com', second))
+
+    def test_issue_is_rate_limited_per_email(self):
+        limit = ISSUE_LIMIT[0]
+        for _ in range(limit):
+            issue_code('an@example.com')
+        with self.assertRaises(OTPRateLimited) as ctx:
+            issue_code('an@example.com')
+        self.assertGreater(ctx.exception.retry_after, 0)
+        issue_code('binh@example.com')
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('an@example.com', 'An', '0900000000')
+        self.products = [
+            Product.objects.create(name=f'Hộp {n}', description='', price=Decimal('100.00'),
+                                   charity_percentage=Decimal('10.00'), image='')
+            for n in range(3)
+        ]
+
+    def _rows(self):
+        return dict(ShoppingCart.objects.filter(user=self.user).values_list('product_id', 'quantity'))
+
+    def test_changes_are_batched_until_flush(self):
+        a, b, c = (product.pk for product in self.products)
+        cart = Cart.for_user(self.user.pk)
+        cart.add(a, 2)
+        cart.add(b)
+        self.assertEqual(self._rows(), {})
+        cart.flush()
+        self.assertEqual(self._rows(), {a: 2, b: 1})
+
+        cart.set(a, 0)
+        cart.add(c, 3)
+        # Một upsert cho dòng còn lại và một DELETE cho dòng bị bỏ
+        with self.assertNumQueries(2):
+            cart.flush()
+        self.assertEqual(self._rows(), {b: 1, c: 3})
+
+        cache.clear()
+        self.assertEqual(Cart.for_user(self.user.pk).items, {b: 1, c: 3})
+
+    def test_merge_adds_anonymous_cart_and_deletes_it(self):
+        a, b, _ = (product.pk for product in self.products)
+        cart = Cart.for_user(self.user.pk)
+        cart.add(a, 90)
+        cart.flush()
+        anonymous = Cart.for_token('token')
+        anonymous.add(a, 20)
+        anonymous.add(b, 1)
+
+        cart.merge(anonymous)
+        self.assertEqual(self._rows(), {a: MAX_QUANTITY, b: 1})
+        self.assertEqual(Cart.for_token('token').items, {})
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.products = [
+            Product.objects.create(name=f'Hộp {n}', description='', price=Decimal(100 + n),
+                                   charity_percentage=Decimal('10.00'), image='')
+            for n in range(20)
+        ]
+
+    def _user_with_cart(self, email, lines):
+        user = User.objects.create_user(email, 'An', '0900000000')
+        ShippingAddress.objects.create(user=user, recipient_name='An', phone_number='0900000000',
+                                       province='HN', district='HK', ward='HT', street_address='1',
+                                       is_default=True)
+        cart = Cart.for_user(user.pk)
+        for product in self.products[:lines]:
+            cart.add(product.pk, 2)
+        cart.flush()
+        return user
+
+    def test_query_count_does_not_grow_with_cart_lines(self):
+        one = self._user_with_cart('one@example.com', 1)
+        many = self._user_with_cart('many@example.com', 20)
+        # Đơn đầu tiên trong ngày còn xếp job rollup; đo từ đơn thứ hai
+        checkout(self._user_with_cart('first@example.com', 1).pk)
+        with CaptureQueriesContext(connection) as ctx:
+            checkout(one.pk)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            checkout(many.pk)
+
+    def test_creates_order_from_cart_and_empties_it(self):
+        user = self._user_with_cart('an@example.com', 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = checkout(user.pk)
+        self.assertEqual(order.total_amount, Decimal(2 * (100 + 101 + 102)))
+        self.assertEqual(order.details.count(), 3)
+        self.assertEqual(order.order_status, OrderStatus.NEW)
+        self.assertFalse(ShoppingCart.objects.filter(user=user).exists())
+        self.assertEqual(Cart.for_user(user.pk).items, {})
+        with self.assertRaises(CheckoutError):
+            checkout(user.pk)
+
+    def test_unavailable_product_rejects_the_order(self):
+        user = self._user_with_cart('an@example.com', 2)
+        Product.objects.filter(pk=self.products[1].pk).update(status=ProductStatus.SOLD_OUT)
+        with self.assertRaises(CheckoutError):
+            checkout(user.pk)
+        self.assertFalse(Order.objects.filter(user=user).exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('an@example.com', 'An', '0900000000')
+        now = timezone.now()
+        for days in (400, 380, 370, 10, 1):
+            earn_points(self.user.pk, days, 'Thử')
+            LovePointHistory.objects.filter(points_changed=days).update(
+                transaction_date=now - timedelta(days=days)
+            )
+        self.before = now - timedelta(days=365)
+        self.old_ids = sorted(
+            LovePointHistory.objects.filter(transaction_date__lt=self.before).values_list('id', flat=True)
+        )
+
+    def test_archive_batch_moves_oldest_rows_and_keeps_ids(self):
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.assertEqual(archive_batch('point_history', self.before, batch_size=2, export_dir=export_dir), 2)
+            self.assertEqual(archive_batch('point_history', self.before, batch_size=2, export_dir=export_dir), 1)
+            self.assertEqual(archive_batch('point_history', self.before, export_dir=export_dir), 0)
+            exported = []
+            for path in sorted((Path(export_dir) / 'point_history').iterdir()):
+                with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                    exported.extend(json.loads(line)['id'] for line in fh)
+        self.assertEqual(sorted(exported), self.old_ids)
+        self.assertEqual(sorted(ArchivedLovePointHistory.objects.values_list('id', flat=True)), self.old_ids)
+        self.assertFalse(LovePointHistory.objects.filter(id__in=self.old_ids).exists())
+        self.assertEqual(LovePointHistory.objects.count(), 2)
+
+    def test_read_through_merges_and_orders_archived_rows(self):
+        archive('point_history', before=self.before)
+        live = read_through('point_history', user_id=self.user.pk)
+        self.assertEqual([row['points_changed'] for row in live], [1, 10])
+        rows = read_through('point_history', include_archive=True, order_by='-transaction_date',
+                            user_id=self.user.pk)
+        self.assertEqual([row['points_changed'] for row in rows], [1, 10, 370, 380, 400])
+        rows = read_through('point_history', include_archive=True, order_by='transaction_date', limit=2,
+                            user_id=self.user.pk)
+        self.assertEqual([row['points_changed'] for row in rows], [400, 380])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(TestCase):
+    HEADER = 'email,full_name,phone_number,password,password_hash,points,province,district,ward,street_address'
+
+    def setUp(self):
+        self.existing = User.objects.create_user('cu@example.com', 'Cũ', '0900000000', password='old')
+
+    def _file(self):
+        return _csv(
+            self.HEADER,
+            'cu@Example.com,Cũ Mới,0911111111,new,,50,,,,',
+            'moi@example.com,Mới,0922222222,secret,,30,HN,HK,HT,1 Hàng Bài',
+            f"hash@example.com,Băm,0933333333,,{make_password('hashed')},,,,,",
+            'moi@example.com,Trùng,0944444444,,,,,,,',
+            ',Thiếu email,0955555555,,,,,,,',
+        )
+
+    def test_skip_mode_creates_only_new_users(self):
+        report = import_users(self._file(), duplicates='skip', chunk_size=2)
+        self.assertEqual((report.rows, report.created, report.updated), (5, 2, 0))
+        self.assertEqual(report.duplicates, 2)
+        self.assertEqual([line for line, _ in report.errors], [5, 6])
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.full_name, 'Cũ')
+        self.assertTrue(self.existing.check_password('old'))
+        new = User.objects.get(email='moi@example.com')
+        self.assertTrue(new.check_password('secret'))
+        self.assertTrue(User.objects.get(email='hash@example.com').check_password('hashed'))
+        self.assertEqual(new.shipping_addresses.get().street_address, '1 Hàng Bài')
+        self.assertEqual(LovePointBalance.objects.get(user=new).current_balance, 30)
+        history = LovePointHistory.objects.get(user=new)
+        self.assertEqual((history.points_changed, history.reason), (30, IMPORT_REASON))
+        self.assertFalse(LovePointHistory.objects.filter(user__email='hash@example.com').exists())
+
+    def test_update_mode_updates_existing_users(self):
+        report = import_users(self._file(), duplicates='update')
+        self.assertEqual((report.created, report.updated), (2, 1))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.full_name, self.existing.phone_number), ('Cũ Mới', '0911111111'))
+        self.assertTrue(self.existing.check_password('new'))
+        # Điểm chỉ được nhập cho người dùng mới
+        self.assertFalse(LovePointHistory.objects.filter(user=self.existing).exists())
+
+    def test_dry_run_writes_nothing(self):
+        report = import_users(self._file(), dry_run=True)
+        self.assertEqual((report.created, report.updated), (2, 0))
+        self.assertEqual(User.objects.count(), 1)
@@ -0,0 +1,83 @@
+# totals.py
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+
+from .cache import bump_version_on_commit
+from .models import (
+    CharityProgram, Disbursement, DonationHistory, Product, Review, ReviewStatus,
+)
+from .routers import use_primary
+
+# Model ghi sổ -> cột tổng tương ứng trên CharityProgram
+PROGRAM_TOTAL_FIELDS = {
+    DonationHistory: 'raised_amount',
+    Disbursement: 'disbursed_amount',
+}
+
+
+def apply_program_delta(field, program_id, delta):
+    """Cộng dồn `delta` vào cột tổng của chương trình bằng một UPDATE F()."""
+    if program_id is None or not delta:
+        return
+    CharityProgram.objects.filter(pk=program_id).update(**{field: F(field) + delta})
+    # UPDATE không phát post_save nên tự làm mới cache tiến độ chương trình
+    bump_version_on_commit(CharityProgram)
+
+
+def compute_program_totals(program_ids=None):
+    """
+    Tính lại tổng từ sổ quyên góp/giải ngân, mỗi bảng một truy vấn GROUP BY.
+    Trả về {program_id: {'raised_amount': ..., 'disbursed_amount': ...}}.
+    """
+    totals = {}
+    for model, field in PROGRAM_TOTAL_FIELDS.items():
+        qs = model.objects.all()
+        if program_ids is not None:
+            qs = qs.filter(program_id__in=program_ids)
+        rows = qs.values('program_id').annotate(total=Sum('amount')).order_by()
+        for row in rows:
+            totals.setdefault(row['program_id'], {})[field] = row['total']
+    return totals
+
+
+@use_primary
+def refresh_program_totals(program_ids):
+    """
+    Ghi đè cột tổng của các chương trình bằng giá trị tính lại từ sổ. Luôn đọc
+    sổ từ CSDL chính: bản sao có thể trễ và ghi đè tổng bằng số cũ.
+    """
+    totals = compute_program_totals(program_ids)
+    programs = list(CharityProgram.objects.filter(pk__in=program_ids))
+    for program in programs:
+        for field in PROGRAM_TOTAL_FIELDS.values():
+            setattr(program, field, totals.get(program.pk, {}).get(field) or Decimal('0'))
+    CharityProgram.objects.bulk_update(programs, list(PROGRAM_TOTAL_FIELDS.values()))
+    bump_version_on_commit(CharityProgram)
+    return programs
+
+
+# --- Tổng hợp đánh giá của Product ---
+
+def apply_rating_delta(product_id, count_delta, sum_delta):
+    if product_id is None or not (count_delta or sum_delta):
+        return
+    Product.objects.filter(pk=product_id).update(
+        rating_count=F('rating_count') + count_delta,
+        rating_sum=F('rating_sum') + sum_delta,
+    )
+
+
+@use_primary
+def refresh_product_ratings(product_ids):
+    """Tính lại tổng hợp đánh giá đang hiển thị của các sản phẩm."""
+    rows = (
+        Review.objects.filter(product_id__in=product_ids, display_status=ReviewStatus.VISIBLE)
+        .values('product_id').annotate(n=Count('pk'), total=Sum('rating')).order_by()
+    )
+    stats = {row['product_id']: (row['n'], row['total']) for row in rows}
+    products = list(Product.objects.filter(pk__in=product_ids).only('pk'))
+    for product in products:
+        product.rating_count, product.rating_sum = stats.get(product.pk, (0, 0))
+    Product.objects.bulk_update(products, ['rating_count', 'rating_sum'])
+    return products
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'store'
+
+urlpatterns = [
+    path('products/', views.product_list, name='product-list'),
+    path('products/<int:pk>/', views.product_detail, name='product-detail'),
+    path('programs/', views.program_list, name='program-list'),
+    path('programs/<int:pk>/', views.program_detail, name='program-detail'),
+    path('posts/', views.post_list, name='post-list'),
+    path('posts/<int:pk>/', views.post_detail, name='post-detail'),
+    path('search/', views.search_view, name='search'),
+    path('cart/', views.cart_view, name='cart'),
+    path('cart/items/', views.cart_item_view, name='cart-item'),
+    path('checkout/', views.checkout_view, name='checkout'),
+    path('reports/sales/', views.sales_report, name='sales-report'),
+    path('programs/<int:pk>/donations/', views.program_donations, name='program-donations'),
+    path('orders/<int:pk>/history/', views.order_history, name='order-history'),
+    path('points/history/', views.point_history, name='point-history'),
+]
@@ -0,0 +1,250 @@
+# user_import.py
+"""
+Nhập người dùng hàng loạt từ CSV hoặc JSONL (chuyển từ hệ thống cũ), đối chiếu
+theo email đã chuẩn hóa như CustomUserManager.create_user.
+
+- Băm mật khẩu (PBKDF2, hàng trăm ms mỗi mật khẩu) là phần tốn nhất, nên
+  `hasher` nhận cả lô mật khẩu và có thể chạy trên pool tiến trình (xem lệnh
+  `import_users`). Lô kế tiếp được gửi đi băm trước khi ghi lô hiện tại, nên
+  việc ghi DB chồng lên thời gian băm.
+- Cột `password_hash` nhận mật khẩu đã băm sẵn (định dạng hasher của Django)
+  và không băm lại; dòng không có mật khẩu nhận mật khẩu không dùng được.
+- Mỗi lô CHUNK_SIZE dòng được ghi trong một transaction riêng: User, địa chỉ
+  giao hàng mặc định, LovePointBalance và dòng LovePointHistory cho điểm ban
+  đầu (xem store/ledger.py). Lỗi giữa chừng giữ nguyên các lô đã ghi; chạy lại
+  với duplicates='skip' sẽ bỏ qua các email đã có.
+"""
+import time
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .catalog_import import FORMATS, detect_format, read_rows
+from .models import LovePointBalance, LovePointHistory, PointTransactionType, ShippingAddress, User
+
+COLUMNS = (
+    'email', 'full_name', 'phone_number', 'password', 'password_hash', 'points',
+    'recipient_name', 'province', 'district', 'ward', 'street_address',
+)
+ADDRESS_COLUMNS = ('province', 'district', 'ward', 'street_address')
+DUPLICATE_MODES = ('skip', 'update')
+CHUNK_SIZE = 500
+IMPORT_REASON = 'Chuyển điểm từ hệ thống cũ'
+
+
+class UserImportError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        # Email đã có trong DB hoặc lặp lại trong file
+        self.duplicates = 0
+        self.hashed = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.rows} dòng: thêm {self.created}, sửa {self.updated}, "
+            f"trùng {self.duplicates}, lỗi {len(self.errors)}, băm {self.hashed} mật khẩu "
+            f"({self.seconds:.2f}s, {self.rows_per_second:.0f} dòng/s)"
+        )
+
+
+def serial_hasher(passwords):
+    return map(make_password, passwords)
+
+
+def _text(raw, column):
+    value = raw.get(column)
+    return '' if value is None else str(value).strip()
+
+
+def clean_row(raw):
+    """Chuẩn hóa một dòng. Trả về (values, lỗi)."""
+    email = User.objects.normalize_email(_text(raw, 'email'))
+    if not email:
+        return None, "Thiếu email."
+    values = {'email': email}
+    for column in ('email', 'full_name', 'phone_number'):
+        field = User._meta.get_field(column)
+        try:
+            values[column] = field.clean(values.get(column) or _text(raw, column), None)
+        except ValidationError as exc:
+            return None, f"{column}: {'; '.join(exc.messages)}"
+
+    password, encoded = _text(raw, 'password'), _text(raw, 'password_hash')
+    if password and encoded:
+        return None, "Chỉ được có một trong hai cột password và password_hash."
+    if encoded:
+        try:
+            identify_hasher(encoded)
+        except ValueError:
+            return None, "password_hash: không nhận ra thuật toán băm."
+    values['password'] = password or None
+    values['password_hash'] = encoded or None
+
+    points = _text(raw, 'points')
+    try:
+        values['points'] = int(points) if points else 0
+    except ValueError:
+        return None, f"points: không phải số nguyên ({points})."
+    if values['points'] < 0:
+        return None, "points: không được âm."
+
+    address = {column: _text(raw, column) for column in ADDRESS_COLUMNS}
+    if any(address.values()):
+        address['recipient_name'] = _text(raw, 'recipient_name') or values['full_name']
+        address['phone_number'] = values['phone_number']
+        try:
+            for column, value in address.items():
+                ShippingAddress._meta.get_field(column).clean(value, None)
+        except ValidationError as exc:
+            return None, f"{column}: {'; '.join(exc.messages)}"
+        values['address'] = address
+    else:
+        values['address'] = None
+    return values, None
+
+
+class _Chunk:
+    """Một lô đã lọc trùng, mật khẩu đang được băm."""
+
+    def __init__(self, rows, existing, hashes):
+        self.rows = rows
+        # email -> id của người dùng đã có (chỉ khi duplicates='update')
+        self.existing = existing
+        self.hashes = hashes
+
+
+def _prepare(chunk, report, duplicates, hasher, dry_run):
+    existing = dict(
+        User.objects.filter(email__in=list(chunk)).values_list('email', 'id')
+    )
+    report.duplicates += len(existing)
+    if duplicates == 'skip':
+        rows = [values for email, values in chunk.items() if email not in existing]
+        existing = {}
+    else:
+        rows = list(chunk.values())
+    if dry_run:
+        report.created += len(rows) - len(existing)
+        report.updated += len(existing)
+        return None
+    to_hash = [values['password'] for values in rows if values['password']]
+    report.hashed += len(to_hash)
+    # hasher có thể trả về iterator lười (pool.map) — kết quả chỉ được đọc khi ghi
+    return _Chunk(rows, existing, hasher(to_hash) if to_hash else iter(()))
+
+
+def _encoded_passwords(chunk):
+    hashes = iter(chunk.hashes)
+    for values in chunk.rows:
+        if values['password']:
+            yield next(hashes)
+        else:
+            yield values['password_hash'] or make_password(None)
+
+
+def _write(chunk, report):
+    created, updated = [], []
+    for values, encoded in zip(chunk.rows, _encoded_passwords(chunk)):
+        user = User(
+            id=chunk.existing.get(values['email']), email=values['email'],
+            full_name=values['full_name'], phone_number=values['phone_number'], password=encoded,
+        )
+        (updated if user.id else created).append((user, values))
+
+    with transaction.atomic():
+        if updated:
+            # Chỉ ghi đè mật khẩu khi file có mật khẩu cho dòng đó
+            by_password = {True: [], False: []}
+            for user, values in updated:
+                by_password[bool(values['password'] or values['password_hash'])].append(user)
+            User.objects.bulk_update(by_password[True], ['full_name', 'phone_number', 'password'])
+            User.objects.bulk_update(by_password[False], ['full_name', 'phone_number'])
+        if created:
+            users = User.objects.bulk_create([user for user, _ in created])
+            if any(user.pk is None for user in users):
+                # Backend không trả pk sau bulk_create: đọc lại theo email
+                ids = dict(
+                    User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id')
+                )
+                for user in users:
+                    user.pk = ids[user.email]
+            ShippingAddress.objects.bulk_create([
+                ShippingAddress(user=user, is_default=True, **values['address'])
+                for user, values in created if values['address']
+            ])
+            LovePointBalance.objects.bulk_create([
+                LovePointBalance(user=user, current_balance=values['points']) for user, values in created
+            ])
+            # Mọi số dư khác 0 đều có dòng lịch sử tương ứng
+            LovePointHistory.objects.bulk_create([
+                LovePointHistory(
+                    user=user, transaction_type=PointTransactionType.EARNED,
+                    points_changed=values['points'], reason=IMPORT_REASON,
+                )
+                for user, values in created if values['points']
+            ])
+    report.created += len(created)
+    report.updated += len(updated)
+
+
+def import_users(stream, fmt='csv', duplicates='skip', dry_run=False, chunk_size=CHUNK_SIZE,
+                 hasher=serial_hasher, progress=None):
+    """
+    Nhập người dùng từ file theo lô. Email đã có trong DB được bỏ qua
+    (duplicates='skip') hoặc cập nhật họ tên, số điện thoại và mật khẩu
+    (duplicates='update'); điểm và địa chỉ chỉ được tạo cho người dùng mới.
+    Email lặp lại trong file là lỗi của dòng sau. `hasher(passwords)` trả về
+    các mật khẩu đã băm theo đúng thứ tự; `progress(report)` được gọi sau mỗi lô.
+    """
+    if duplicates not in DUPLICATE_MODES:
+        raise UserImportError(f"Chế độ xử lý trùng không hợp lệ: {duplicates}")
+    report = ImportReport()
+    started = time.perf_counter()
+    seen = set()
+    chunk = {}
+    pending = None
+
+    def flush():
+        nonlocal pending
+        prepared = _prepare(chunk, report, duplicates, hasher, dry_run)
+        if pending is not None:
+            _write(pending, report)
+        pending = prepared
+        report.seconds = time.perf_counter() - started
+        if progress:
+            progress(report)
+
+    for line_no, raw in read_rows(stream, fmt, key='email', error=UserImportError):
+        report.rows += 1
+        values, error = clean_row(raw)
+        if error:
+            report.errors.append((line_no, error))
+            continue
+        if values['email'] in seen:
+            report.duplicates += 1
+            report.errors.append((line_no, f"Trùng email trong file: {values['email']}"))
+            continue
+        seen.add(values['email'])
+        chunk[values['email']] = values
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk = {}
+    if chunk:
+        flush()
+    if pending is not None:
+        _write(pending, report)
+    report.seconds = time.perf_counter() - started
+    return report
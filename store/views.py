@@ -1,3 +1,506 @@
-from django.shortcuts import render
+# views.py
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import wraps
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET, require_POST
+
+from . import archive, rollups
+from .cache import acached, aget_versions, cached, model_namespace
+from .cart import Cart, CartError, set_cart_cookie
+from .checkout import CheckoutError, checkout
+from .images import arenditions_for, image_data
+from .models import (
+    CharityProgram, CharityProgramStatus, ContentPost, Order, PaymentMethod, PostType, Product,
+    ProductStatus, Review, ReviewStatus, SearchKind,
+)
+from .search import search
+
+# --- Catalog (đọc công khai) ---
+#
+# Các endpoint đọc công khai là view async: dưới ASGI, request chờ cache/DB
+# hoặc client chậm không giữ luồng worker. ORM và cache dùng API async
+# (aget, afirst, async for, cache.aget...).
+
+# Dữ liệu catalog phụ thuộc các model này; lưu/xóa một trong số đó làm mới cache
+CATALOG_MODELS = (Product, Review)
+CATALOG_TIMEOUT = 60 * 60
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DETAIL_REVIEW_COUNT = 5
+
+PRODUCT_LIST_FIELDS = (
+    'id', 'name', 'price', 'charity_percentage', 'image', 'status', 'rating_count', 'rating_sum',
+)
+
+
+def _int_param(request, name, default, maximum=None):
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    value = max(value, 0)
+    return min(value, maximum) if maximum else value
+
+
+def _page_limit(request):
+    return _int_param(request, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+
+
+def acondition(prefix, *namespaces):
+    """
+    Như @condition nhưng ETag/Last-Modified lấy từ phiên bản cache của
+    `namespaces` bằng API cache async, dùng cho view async.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            params = '&'.join(f'{k}={v}' for k, v in sorted(request.GET.items()))
+            digest = hashlib.md5(f'{request.path}?{params}'.encode(), usedforsecurity=False).hexdigest()
+            # Một lần đọc cache cho cả ETag và Last-Modified
+            versions = await aget_versions(*namespaces)
+            tag = '-'.join(str(versions[model_namespace(model)]) for model in namespaces)
+            etag = quote_etag(f'{prefix}-{tag}-{digest[:16]}')
+            last_modified = max(versions.values()) // 1000
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def _product_data(product, renditions):
+    return {
+        'id': product.pk,
+        'name': product.name,
+        'price': str(product.price),
+        'charity_percentage': str(product.charity_percentage),
+        'image': image_data(product.image, renditions),
+        'status': product.status,
+        'rating_avg': product.rating_avg,
+        'rating_count': product.rating_count,
+    }
+
+
+@acached(*CATALOG_MODELS, timeout=CATALOG_TIMEOUT)
+async def _list_page(after, limit):
+    products = (
+        Product.objects.filter(status=ProductStatus.FOR_SALE, pk__gt=after)
+        .order_by('pk').only(*PRODUCT_LIST_FIELDS)[:limit + 1]
+    )
+    products = [product async for product in products]
+    has_more = len(products) > limit
+    products = products[:limit]
+    renditions = await arenditions_for(p.image.name for p in products)
+    return {
+        'results': [_product_data(p, renditions) for p in products],
+        'next_cursor': products[-1].pk if has_more else None,
+    }
+
+
+@require_GET
+@acondition('catalog', *CATALOG_MODELS)
+async def product_list(request):
+    """
+    Danh sách sản phẩm đang bán, phân trang keyset: `?after=<id>&limit=<n>`.
+    """
+    return JsonResponse(await _list_page(_int_param(request, 'after', 0), _page_limit(request)))
+
+
+@acached(*CATALOG_MODELS, timeout=CATALOG_TIMEOUT)
+async def _detail(pk):
+    try:
+        product = await Product.objects.exclude(status=ProductStatus.DELETED).aget(pk=pk)
+    except Product.DoesNotExist:
+        return None
+    reviews = (
+        Review.objects.filter(product_id=pk, display_status=ReviewStatus.VISIBLE)
+        .order_by('-created_at')
+        .values('rating', 'comment', 'created_at')[:DETAIL_REVIEW_COUNT]
+    )
+    data = _product_data(product, await arenditions_for([product.image.name]))
+    data['description'] = product.description
+    data['recent_reviews'] = [
+        {**review, 'created_at': review['created_at'].isoformat()} async for review in reviews
+    ]
+    return data
+
+
+@require_GET
+@acondition('catalog', *CATALOG_MODELS)
+async def product_detail(request, pk):
+    # Kết quả None cũng được cache nên 404 lặp lại không chạm DB
+    data = await _detail(pk)
+    if data is None:
+        raise Http404('Không tìm thấy sản phẩm.')
+    return JsonResponse(data)
+
+
+# --- Chương trình từ thiện ---
+
+PROGRAM_FIELDS = ('id', 'name', 'image', 'status', 'target_amount', 'raised_amount', 'disbursed_amount')
+
+
+def _program_data(program, renditions):
+    return {
+        'id': program.pk,
+        'name': program.name,
+        'image': image_data(program.image, renditions),
+        'status': program.status,
+        'target_amount': str(program.target_amount),
+        'raised_amount': str(program.raised_amount),
+        'disbursed_amount': str(program.disbursed_amount),
+        'progress_percent': str(program.progress_percent),
+    }
+
+
+@acached(CharityProgram, timeout=CATALOG_TIMEOUT)
+async def _program_page(after, limit, status):
+    programs = CharityProgram.objects.filter(pk__gt=after)
+    if status:
+        programs = programs.filter(status=status)
+    programs = [
+        program async for program in
+        programs.order_by('pk').only(*PROGRAM_FIELDS)[:limit + 1]
+    ]
+    has_more = len(programs) > limit
+    programs = programs[:limit]
+    renditions = await arenditions_for(p.image.name for p in programs)
+    return {
+        'results': [_program_data(p, renditions) for p in programs],
+        'next_cursor': programs[-1].pk if has_more else None,
+    }
+
+
+@require_GET
+@acondition('programs', CharityProgram)
+async def program_list(request):
+    """
+    Tiến độ quyên góp của các chương trình: `?status=ACTIVE&after=<id>&limit=<n>`.
+    """
+    status = request.GET.get('status', '')
+    if status and status not in CharityProgramStatus.values:
+        return JsonResponse({'error': 'Trạng thái không hợp lệ.'}, status=400)
+    return JsonResponse(await _program_page(_int_param(request, 'after', 0), _page_limit(request), status))
+
+
+@acached(CharityProgram, timeout=CATALOG_TIMEOUT)
+async def _program_detail(pk):
+    try:
+        program = await CharityProgram.objects.aget(pk=pk)
+    except CharityProgram.DoesNotExist:
+        return None
+    data = _program_data(program, await arenditions_for([program.image.name]))
+    data['description'] = program.description
+    return data
+
+
+@require_GET
+@acondition('programs', CharityProgram)
+async def program_detail(request, pk):
+    data = await _program_detail(pk)
+    if data is None:
+        raise Http404('Không tìm thấy chương trình.')
+    return JsonResponse(data)
+
+
+# --- Bài viết ---
+
+POST_LIST_FIELDS = ('id', 'title', 'featured_image', 'published_at', 'post_type')
+
+
+def _post_data(post, renditions):
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'featured_image': image_data(post.featured_image, renditions),
+        'published_at': post.published_at.isoformat(),
+        'post_type': post.post_type,
+    }
+
+
+@acached(ContentPost, timeout=CATALOG_TIMEOUT)
+async def _post_page(before, limit, post_type):
+    posts = ContentPost.objects.all()
+    if before:
+        posts = posts.filter(pk__lt=before)
+    if post_type:
+        posts = posts.filter(post_type=post_type)
+    # Bài mới nhất trước; pk tăng theo published_at (auto_now_add)
+    posts = [post async for post in posts.order_by('-pk').only(*POST_LIST_FIELDS)[:limit + 1]]
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+    renditions = await arenditions_for(p.featured_image.name for p in posts)
+    return {
+        'results': [_post_data(p, renditions) for p in posts],
+        'next_cursor': posts[-1].pk if has_more else None,
+    }
+
+
+@require_GET
+@acondition('posts', ContentPost)
+async def post_list(request):
+    """
+    Bài viết đã đăng, mới nhất trước: `?type=NEWS&before=<id>&limit=<n>`.
+    """
+    post_type = request.GET.get('type', '')
+    if post_type and post_type not in PostType.values:
+        return JsonResponse({'error': 'Loại bài viết không hợp lệ.'}, status=400)
+    return JsonResponse(await _post_page(_int_param(request, 'before', 0), _page_limit(request), post_type))
+
+
+@acached(ContentPost, timeout=CATALOG_TIMEOUT)
+async def _post_detail(pk):
+    post = await ContentPost.objects.filter(pk=pk).select_related('author').only(
+        *POST_LIST_FIELDS, 'content', 'author__full_name',
+    ).afirst()
+    if post is None:
+        return None
+    data = _post_data(post, await arenditions_for([post.featured_image.name]))
+    data['content'] = post.content
+    data['author'] = post.author.full_name if post.author else None
+    return data
+
+
+@require_GET
+@acondition('posts', ContentPost)
+async def post_detail(request, pk):
+    data = await _post_detail(pk)
+    if data is None:
+        raise Http404('Không tìm thấy bài viết.')
+    return JsonResponse(data)
+
+
+# --- Giỏ hàng ---
+
+def _payload(request):
+    """Tham số POST dạng form hoặc JSON; None nếu JSON lỗi."""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _optional_int(value):
+    return None if value in (None, '') else int(value)
+
+
+def _cart_data(cart):
+    lines = cart.lines()
+    return {
+        'items': [
+            {**line, 'price': str(line['price']), 'subtotal': str(line['subtotal'])}
+            for line in lines
+        ],
+        'total': str(sum((line['subtotal'] for line in lines if line['available']), Decimal(0))),
+        'count': len(cart),
+    }
+
+
+@require_GET
+def cart_view(request):
+    cart = Cart.for_request(request)
+    return set_cart_cookie(request, JsonResponse(_cart_data(cart)))
+
+
+@require_POST
+def cart_item_view(request):
+    """
+    `product_id`, `quantity` (form hoặc JSON). Mặc định đặt số lượng;
+    `mode=add` để cộng thêm. quantity = 0 là bỏ khỏi giỏ.
+    """
+    payload = _payload(request)
+    if payload is None:
+        return JsonResponse({'error': 'JSON không hợp lệ.'}, status=400)
+    cart = Cart.for_request(request)
+    try:
+        if payload.get('mode') == 'add':
+            cart.add(payload.get('product_id'), payload.get('quantity', 1))
+        else:
+            cart.set(payload.get('product_id'), payload.get('quantity'))
+    except (TypeError, ValueError) as exc:
+        # CartError là ValueError; TypeError/ValueError khác do tham số sai kiểu
+        message = str(exc) if isinstance(exc, CartError) else 'Tham số không hợp lệ.'
+        return JsonResponse({'error': message}, status=400)
+    return set_cart_cookie(request, JsonResponse(_cart_data(cart)))
+
+
+# --- Đặt hàng ---
+
+@require_POST
+def checkout_view(request):
+    """
+    Đặt hàng từ giỏ hiện tại. Tham số (form hoặc JSON): `payment_method`,
+    `shipping_address_id`, `offer_id`, `donate_voucher`.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Vui lòng đăng nhập.'}, status=401)
+    payload = _payload(request)
+    if payload is None:
+        return JsonResponse({'error': 'JSON không hợp lệ.'}, status=400)
+    try:
+        order = checkout(
+            request.user.pk,
+            payment_method=payload.get('payment_method', PaymentMethod.COD),
+            shipping_address_id=_optional_int(payload.get('shipping_address_id')),
+            offer_id=_optional_int(payload.get('offer_id')),
+            donate_voucher=str(payload.get('donate_voucher', '')).lower() in ('1', 'true', 'on'),
+        )
+    except ValueError as exc:
+        message = str(exc) if isinstance(exc, CheckoutError) else 'Tham số không hợp lệ.'
+        return JsonResponse({'error': message}, status=400)
+    return JsonResponse({
+        'order_code': order.order_code,
+        'total_amount': str(order.total_amount),
+        'order_status': order.order_status,
+    }, status=201)
+
+
+# --- Báo cáo (đọc bảng tổng hợp theo ngày, xem store/rollups.py) ---
+
+REPORT_DEFAULT_DAYS = 30
+REPORT_MAX_DAYS = 366
+
+
+def _date_range(request):
+    """`?start=YYYY-MM-DD&end=YYYY-MM-DD`, mặc định 30 ngày gần nhất."""
+    end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+    start = (
+        date.fromisoformat(request.GET['start']) if request.GET.get('start')
+        else end - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    )
+    if start > end or (end - start).days >= REPORT_MAX_DAYS:
+        raise ValueError('Khoảng ngày không hợp lệ.')
+    return start, end
+
+
+def _plain_rows(rows):
+    return [
+        {key: value.isoformat() if isinstance(value, date) else
+         str(value) if isinstance(value, Decimal) else value
+         for key, value in row.items()}
+        for row in rows
+    ]
+
+
+@require_GET
+@staff_member_required
+def sales_report(request):
+    try:
+        start, end = _date_range(request)
+    except ValueError:
+        return JsonResponse({'error': 'Khoảng ngày không hợp lệ.'}, status=400)
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': _plain_rows(rollups.sales_by_day(start, end)),
+        'top_products': _plain_rows(rollups.top_products(start, end)),
+    })
+
+
+@require_GET
+def program_donations(request, pk):
+    """Quyên góp theo ngày của một chương trình (trang minh bạch)."""
+    try:
+        start, end = _date_range(request)
+    except ValueError:
+        return JsonResponse({'error': 'Khoảng ngày không hợp lệ.'}, status=400)
+    return JsonResponse({
+        'program': pk,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': _plain_rows(rollups.donations_by_day(pk, start, end)),
+    })
+
+
+# --- Lịch sử (đọc xuyên sang bảng lưu trữ với `?archive=1`, xem store/archive.py) ---
+
+def _include_archive(request):
+    return request.GET.get('archive', '').lower() in ('1', 'true', 'on')
+
+
+def _history_rows(rows, exclude=()):
+    return [
+        {key: value.isoformat() if isinstance(value, datetime) else value
+         for key, value in row.items() if key not in exclude}
+        for row in rows
+    ]
+
+
+@require_GET
+def order_history(request, pk):
+    """Lịch sử trạng thái của một đơn hàng của người dùng (nhân viên xem được mọi đơn)."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Vui lòng đăng nhập.'}, status=401)
+    orders = Order.objects.filter(pk=pk)
+    if not request.user.is_staff:
+        orders = orders.filter(user=request.user)
+    if not orders.exists():
+        raise Http404('Không tìm thấy đơn hàng.')
+    rows = archive.read_through(
+        'status_history', include_archive=_include_archive(request), order_by='updated_at', order_id=pk,
+    )
+    return JsonResponse({'order': pk, 'history': _history_rows(rows, exclude=('order_id', 'updated_by_id'))})
+
+
+@require_GET
+def point_history(request):
+    """Lịch sử điểm của người dùng, mới nhất trước: `?before=<id>&limit=<n>&archive=1`."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Vui lòng đăng nhập.'}, status=401)
+    limit = _page_limit(request)
+    filters = {'user_id': request.user.pk}
+    before = _int_param(request, 'before', 0)
+    if before:
+        filters['id__lt'] = before
+    rows = archive.read_through(
+        'point_history', include_archive=_include_archive(request), limit=limit + 1, **filters,
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return JsonResponse({
+        'results': _history_rows(rows, exclude=('user_id',)),
+        'next_cursor': rows[-1]['id'] if has_more else None,
+    })
+
+
+# --- Tìm kiếm công khai ---
+
+SEARCH_KINDS = {'product': SearchKind.PRODUCT, 'post': SearchKind.POST, 'review': SearchKind.REVIEW}
+
+
+@cached(Product, Review, ContentPost, timeout=CATALOG_TIMEOUT)
+def _search(query, kinds, limit):
+    return search(query, kinds=kinds, public_only=True, limit=limit)
+
+
+@require_GET
+def search_view(request):
+    """`?q=<từ khóa>&kind=product|post|review&limit=<n>`, sắp theo độ liên quan."""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind')
+    if kind and kind not in SEARCH_KINDS:
+        return JsonResponse({'error': 'kind không hợp lệ.'}, status=400)
+    limit = _int_param(request, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+    kinds = [SEARCH_KINDS[kind]] if kind else None
+    results = _search(query, kinds, limit) if query else []
+    return JsonResponse({
+        'results': [
+            {'kind': row['kind'].lower(), 'id': row['object_id'], 'title': row['title'], 'rank': row['rank']}
+            for row in results
+        ],
+    })